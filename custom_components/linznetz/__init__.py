@@ -6,10 +6,15 @@ import logging
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.core_config import Config
+from homeassistant.helpers.storage import Store
 
+from .cache import StatisticsCache, get_snapshot_path, remove_snapshot
 from .const import (
     DOMAIN,
+    IMPORTS_STORAGE_KEY,
     PLATFORMS,
+    STORAGE_KEY,
+    STORAGE_VERSION,
 )
 
 
@@ -22,23 +27,37 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up linznetz from a config entry."""
 
     hass.data.setdefault(DOMAIN, {})
+    cache = StatisticsCache()
+    await hass.async_add_executor_job(
+        cache.load_snapshot, get_snapshot_path(hass, entry.entry_id)
+    )
+    hass.data[DOMAIN][entry.entry_id] = cache
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    # # only needed when client or coordinator is saved at hass.data[DOMAIN][entry.entry_id]
-    # if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-    #     hass.data[DOMAIN].pop(entry.entry_id)
-    # # otherwise this is enough:
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        hass.data[DOMAIN].pop(entry.entry_id)
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored import states and statistics snapshot of a config entry."""
+    await Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}.{entry.entry_id}").async_remove()
+    await Store(
+        hass, STORAGE_VERSION, f"{IMPORTS_STORAGE_KEY}.{entry.entry_id}"
+    ).async_remove()
+    await hass.async_add_executor_job(
+        remove_snapshot, get_snapshot_path(hass, entry.entry_id)
+    )
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+    await hass.config_entries.async_reload(entry.entry_id)
@@ -0,0 +1,288 @@
+"""In-memory cache of the imported hourly statistics for linznetz."""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+from contextlib import suppress
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+
+from homeassistant.components.recorder.models import StatisticData
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util import dt as dt_util
+
+from .const import STORAGE_KEY
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+# magic, version, byte order and number of hours of a snapshot, followed by the
+# starts, states and sums as native 8 byte values
+SNAPSHOT_HEADER = struct.Struct("<4sHHQ")
+SNAPSHOT_MAGIC = b"LNZC"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_BYTE_ORDER = 1 if sys.byteorder == "little" else 2
+
+
+def get_snapshot_path(hass: HomeAssistant, entry_id: str) -> str:
+    """Return the path of the statistics snapshot of a config entry."""
+    return hass.config.path(STORAGE_DIR, f"{STORAGE_KEY}.{entry_id}.snapshot")
+
+
+def remove_snapshot(file_path: str) -> None:
+    """Removes the statistics snapshot at file_path if it exists.
+
+    This does blocking I/O and must be run in the executor.
+    """
+    with suppress(FileNotFoundError):
+        os.remove(file_path)
+
+
+@dataclass
+class StatisticsDiff:
+    """Differences of hourly statistics to the cached hours of their time range."""
+
+    hours: int
+    # hours which are not cached yet or whose state or sum differ
+    changed_hours: int = 0
+    # cached hours whose state or sum differ, they are rewritten by the import
+    rewritten_hours: int = 0
+    # change of the consumption within the time range
+    sum_delta: Decimal = Decimal(0)
+    first_divergence: datetime | None = None
+    # indexes of the changed hours in the compared statistics
+    changed_indexes: list[int] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        """Return the differences as a JSON serializable dict."""
+        return {
+            "hours": self.hours,
+            "changed_hours": self.changed_hours,
+            "rewritten_hours": self.rewritten_hours,
+            "sum_delta": float(self.sum_delta),
+            "first_divergence": self.first_divergence.isoformat()
+            if self.first_divergence
+            else None,
+        }
+
+
+class StatisticsCache:
+    """Columnar copy of the hourly statistics stored in the recorder.
+
+    The UTC start timestamps, states and sums are kept in typed arrays ordered by
+    start, so sums and stored hours are found by bisecting the starts instead of
+    querying the recorder. The sums are floats like in the recorder.
+
+    A cache loaded from a snapshot uses read-only views of the memory-mapped
+    snapshot file, they are copied to arrays on the first update. The snapshot
+    may be outdated, e.g. after a purge of the recorder, so it is verified against
+    the last stored statistic before its first use.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty cache which is not loaded yet."""
+        self.loaded = False
+        # false for hours of a snapshot which were not compared to the recorder yet
+        self.verified = False
+        self.starts: array | memoryview = array("q")
+        self.states: array | memoryview = array("d")
+        self.sums: array | memoryview = array("d")
+        self._snapshot: mmap.mmap | None = None
+
+    def __len__(self) -> int:
+        """Return the number of cached hours."""
+        return len(self.starts)
+
+    def load_snapshot(self, file_path: str) -> bool:
+        """Loads the cached hours from the snapshot at file_path without copying them.
+
+        Returns false if there is no valid snapshot.
+        This does blocking I/O and must be run in the executor.
+        """
+        try:
+            with open(file_path, "rb") as file:
+                snapshot = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+        if len(snapshot) < SNAPSHOT_HEADER.size:
+            snapshot.close()
+            return False
+        magic, version, byte_order, count = SNAPSHOT_HEADER.unpack_from(snapshot)
+        if (
+            magic != SNAPSHOT_MAGIC
+            or version != SNAPSHOT_VERSION
+            or byte_order != SNAPSHOT_BYTE_ORDER
+            or len(snapshot) != SNAPSHOT_HEADER.size + 3 * 8 * count
+        ):
+            _LOGGER.debug("Ignoring invalid statistics snapshot %s.", file_path)
+            snapshot.close()
+            return False
+        view = memoryview(snapshot)[SNAPSHOT_HEADER.size :]
+        self._release_snapshot()
+        self._snapshot = snapshot
+        self.starts = view[: 8 * count].cast("q")
+        self.states = view[8 * count : 16 * count].cast("d")
+        self.sums = view[16 * count :].cast("d")
+        self.loaded = True
+        self.verified = False
+        _LOGGER.debug("Loaded %d hours from the statistics snapshot.", count)
+        return True
+
+    def save_snapshot(self, file_path: str) -> None:
+        """Writes the cached hours to the snapshot at file_path.
+
+        This does blocking I/O and must be run in the executor.
+        """
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(
+                SNAPSHOT_HEADER.pack(
+                    SNAPSHOT_MAGIC, SNAPSHOT_VERSION, SNAPSHOT_BYTE_ORDER, len(self)
+                )
+            )
+            for column in (self.starts, self.states, self.sums):
+                file.write(column)
+        os.replace(temp_path, file_path)
+
+    def _release_snapshot(self) -> None:
+        """Copies the cached hours of a snapshot to arrays and closes the snapshot."""
+        if self._snapshot is None:
+            return
+        starts, states, sums = self.starts, self.states, self.sums
+        self.starts = array("q", starts)
+        self.states = array("d", states)
+        self.sums = array("d", sums)
+        for column in (starts, states, sums):
+            column.release()
+        self._snapshot.close()
+        self._snapshot = None
+
+    def load(self, stored_stats: list[dict]) -> None:
+        """Replaces the cached hours with the statistics read from the recorder."""
+        self._release_snapshot()
+        self.starts = array(
+            "q", (int(_to_timestamp(stat["start"])) for stat in stored_stats)
+        )
+        self.states = array("d", (stat["state"] or 0.0 for stat in stored_stats))
+        self.sums = array("d", (stat["sum"] or 0.0 for stat in stored_stats))
+        self.loaded = True
+        self.verified = True
+        _LOGGER.debug("Loaded %d hours into the statistics cache.", len(self))
+
+    def matches_last_statistic(self, last_stat: dict | None) -> bool:
+        """Return if the last cached hour has the start and sum of last_stat.
+
+        last_stat is the last stored statistic, None if nothing is stored.
+        """
+        if last_stat is None:
+            return len(self) == 0
+        return (
+            len(self) > 0
+            and self.starts[-1] == int(_to_timestamp(last_stat["start"]))
+            and self.sums[-1] == (last_stat["sum"] or 0.0)
+        )
+
+    @property
+    def last_start(self) -> datetime | None:
+        """Return the start of the last cached hour."""
+        return dt_util.utc_from_timestamp(self.starts[-1]) if self.starts else None
+
+    @property
+    def last_sum(self) -> float | None:
+        """Return the sum of the last cached hour."""
+        return self.sums[-1] if self.sums else None
+
+    def sum_before(self, start: datetime) -> float | None:
+        """Return the sum of the last cached hour before start."""
+        index = bisect_left(self.starts, int(start.timestamp()))
+        return self.sums[index - 1] if index > 0 else None
+
+    def iter_range(self, first_start: datetime, last_start: datetime) -> Iterator[dict]:
+        """Yields the cached hours from first_start to last_start (inclusive)."""
+        first = bisect_left(self.starts, int(first_start.timestamp()))
+        last = bisect_right(self.starts, int(last_start.timestamp()))
+        for index in range(first, last):
+            yield {
+                "start": self.starts[index],
+                "state": self.states[index],
+                "sum": self.sums[index],
+            }
+
+    def get_range_hash(self, first_start: datetime, last_start: datetime) -> str:
+        """Return a hash of the cached hours from first_start to last_start (inclusive).
+
+        Only the starts and states are hashed, the sums change with imports of
+        earlier hours.
+        """
+        first = bisect_left(self.starts, int(first_start.timestamp()))
+        last = bisect_right(self.starts, int(last_start.timestamp()))
+        range_hash = hashlib.blake2b(digest_size=16)
+        range_hash.update(self.starts[first:last])
+        range_hash.update(self.states[first:last])
+        return range_hash.hexdigest()
+
+    def diff(self, statistics: list[StatisticData]) -> StatisticsDiff:
+        """Compares statistics with the cached hours of their time range.
+
+        statistics must contain every hour of their time range. The cached columns
+        of the time range are compared with the columns of statistics in one pass
+        over both, the states and sums are compared as floats like they are stored.
+        """
+        first = bisect_left(self.starts, int(statistics[0]["start"].timestamp()))
+        last = bisect_right(self.starts, int(statistics[-1]["start"].timestamp()))
+        stored_starts = self.starts[first:last]
+        stored_states = self.states[first:last]
+        stored_sums = self.sums[first:last]
+        diff = StatisticsDiff(len(statistics))
+        index = 0
+        for stat_index, stat in enumerate(statistics):
+            start = int(stat["start"].timestamp())
+            while index < len(stored_starts) and stored_starts[index] < start:
+                index += 1
+            if index < len(stored_starts) and stored_starts[index] == start:
+                if stored_states[index] == float(stat["state"]) and (
+                    stored_sums[index] == float(stat["sum"])
+                ):
+                    continue
+                diff.rewritten_hours += 1
+                diff.sum_delta += stat["state"] - Decimal(str(stored_states[index]))
+            else:
+                diff.sum_delta += stat["state"]
+            diff.changed_hours += 1
+            diff.changed_indexes.append(stat_index)
+            if diff.first_divergence is None:
+                diff.first_divergence = stat["start"]
+        return diff
+
+    def update(self, statistics: list[StatisticData], delta: Decimal) -> None:
+        """Replaces the cached hours of the time range of statistics.
+
+        statistics must contain every hour of their time range, the sums of the
+        cached hours after it are shifted by delta.
+        """
+        self._release_snapshot()
+        first = bisect_left(self.starts, int(statistics[0]["start"].timestamp()))
+        last = bisect_right(self.starts, int(statistics[-1]["start"].timestamp()))
+        self.starts[first:last] = array(
+            "q", (int(stat["start"].timestamp()) for stat in statistics)
+        )
+        self.states[first:last] = array(
+            "d", (float(stat["state"]) for stat in statistics)
+        )
+        self.sums[first:last] = array("d", (float(stat["sum"]) for stat in statistics))
+        if delta != 0:
+            for index in range(first + len(statistics), len(self.sums)):
+                self.sums[index] = float(Decimal(str(self.sums[index])) + delta)
+
+
+def _to_timestamp(value) -> float:
+    """Return the UTC timestamp of a statistic start with backwards compatibility."""
+    return value.timestamp() if isinstance(value, datetime) else value
@@ -1,13 +1,27 @@
 """Adds config flow for linznetz."""
+import os
+
 from homeassistant import config_entries
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
 
 import voluptuous as vol
 
 from .const import (
+    CONF_FEED_IN,
+    CONF_IMPORT_CHUNK_SIZE,
     CONF_METER_POINT_NUMBER,
     CONF_NAME,
+    CONF_QUARTER_HOUR_DAYS,
+    CONF_TARIFF,
+    CONF_WATCH_FOLDER,
+    DEFAULT_FEED_IN,
+    DEFAULT_IMPORT_CHUNK_SIZE,
+    DEFAULT_QUARTER_HOUR_DAYS,
     DOMAIN,
+    MIN_IMPORT_CHUNK_SIZE,
 )
+from .tariff import load_tariff
 
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
@@ -22,6 +36,12 @@ class LinzNetzFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return LinzNetzOptionsFlowHandler(config_entry)
+
     async def async_step_user(self, user_input=None):
         """Handle a flow initialized by the user."""
 
@@ -45,3 +65,74 @@ class LinzNetzFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         return self.async_show_form(
             step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
         )
+
+
+class LinzNetzOptionsFlowHandler(config_entries.OptionsFlow):
+    """Options flow for linznetz."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry):
+        """Initialize options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Manage the watched folder, the import chunk size, the QH statistics, the series and the tariff."""
+
+        errors = {}
+
+        if user_input is not None:
+            watch_folder = user_input.get(CONF_WATCH_FOLDER)
+            tariff = user_input.get(CONF_TARIFF)
+            if watch_folder and not await self.hass.async_add_executor_job(
+                os.path.isdir, watch_folder
+            ):
+                errors["base"] = "folder_not_found"
+            elif tariff:
+                try:
+                    await self.hass.async_add_executor_job(load_tariff, tariff)
+                except HomeAssistantError:
+                    errors["base"] = "invalid_tariff"
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_WATCH_FOLDER,
+                        description={
+                            "suggested_value": self.config_entry.options.get(
+                                CONF_WATCH_FOLDER
+                            )
+                        },
+                    ): str,
+                    vol.Optional(
+                        CONF_IMPORT_CHUNK_SIZE,
+                        default=self.config_entry.options.get(
+                            CONF_IMPORT_CHUNK_SIZE, DEFAULT_IMPORT_CHUNK_SIZE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=MIN_IMPORT_CHUNK_SIZE)),
+                    vol.Optional(
+                        CONF_QUARTER_HOUR_DAYS,
+                        default=self.config_entry.options.get(
+                            CONF_QUARTER_HOUR_DAYS, DEFAULT_QUARTER_HOUR_DAYS
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_FEED_IN,
+                        default=self.config_entry.options.get(
+                            CONF_FEED_IN, DEFAULT_FEED_IN
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_TARIFF,
+                        description={
+                            "suggested_value": self.config_entry.options.get(
+                                CONF_TARIFF
+                            )
+                        },
+                    ): str,
+                }
+            ),
+            errors=errors,
+        )
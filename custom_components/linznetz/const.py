@@ -10,10 +10,60 @@ PLATFORMS = [SENSOR]
 
 # Services
 SERVICE_IMPORT_REPORT = "import_report"
+SERVICE_IMPORT_REPORTS = "import_reports"
+
+# Signals
+SIGNAL_TOTALS_UPDATED = f"{DOMAIN}_totals_updated_{{}}"
+
+# Events
+# Fired after each chunk of statistics submitted by imports of multiple chunks
+EVENT_IMPORT_PROGRESS = f"{DOMAIN}_import_progress"
 END_TIME_KEY = "Datum bis"
 START_TIME_KEY = "Datum von"
+SUBSTITUTE_VALUE_KEY = "Ersatzwert"
+# Words in the name of a value column of fed in energy
+FEED_IN_COLUMN_KEYWORDS = ("einspeisung", "erzeugung", "feed-in")
+# Column of reports containing the values of multiple meter points
+METER_POINT_KEY = "Zählpunkt"
+
+# LINZ NETZ reports kWh with 3 decimals, so values are accumulated as integer Wh.
+FIXED_POINT_DIGITS = 3
+
+# Plain and compressed report files, compressed ones are always read completely
+GZIP_EXTENSION = ".gz"
+ZIP_EXTENSION = ".zip"
+COMPRESSED_EXTENSIONS = (GZIP_EXTENSION, ZIP_EXTENSION)
+REPORT_FILE_EXTENSIONS = (".csv", f".csv{GZIP_EXTENSION}", ZIP_EXTENSION)
+
+# Executor jobs shared by the entities of all meter points, e.g. parses of reports
+DATA_PENDING_JOBS = f"{DOMAIN}_pending_jobs"
+
+# Watched report folder
+# Seconds a report file must not change before it is imported
+WATCH_DEBOUNCE_DELAY = 10
+# Interval of the scan for changed report files without file system notifications
+WATCH_SCAN_INTERVAL_MINUTES = 5
+
+# Storage
+STORAGE_KEY = DOMAIN
+STORAGE_VERSION = 1
+# Content hashes and time ranges of the imported reports
+IMPORTS_STORAGE_KEY = f"{STORAGE_KEY}.imports"
 
 # Configuration and options
 DEFAULT_NAME = "SmartMeter"
 CONF_METER_POINT_NUMBER = "meter_point_number"
 CONF_NAME = "name"
+CONF_WATCH_FOLDER = "watch_folder"
+CONF_IMPORT_CHUNK_SIZE = "import_chunk_size"
+# Number of hours submitted to the recorder at once, one month by default
+DEFAULT_IMPORT_CHUNK_SIZE = 24 * 31
+MIN_IMPORT_CHUNK_SIZE = 24
+CONF_QUARTER_HOUR_DAYS = "quarter_hour_days"
+# Number of recent days of QH values imported to the short-term statistics, 0 disables it
+DEFAULT_QUARTER_HOUR_DAYS = 0
+CONF_FEED_IN = "feed_in"
+# Import the fed in instead of the consumed energy of reports containing both
+DEFAULT_FEED_IN = False
+# Fixed price, time-of-use windows or path of a price CSV for the cost statistic
+CONF_TARIFF = "tariff"
@@ -0,0 +1,36 @@
+"""Diagnostics support for linznetz."""
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from .const import CONF_METER_POINT_NUMBER
+
+TO_REDACT = {CONF_METER_POINT_NUMBER}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics of a config entry with the last import of its entities."""
+    entity_registry = er.async_get(hass)
+    entities = {}
+    for entity_entry in er.async_entries_for_config_entry(
+        entity_registry, entry.entry_id
+    ):
+        state = hass.states.get(entity_entry.entity_id)
+        entities[entity_entry.entity_id] = {
+            key: value
+            for key, value in (state.attributes.items() if state else ())
+            if key.startswith("last_import_")
+        }
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "entities": entities,
+    }
@@ -0,0 +1,1330 @@
+"""Report parsing for linznetz."""
+
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Iterable, Iterator
+import csv
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+import glob
+import gzip
+import hashlib
+import io
+from itertools import chain, islice
+import logging
+import mmap
+import os
+from operator import itemgetter
+from typing import TYPE_CHECKING, BinaryIO, NamedTuple, TextIO
+import zipfile
+import zlib
+
+from homeassistant.components.recorder.models import StatisticData
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    COMPRESSED_EXTENSIONS,
+    END_TIME_KEY,
+    FEED_IN_COLUMN_KEYWORDS,
+    FIXED_POINT_DIGITS,
+    METER_POINT_KEY,
+    REPORT_FILE_EXTENSIONS,
+    START_TIME_KEY,
+    SUBSTITUTE_VALUE_KEY,
+    ZIP_EXTENSION,
+)
+from .vectorized import (
+    VECTORIZED_CHUNK_ROWS,
+    aggregate_hour_blocks,
+    count_flags,
+    is_vectorized_engine_available,
+    read_fields,
+)
+
+if TYPE_CHECKING:
+    from .tariff import Tariff
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+NON_VALUE_KEYS = (START_TIME_KEY, END_TIME_KEY, METER_POINT_KEY, SUBSTITUTE_VALUE_KEY)
+
+# errors of corrupted or truncated (compressed) report files
+REPORT_READ_ERRORS = (
+    OSError,
+    EOFError,
+    UnicodeDecodeError,
+    zipfile.BadZipFile,
+    zlib.error,
+)
+
+FIXED_POINT_SCALE = 10**FIXED_POINT_DIGITS
+
+# line indexes of the last report files read by time range
+REPORT_LINE_INDEX_CACHE_SIZE = 4
+# time ranges are read with a margin of hours before and after them
+RANGE_MARGIN = 2 * 3600
+
+
+def get_csv_data_value_key(csv_data: list) -> str:
+    """Gets the key to access the value property from a given csv_data list."""
+    return next(key for key in csv_data[0].keys() if key not in NON_VALUE_KEYS)
+
+
+def parse_csv_date_str(csv_date_str: str) -> datetime:
+    """Parses the Austrian time string to an UTC datetime."""
+    parsed_str = dt_util.as_utc(
+        datetime.strptime(csv_date_str, "%d.%m.%Y %H:%M").replace(
+            tzinfo=dt_util.get_time_zone("Europe/Vienna")
+        )
+    )
+    return parsed_str
+
+
+class CsvDateParser:
+    """Fast parser for the "dd.mm.YYYY HH:MM" Vienna time strings of the reports.
+
+    The fields are sliced at their fixed positions and the UTC offsets of every
+    local hour of a day are computed once per day and memoized, so parsing a time
+    string only costs a few integer operations. Like parse_csv_date_str, repeated
+    local times during the winter daylight saving change resolve to their first
+    occurrence.
+    """
+
+    EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+    def __init__(self) -> None:
+        """Initialize the parser."""
+        self._time_zone = dt_util.get_time_zone("Europe/Vienna")
+        self._days: dict[str, tuple[int, tuple[int, ...]]] = {}
+
+    def _add_day(self, day_str: str) -> tuple[int, tuple[int, ...]]:
+        """Memoizes the local midnight and the UTC offsets per hour of a day."""
+        day = date(int(day_str[6:10]), int(day_str[3:5]), int(day_str[0:2]))
+        midnight = (day.toordinal() - self.EPOCH_ORDINAL) * 86400
+        first_offset = self._get_utc_offset(day, 0)
+        if first_offset == self._get_utc_offset(day, 23):
+            offsets = (first_offset,) * 24
+        else:
+            offsets = tuple(self._get_utc_offset(day, hour) for hour in range(24))
+        self._days[day_str] = (midnight, offsets)
+        return midnight, offsets
+
+    def _get_utc_offset(self, day: date, hour: int) -> int:
+        """Returns the UTC offset in seconds of a local hour."""
+        local_time = datetime(
+            day.year, day.month, day.day, hour, tzinfo=self._time_zone
+        )
+        return int(local_time.utcoffset().total_seconds())
+
+    def to_timestamp(self, csv_date_str: str) -> int:
+        """Parses the Austrian time string to an UTC timestamp."""
+        day_str = csv_date_str[:10]
+        midnight, offsets = self._days.get(day_str) or self._add_day(day_str)
+        hour = int(csv_date_str[11:13])
+        return midnight + hour * 3600 + int(csv_date_str[14:16]) * 60 - offsets[hour]
+
+    def __call__(self, csv_date_str: str) -> datetime:
+        """Parses the Austrian time string to an UTC datetime."""
+        return datetime.fromtimestamp(self.to_timestamp(csv_date_str), dt_util.UTC)
+
+
+def parse_german_number_str_to_decimal(number_str: str) -> Decimal:
+    """Parses a German number string from the CSV to a Decimal."""
+    return Decimal(number_str.replace(",", "."))
+
+
+def parse_german_number_str_to_fixed_point(number_str: str) -> int | None:
+    """Parses a German number string from the CSV to an int of FIXED_POINT_SCALE units.
+
+    Returns None if the number cannot be represented exactly.
+    """
+    whole, _, fraction = number_str.partition(",")
+    sign = 1
+    if whole[:1] == "-":
+        sign = -1
+        whole = whole[1:]
+    fraction = fraction.rstrip("0")
+    if (
+        not whole.isdecimal()
+        or len(fraction) > FIXED_POINT_DIGITS
+        or (fraction and not fraction.isdecimal())
+    ):
+        return None
+    return sign * (
+        int(whole) * FIXED_POINT_SCALE + int(fraction.ljust(FIXED_POINT_DIGITS, "0"))
+    )
+
+
+def fixed_point_to_decimal(value: int) -> Decimal:
+    """Converts an int of FIXED_POINT_SCALE units to a Decimal."""
+    return Decimal(value).scaleb(-FIXED_POINT_DIGITS)
+
+
+def is_report_file(path: str) -> bool:
+    """Returns true if path looks like a plain or compressed report file."""
+    return path.lower().endswith(REPORT_FILE_EXTENSIONS)
+
+
+def is_report_archive(path: str) -> bool:
+    """Returns true if path is compressed, it is decompressed while it is read."""
+    return path.lower().endswith(COMPRESSED_EXTENSIONS)
+
+
+def _iter_report_texts(file_path: str) -> Iterator[TextIO]:
+    """Yields a text stream of each report contained in the file at file_path.
+
+    Plain and gzip compressed files contain a single report, zip archives a report
+    per csv member. Compressed reports are decompressed and decoded while they are
+    read, they are neither extracted nor loaded into memory completely.
+    """
+    if file_path.lower().endswith(ZIP_EXTENSION):
+        with zipfile.ZipFile(file_path) as archive:
+            for member in sorted(archive.infolist(), key=lambda info: info.filename):
+                if member.is_dir() or not member.filename.lower().endswith(".csv"):
+                    continue
+                with (
+                    archive.open(member) as binary_file,
+                    io.TextIOWrapper(
+                        binary_file, encoding="UTF-8-SIG", newline=""
+                    ) as file,
+                ):
+                    yield file
+    elif is_report_archive(file_path):
+        with gzip.open(file_path, "rt", encoding="UTF-8-SIG", newline="") as file:
+            yield file
+    else:
+        with open(file_path, encoding="UTF-8-SIG", newline="") as file:
+            yield file
+
+
+class ReportRows:
+    """Rows of a report text stream, read as lists by the csv module.
+
+    The lines after the header can also be read unparsed in chunks, e.g. by the
+    vectorized engine, and the rows continue after them.
+    """
+
+    def __init__(self, file: TextIO, file_path: str) -> None:
+        """Initialize the rows of file."""
+        self._file = file
+        self._file_path = file_path
+        self._rows = self._read_rows(file)
+
+    def __iter__(self) -> "ReportRows":
+        """Return the rows."""
+        return self
+
+    def __next__(self) -> list[str]:
+        """Return the next row."""
+        return next(self._rows)
+
+    def _read_rows(self, lines: Iterable[str]) -> Iterator[list[str]]:
+        try:
+            yield from csv.reader(lines, delimiter=";")
+        except REPORT_READ_ERRORS as err:
+            raise HomeAssistantError(
+                f"Report file at path {self._file_path} cannot be read: {err}"
+            ) from err
+
+    def read_lines(self, count: int) -> list[str]:
+        """Returns up to count lines of the text stream without parsing them."""
+        try:
+            return list(islice(self._file, count))
+        except REPORT_READ_ERRORS as err:
+            raise HomeAssistantError(
+                f"Report file at path {self._file_path} cannot be read: {err}"
+            ) from err
+
+    def unread_lines(self, lines: list[str]) -> None:
+        """Parses lines returned by read_lines as the next rows."""
+        self._rows = self._read_rows(chain(lines, self._file))
+
+
+def iter_report_rows(file_path: str) -> Iterator[ReportRows]:
+    """Yields the header and rows of each report in the file at file_path.
+
+    This does blocking I/O and must be run in the executor.
+    """
+    if not os.path.isfile(file_path):
+        raise HomeAssistantError(f"Report file at path {file_path} not found.")
+    try:
+        for file in _iter_report_texts(file_path):
+            yield ReportRows(file, file_path)
+    except REPORT_READ_ERRORS as err:
+        raise HomeAssistantError(
+            f"Report file at path {file_path} cannot be read: {err}"
+        ) from err
+
+
+def iter_csv_data_from_file(file_path: str) -> Iterator[dict]:
+    """Yields the rows of the csv file at file_path one by one."""
+    for rows in iter_report_rows(file_path):
+        header = next(rows, None)
+        if header is None:
+            continue
+        for row in rows:
+            if row:
+                yield dict(zip(header, row))
+
+
+def get_csv_data_list_from_file(file_path: str) -> list:
+    """Returns content on file as csv list."""
+    return list(iter_csv_data_from_file(file_path))
+
+
+def validate_hour_block(hour_block: list) -> bool:
+    """Validates the QH values in an hour block to be in the right order."""
+    if len(hour_block) != 4:
+        return False
+    first_prefix = None
+    for index, record in enumerate(hour_block, start=0):
+        prefix, suffix = record[START_TIME_KEY].split(":")
+        if index == 0:
+            first_prefix = prefix
+        if prefix != first_prefix:
+            return False
+        if int(suffix) != (index * 15):
+            return False
+    return True
+
+
+class HourBlockAggregator:
+    """Aggregates QH rows to hourly statistics in a single pass.
+
+    Each row is validated against the current hour block as soon as it is added,
+    so a report never has to be sliced or revisited. Only the start time of the
+    first QH value of an hour is parsed.
+
+    With fixed_point the QH values are parsed to and summed up as integers and
+    only the hourly value is converted to a Decimal. A value with more decimals
+    than FIXED_POINT_DIGITS switches the aggregator to Decimal arithmetic.
+
+    previous_start and daylight_saving_change_needs_additional_hour allow to
+    continue the aggregation of a report which was partially aggregated before.
+
+    With quarter_hours_since the QH values of the hours starting at or after this
+    UTC timestamp are kept as statistics (without sum) in quarter_hour_statistics.
+
+    With a tariff every QH value is multiplied with its price when its hour is
+    complete and the cost of the hour is kept as statistic (without sum) in
+    cost_statistics. Hours without prices get no cost statistic.
+    """
+
+    QH_MINUTES = ("00", "15", "30", "45")
+
+    def __init__(
+        self,
+        fixed_point: bool = True,
+        previous_start: int | None = None,
+        daylight_saving_change_needs_additional_hour: bool = False,
+        quarter_hours_since: int | None = None,
+        tariff: "Tariff | None" = None,
+    ) -> None:
+        """Initialize the aggregator."""
+        self._fixed_point = fixed_point
+        self._index = 0
+        self._hour_prefix = None
+        self._hourly_sum = 0 if fixed_point else Decimal(0)
+        self._previous_start = previous_start
+        self._daylight_saving_change_needs_additional_hour = (
+            daylight_saving_change_needs_additional_hour
+        )
+        self._date_parser = CsvDateParser()
+        self._quarter_hours_since = quarter_hours_since
+        self._tariff = tariff
+        self._keep_quarter_hour_values = (
+            quarter_hours_since is not None or tariff is not None
+        )
+        self._quarter_hour_values = []
+        self.quarter_hour_statistics: list[StatisticData] = []
+        self.cost_statistics: list[StatisticData] = []
+
+    @property
+    def previous_start(self) -> int | None:
+        """Return the UTC timestamp of the last complete hour."""
+        return self._previous_start
+
+    @property
+    def daylight_saving_change_needs_additional_hour(self) -> bool:
+        """Return if the next hour repeats the last hour on a winter daylight saving change."""
+        return self._daylight_saving_change_needs_additional_hour
+
+    def add(self, start_str: str, end_str: str, value_str: str) -> StatisticData | None:
+        """Adds a QH row and returns the statistic of its hour once the hour is complete."""
+        hour_prefix, minutes = start_str[:-3], start_str[-2:]
+        if self._index == 0:
+            self._hour_prefix = hour_prefix
+        if hour_prefix != self._hour_prefix or minutes != self.QH_MINUTES[self._index]:
+            raise HomeAssistantError(
+                "Invalid hour block detected. Start time of QH values must always be in the following order: xx:00, xx:15, xx:30, xx:45."
+            )
+        if self._fixed_point:
+            value = parse_german_number_str_to_fixed_point(value_str)
+            if value is None:
+                _LOGGER.debug(
+                    "Value %s exceeds the fixed point precision, continue with Decimal.",
+                    value_str,
+                )
+                self._fixed_point = False
+                self._hourly_sum = fixed_point_to_decimal(self._hourly_sum)
+                self._quarter_hour_values = [
+                    fixed_point_to_decimal(qh_value)
+                    for qh_value in self._quarter_hour_values
+                ]
+        if not self._fixed_point:
+            value = parse_german_number_str_to_decimal(value_str)
+        self._hourly_sum += value
+        if self._keep_quarter_hour_values:
+            self._quarter_hour_values.append(value)
+        if self._index < 3:
+            self._index += 1
+            return None
+
+        block_start_str = f"{hour_prefix}:00"
+        try:
+            start = self._date_parser.to_timestamp(block_start_str)
+        except (IndexError, ValueError) as err:
+            raise HomeAssistantError(
+                f"Invalid start time {block_start_str} in report."
+            ) from err
+        if self._daylight_saving_change_needs_additional_hour:
+            # double check for daylight saving change, reset the flag anyway
+            if start == self._previous_start:
+                start += 3600
+            self._daylight_saving_change_needs_additional_hour = False
+        # LINZ NETZ indicates a winter daylight saving change when the start_time of an hour block is equal to the end_time.
+        # Therefore it is necessary to add an additional (UTC) hour to the next hour.
+        if end_str == block_start_str:
+            self._daylight_saving_change_needs_additional_hour = True
+
+        statistic = StatisticData(
+            start=datetime.fromtimestamp(start, dt_util.UTC),
+            state=fixed_point_to_decimal(self._hourly_sum)
+            if self._fixed_point
+            else self._hourly_sum,
+        )
+        if (
+            self._tariff is not None
+            and (prices := self._tariff.get_prices(start)) is not None
+        ):
+            cost = sum(
+                qh_value * price
+                for qh_value, price in zip(self._quarter_hour_values, prices)
+            )
+            self.cost_statistics.append(
+                StatisticData(
+                    start=statistic["start"],
+                    state=cost.scaleb(-FIXED_POINT_DIGITS)
+                    if self._fixed_point
+                    else cost,
+                )
+            )
+        if self._quarter_hours_since is not None and start >= self._quarter_hours_since:
+            self.quarter_hour_statistics.extend(
+                StatisticData(
+                    start=datetime.fromtimestamp(start + 900 * index, dt_util.UTC),
+                    state=fixed_point_to_decimal(qh_value)
+                    if self._fixed_point
+                    else qh_value,
+                )
+                for index, qh_value in enumerate(self._quarter_hour_values)
+            )
+        self._quarter_hour_values = []
+        self._previous_start = start
+        self._index = 0
+        self._hourly_sum = 0 if self._fixed_point else Decimal(0)
+        return statistic
+
+    @property
+    def has_incomplete_hour(self) -> bool:
+        """Return if QH values of an incomplete hour block were added."""
+        return self._index != 0
+
+    def finish(self) -> None:
+        """Ensures that no incomplete hour block is left over."""
+        if self.has_incomplete_hour:
+            raise HomeAssistantError(
+                "Report to import seems to be corrupted. Please ensure that there are at least 4 QH values per hour."
+            )
+
+
+def iter_hourly_statistics(
+    csv_data: Iterable[dict],
+    fixed_point: bool = True,
+    aggregator: HourBlockAggregator | None = None,
+) -> Iterator[StatisticData]:
+    """Yields the hourly statistics (without sum) of a stream of QH rows."""
+    if aggregator is None:
+        aggregator = HourBlockAggregator(fixed_point)
+    csv_data_value_key = None
+    for record in csv_data:
+        if csv_data_value_key is None:
+            csv_data_value_key = get_csv_data_value_key([record])
+        statistic = aggregator.add(
+            record[START_TIME_KEY], record[END_TIME_KEY], record[csv_data_value_key]
+        )
+        if statistic is not None:
+            yield statistic
+    aggregator.finish()
+
+
+@dataclass
+class ParsedReport:
+    """Hourly and QH statistics (without sum) of one or more reports."""
+
+    statistics: list[StatisticData]
+    quarter_hour_statistics: list[StatisticData] = field(default_factory=list)
+    # number of QH values flagged as substitute values (Ersatzwert)
+    substitute_values: int = 0
+    # hourly costs (without sum) of the hours with prices of the tariff
+    cost_statistics: list[StatisticData] = field(default_factory=list)
+
+
+class ReportSeries(NamedTuple):
+    """A series of QH values in a report."""
+
+    # value of the meter point column, None for reports without it
+    meter_point: str | None
+    # name of the value column if the report has multiple of the same kind
+    column: str | None
+    feed_in: bool
+
+
+class ReportSchema:
+    """Column plan of a report compiled once from its header.
+
+    The rows are read as lists and the columns of the start and end time, the
+    meter point, the substitute value flag and every value column are accessed
+    by their index.
+    """
+
+    def __init__(self, header: list[str]) -> None:
+        """Compile the column plan of header."""
+        header = [name.strip() for name in header]
+        if START_TIME_KEY not in header or END_TIME_KEY not in header:
+            raise HomeAssistantError(
+                f"Report header {';'.join(header)} lacks the columns {START_TIME_KEY} and {END_TIME_KEY}."
+            )
+        self.start_index = header.index(START_TIME_KEY)
+        self.end_index = header.index(END_TIME_KEY)
+        self.get_times = itemgetter(self.start_index, self.end_index)
+        self.meter_point_index = (
+            header.index(METER_POINT_KEY) if METER_POINT_KEY in header else None
+        )
+        self.substitute_value_index = (
+            header.index(SUBSTITUTE_VALUE_KEY)
+            if SUBSTITUTE_VALUE_KEY in header
+            else None
+        )
+        value_columns = [
+            (name, is_feed_in_column(name), index)
+            for index, name in enumerate(header)
+            if name and name not in NON_VALUE_KEYS
+        ]
+        if len(value_columns) == 0:
+            raise HomeAssistantError(
+                f"Report header {';'.join(header)} contains no value column."
+            )
+        # the names of the columns are only part of the series if they are needed
+        # to tell them apart, so reports with renamed value columns still match
+        columns_per_kind = Counter(feed_in for _, feed_in, _ in value_columns)
+        self.value_columns = [
+            (name if columns_per_kind[feed_in] > 1 else None, feed_in, index)
+            for name, feed_in, index in value_columns
+        ]
+
+    def get_series(self, meter_point: str | None) -> list[tuple[ReportSeries, int]]:
+        """Returns the series and value column indexes of the rows of meter_point."""
+        return [
+            (ReportSeries(meter_point, name, feed_in), index)
+            for name, feed_in, index in self.value_columns
+        ]
+
+    def is_substitute_value(self, row: list[str]) -> bool:
+        """Returns if the values of row are flagged as substitute values."""
+        index = self.substitute_value_index
+        return index is not None and index < len(row) and row[index].strip() != ""
+
+
+def is_feed_in_column(name: str) -> bool:
+    """Returns if the value column name contains fed in energy."""
+    name = name.lower()
+    return any(keyword in name for keyword in FEED_IN_COLUMN_KEYWORDS)
+
+
+def select_series(
+    series: Iterable[ReportSeries], meter_point: str | None, feed_in: bool = False
+) -> ReportSeries | None:
+    """Returns the series of meter_point among the series of one or more reports.
+
+    Series of a meter point column match by its value, series without it match if
+    their column name contains the meter point number and otherwise all series
+    without meter point are considered. Of multiple candidates the consumption or
+    feed-in series is chosen, ambiguous candidates match nothing.
+    """
+    series = list(series)
+    candidates = (
+        [item for item in series if item.meter_point == meter_point]
+        or [
+            item
+            for item in series
+            if item.meter_point is None
+            and item.column is not None
+            and meter_point
+            and meter_point in item.column
+        ]
+        or [item for item in series if item.meter_point is None]
+    )
+    if len(candidates) > 1:
+        candidates = [item for item in candidates if item.feed_in == feed_in]
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def parse_report_file_series(
+    file_path: str,
+    quarter_hours_since: int | None = None,
+    tariff: "Tariff | None" = None,
+) -> dict[ReportSeries, ParsedReport]:
+    """Reads, parses and aggregates every series of the report at file_path.
+
+    Each report is read in a single pass with the column plan compiled from its
+    header. Reports with a meter point column contain the series of each meter
+    point, reports with multiple value columns (e.g. consumption and feed-in)
+    one series per column. The reports of a zip archive are merged like multiple
+    report files. The QH values of the hours starting at or after the UTC
+    timestamp quarter_hours_since are kept as well, the hourly costs with the
+    prices of a tariff are computed in the same pass.
+    This does blocking I/O and must be run in the executor.
+    """
+    reports = [
+        _parse_report_rows(rows, quarter_hours_since, tariff)
+        for rows in iter_report_rows(file_path)
+    ]
+    if len(reports) == 1:
+        reports = reports[0]
+    else:
+        reports = _merge_reports(reports)
+    if not any(len(report.statistics) > 0 for report in reports.values()):
+        raise HomeAssistantError(f"Report file at path {file_path} contains no data.")
+    return reports
+
+
+def _parse_report_rows(
+    rows: Iterator[list[str]],
+    quarter_hours_since: int | None,
+    tariff: "Tariff | None" = None,
+) -> dict[ReportSeries, ParsedReport]:
+    """Parses and aggregates every series of the header and rows of a report.
+
+    The lines of report files without meter point column are aggregated by the
+    vectorized engine if numpy is installed, the rows it leaves over and the
+    rows of reports with a meter point column are aggregated row by row.
+    """
+    header = next(rows, None)
+    if header is None:
+        return {}
+    schema = ReportSchema(header)
+    get_times = schema.get_times
+    meter_point_index = schema.meter_point_index
+    reports: dict[ReportSeries, ParsedReport] = {}
+    previous_start = None
+    needs_additional_hour = False
+    if (
+        isinstance(rows, ReportRows)
+        and meter_point_index is None
+        and is_vectorized_engine_available()
+    ):
+        previous_start, needs_additional_hour = _aggregate_lines_vectorized(
+            schema, len(header), rows, reports, quarter_hours_since, tariff
+        )
+    aggregators: list[tuple[HourBlockAggregator, ParsedReport]] = []
+    series_by_meter_point: dict[
+        str | None, list[tuple[HourBlockAggregator, ParsedReport, int]]
+    ] = {}
+    for row in rows:
+        if not row:
+            continue
+        meter_point = None if meter_point_index is None else row[meter_point_index]
+        if (row_series := series_by_meter_point.get(meter_point)) is None:
+            row_series = series_by_meter_point[meter_point] = []
+            for series, index in schema.get_series(meter_point):
+                aggregator = HourBlockAggregator(
+                    previous_start=previous_start,
+                    daylight_saving_change_needs_additional_hour=needs_additional_hour,
+                    quarter_hours_since=quarter_hours_since,
+                    tariff=tariff,
+                )
+                report = reports.setdefault(series, ParsedReport([]))
+                aggregators.append((aggregator, report))
+                row_series.append((aggregator, report, index))
+        start_str, end_str = get_times(row)
+        is_substitute_value = schema.is_substitute_value(row)
+        for aggregator, report, index in row_series:
+            statistic = aggregator.add(start_str, end_str, row[index])
+            if statistic is not None:
+                report.statistics.append(statistic)
+            if is_substitute_value:
+                report.substitute_values += 1
+    for aggregator, report in aggregators:
+        aggregator.finish()
+        report.quarter_hour_statistics.extend(aggregator.quarter_hour_statistics)
+        report.cost_statistics.extend(aggregator.cost_statistics)
+    return reports
+
+
+def _aggregate_lines_vectorized(
+    schema: ReportSchema,
+    column_count: int,
+    rows: ReportRows,
+    reports: dict[ReportSeries, ParsedReport],
+    quarter_hours_since: int | None,
+    tariff: "Tariff | None",
+) -> tuple[int | None, bool]:
+    """Aggregates the lines of a report without meter point column to reports.
+
+    The lines are split and aggregated in chunks of VECTORIZED_CHUNK_ROWS lines
+    with read_fields and aggregate_hour_blocks, bypassing the csv module, until
+    a chunk cannot be vectorized, e.g. because of quoted fields, values with
+    more decimals or invalid hour blocks. That chunk is put back to the rows and
+    the start of the last aggregated hour and the daylight saving change flag
+    are returned to continue with the HourBlockAggregator, so the results always
+    match the row by row aggregation.
+    """
+    series_indexes = schema.get_series(None)
+    substitute_value_indexes = (
+        ()
+        if schema.substitute_value_index is None
+        else (schema.substitute_value_index,)
+    )
+    indexes = (
+        schema.start_index,
+        schema.end_index,
+        *substitute_value_indexes,
+        *(index for _, index in series_indexes),
+    )
+    date_parser = CsvDateParser()
+    previous_start = None
+    needs_additional_hour = False
+    while lines := rows.read_lines(VECTORIZED_CHUNK_ROWS):
+        fields = read_fields(lines, column_count, indexes)
+        blocks = None
+        if fields is not None:
+            starts, ends, *value_fields = fields
+            substitute_value_fields = (
+                value_fields.pop(0) if substitute_value_indexes else None
+            )
+            blocks = aggregate_hour_blocks(
+                starts,
+                ends,
+                value_fields,
+                date_parser.to_timestamp,
+                previous_start,
+                needs_additional_hour,
+            )
+        if blocks is None:
+            _LOGGER.debug(
+                "Aggregating the rest of the report row by row after %d hours.",
+                sum(len(report.statistics) for report in reports.values()),
+            )
+            rows.unread_lines(lines)
+            break
+        substitute_values = (
+            0
+            if substitute_value_fields is None
+            else count_flags(substitute_value_fields)
+        )
+        for (series, _), hourly_sums, quarter_hour_values in zip(
+            series_indexes, blocks.hourly_sums, blocks.quarter_hour_values
+        ):
+            report = reports.setdefault(series, ParsedReport([]))
+            _add_hour_blocks(
+                report,
+                blocks.starts,
+                hourly_sums,
+                quarter_hour_values,
+                quarter_hours_since,
+                tariff,
+            )
+            report.substitute_values += substitute_values
+        previous_start = blocks.starts[-1]
+        needs_additional_hour = blocks.daylight_saving_change_needs_additional_hour
+    return previous_start, needs_additional_hour
+
+
+def _add_hour_blocks(
+    report: ParsedReport,
+    starts: list[int],
+    hourly_sums: list[int],
+    quarter_hour_values,
+    quarter_hours_since: int | None,
+    tariff: "Tariff | None",
+) -> None:
+    """Adds the hours aggregated by aggregate_hour_blocks to report.
+
+    The statistics are created like by the HourBlockAggregator, only the QH
+    values of the hours with QH statistics or costs are converted.
+    """
+    report.statistics.extend(
+        StatisticData(
+            start=datetime.fromtimestamp(start, dt_util.UTC),
+            state=fixed_point_to_decimal(hourly_sum),
+        )
+        for start, hourly_sum in zip(starts, hourly_sums)
+    )
+    if tariff is None and (
+        quarter_hours_since is None or starts[-1] < quarter_hours_since
+    ):
+        return
+    for start, hour_values in zip(starts, quarter_hour_values.tolist()):
+        if tariff is not None and (prices := tariff.get_prices(start)) is not None:
+            cost = sum(qh_value * price for qh_value, price in zip(hour_values, prices))
+            report.cost_statistics.append(
+                StatisticData(
+                    start=datetime.fromtimestamp(start, dt_util.UTC),
+                    state=cost.scaleb(-FIXED_POINT_DIGITS),
+                )
+            )
+        if quarter_hours_since is not None and start >= quarter_hours_since:
+            report.quarter_hour_statistics.extend(
+                StatisticData(
+                    start=datetime.fromtimestamp(start + 900 * index, dt_util.UTC),
+                    state=fixed_point_to_decimal(qh_value),
+                )
+                for index, qh_value in enumerate(hour_values)
+            )
+
+
+def format_series(series: Iterable[ReportSeries]) -> str:
+    """Returns the series of reports as readable list, e.g. for error messages."""
+    names = []
+    for item in series:
+        name = " ".join(part for part in (item.meter_point, item.column) if part)
+        kind = "feed-in" if item.feed_in else "consumption"
+        names.append(f"{name} ({kind})" if name else kind)
+    return ", ".join(names) or "none"
+
+
+def get_series_report(
+    reports: dict[ReportSeries, ParsedReport],
+    meter_point: str | None,
+    feed_in: bool = False,
+) -> ParsedReport | None:
+    """Returns the report of the series of meter_point, see select_series."""
+    series = select_series(reports, meter_point, feed_in)
+    return None if series is None else reports[series]
+
+
+def parse_report_file(
+    file_path: str,
+    quarter_hours_since: int | None = None,
+    tariff: "Tariff | None" = None,
+) -> ParsedReport:
+    """Reads, parses and aggregates the report at file_path in a single pass.
+
+    The QH values of the hours starting at or after the UTC timestamp
+    quarter_hours_since are kept as well, the hourly costs with the prices of a
+    tariff are computed in the same pass.
+    This does blocking I/O and must be run in the executor.
+    """
+    reports = parse_report_file_series(file_path, quarter_hours_since, tariff)
+    if len(reports) > 1:
+        raise HomeAssistantError(
+            f"Report file at path {file_path} contains multiple series."
+        )
+    return next(iter(reports.values()))
+
+
+def get_hourly_statistics_from_file(file_path: str) -> list[StatisticData]:
+    """Reads, parses and aggregates the report at file_path to hourly statistics.
+
+    This does blocking I/O and must be run in the executor.
+    """
+    return parse_report_file(file_path).statistics
+
+
+def expand_report_paths(paths: Iterable[str]) -> list[str]:
+    """Expands directories and glob patterns to the report files they contain."""
+    file_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            file_paths.extend(
+                sorted(
+                    file_path
+                    for file_path in glob.glob(os.path.join(path, "*"))
+                    if is_report_file(file_path)
+                )
+            )
+        elif glob.has_magic(path):
+            file_paths.extend(sorted(glob.glob(path)))
+        else:
+            file_paths.append(path)
+    return list(dict.fromkeys(file_paths))
+
+
+def get_report_files_hash(paths: str | Iterable[str]) -> str:
+    """Returns a hash of the content of the report files at paths.
+
+    This does blocking I/O and must be run in the executor.
+    """
+    content_hash = hashlib.blake2b(digest_size=16)
+    for file_path in expand_report_paths([paths] if isinstance(paths, str) else paths):
+        if not os.path.isfile(file_path):
+            raise HomeAssistantError(f"Report file at path {file_path} not found.")
+        with open(file_path, "rb") as file:
+            content_hash.update(hashlib.file_digest(file, "blake2b").digest())
+    return content_hash.hexdigest()
+
+
+def _merge_statistics(series: Iterable[list[StatisticData]]) -> list[StatisticData]:
+    """Merges statistics series ordered by start, later series win."""
+    merged_statistics: dict[datetime, StatisticData] = {}
+    for statistics in series:
+        for stat in statistics:
+            merged_statistics[stat["start"]] = stat
+    return [merged_statistics[start] for start in sorted(merged_statistics)]
+
+
+def parse_report_files_series(
+    paths: Iterable[str],
+    quarter_hours_since: int | None = None,
+    tariff: "Tariff | None" = None,
+) -> dict[ReportSeries, ParsedReport]:
+    """Reads multiple reports and merges every series of them.
+
+    The reports are applied in the order of their time range, so hours contained
+    in multiple reports get the values of the report covering the later range.
+    This does blocking I/O and must be run in the executor.
+    """
+    file_paths = expand_report_paths(paths)
+    if len(file_paths) == 0:
+        raise HomeAssistantError(f"No report files found for {', '.join(paths)}.")
+    return _merge_reports(
+        parse_report_file_series(file_path, quarter_hours_since, tariff)
+        for file_path in file_paths
+    )
+
+
+def _merge_reports(
+    reports: Iterable[dict[ReportSeries, ParsedReport]],
+) -> dict[ReportSeries, ParsedReport]:
+    """Merges the series of multiple reports.
+
+    The reports are applied in the order of their time range, so hours contained
+    in multiple reports get the values of the report covering the later range.
+    """
+    reports_by_series: dict[ReportSeries, list[ParsedReport]] = {}
+    for series_reports in reports:
+        for series, report in series_reports.items():
+            if len(report.statistics) > 0:
+                reports_by_series.setdefault(series, []).append(report)
+    merged_reports = {}
+    for series, series_reports in reports_by_series.items():
+        series_reports.sort(
+            key=lambda report: (
+                report.statistics[0]["start"],
+                report.statistics[-1]["start"],
+            )
+        )
+        merged_reports[series] = ParsedReport(
+            _merge_statistics(report.statistics for report in series_reports),
+            _merge_statistics(
+                report.quarter_hour_statistics for report in series_reports
+            ),
+            sum(report.substitute_values for report in series_reports),
+            _merge_statistics(report.cost_statistics for report in series_reports),
+        )
+        _LOGGER.debug(
+            "Merged %d reports of %s to %d hours.",
+            len(series_reports),
+            series,
+            len(merged_reports[series].statistics),
+        )
+    return merged_reports
+
+
+def parse_report_files(
+    paths: Iterable[str],
+    quarter_hours_since: int | None = None,
+    tariff: "Tariff | None" = None,
+) -> ParsedReport:
+    """Reads multiple reports of a single series and merges them.
+
+    This does blocking I/O and must be run in the executor.
+    """
+    reports = parse_report_files_series(paths, quarter_hours_since, tariff)
+    if len(reports) > 1:
+        raise HomeAssistantError(
+            f"Report files at {', '.join(paths)} contain multiple series."
+        )
+    return next(iter(reports.values()))
+
+
+def get_merged_hourly_statistics_from_files(
+    paths: Iterable[str],
+) -> list[StatisticData]:
+    """Reads multiple reports and merges them to one hourly series ordered by start.
+
+    This does blocking I/O and must be run in the executor.
+    """
+    return parse_report_files(paths).statistics
+
+
+class ReportLineIndex:
+    """Byte offsets of the lines of a plain report file.
+
+    The index is built once per version of a file by scanning the memory-mapped
+    file for line ends, the lines themselves are neither decoded nor copied.
+    """
+
+    def __init__(self, file_map: mmap.mmap) -> None:
+        """Index the lines of a memory-mapped report."""
+        find = file_map.find
+        self.header_end = find(b"\n") + 1 or len(file_map)
+        # the offsets of the row lines followed by the end of the file
+        self.offsets = array("q")
+        offset = self.header_end
+        while offset < len(file_map):
+            self.offsets.append(offset)
+            offset = find(b"\n", offset) + 1 or len(file_map)
+        self.offsets.append(len(file_map))
+
+    def __len__(self) -> int:
+        """Return the number of row lines."""
+        return len(self.offsets) - 1
+
+    def find_hour(
+        self,
+        file_map: mmap.mmap,
+        schema: ReportSchema,
+        date_parser: CsvDateParser,
+        timestamp: int,
+    ) -> int:
+        """Returns the index of the line of the first QH of the hour at timestamp.
+
+        The lines are located by a binary search on the start times of their rows
+        and moved back to the first QH of their hour. Returns the number of lines
+        if all rows start before timestamp.
+        """
+
+        def get_start(index: int) -> int:
+            return date_parser.to_timestamp(get_start_str(index))
+
+        def get_start_str(index: int) -> str:
+            line = file_map[self.offsets[index] : self.offsets[index + 1]]
+            return line.split(b";")[schema.start_index].decode("UTF-8")
+
+        index = bisect_left(range(len(self)), timestamp, key=get_start)
+        while 0 < index < len(self) and get_start_str(index)[14:16] != "00":
+            index -= 1
+        return index
+
+
+@lru_cache(maxsize=REPORT_LINE_INDEX_CACHE_SIZE)
+def _get_report_line_index(file_path: str, size: int, mtime_ns: int) -> ReportLineIndex:
+    """Returns the line index of the version of the report with size and mtime_ns."""
+    with (
+        open(file_path, "rb") as file,
+        mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as file_map,
+    ):
+        return ReportLineIndex(file_map)
+
+
+def parse_report_file_range(
+    file_path: str,
+    quarter_hours_since: int | None = None,
+    tariff: "Tariff | None" = None,
+    start: int | None = None,
+    end: int | None = None,
+) -> dict[ReportSeries, ParsedReport]:
+    """Reads every series of the hours from start until end of the report at file_path.
+
+    start and end are UTC timestamps, None reads from the first or until the
+    last hour. Plain reports without meter point column are memory-mapped and
+    only the lines of the time range, located with the line index of the file,
+    are decoded and parsed, so reading the last week of a report of many years
+    touches a small fraction of it. The line index is kept for the last few
+    report files. Other reports are parsed completely. The substitute values are
+    counted in the lines read.
+    This does blocking I/O and must be run in the executor.
+    """
+    reports = None
+    if not is_report_archive(file_path) and os.path.isfile(file_path):
+        try:
+            reports = _parse_report_file_lines_range(
+                file_path, quarter_hours_since, tariff, start, end
+            )
+        except (IndexError, ValueError) as err:
+            # e.g. empty files or lines without a valid start time
+            _LOGGER.debug("Reading the range of %s failed: %s", file_path, err)
+    if reports is None:
+        reports = parse_report_file_series(file_path, quarter_hours_since, tariff)
+    start_datetime = None if start is None else dt_util.utc_from_timestamp(start)
+    end_datetime = None if end is None else dt_util.utc_from_timestamp(end)
+
+    def in_range(stat: StatisticData) -> bool:
+        # QH statistics are kept with their hour, so a range not starting or ending
+        # on a full hour never returns QH values of an hour which is left out
+        hour_start = stat["start"].replace(minute=0)
+        return (start_datetime is None or hour_start >= start_datetime) and (
+            end_datetime is None or hour_start < end_datetime
+        )
+
+    return {
+        series: ParsedReport(
+            list(filter(in_range, report.statistics)),
+            list(filter(in_range, report.quarter_hour_statistics)),
+            report.substitute_values,
+            list(filter(in_range, report.cost_statistics)),
+        )
+        for series, report in reports.items()
+    }
+
+
+def _parse_report_file_lines_range(
+    file_path: str,
+    quarter_hours_since: int | None,
+    tariff: "Tariff | None",
+    start: int | None,
+    end: int | None,
+) -> dict[ReportSeries, ParsedReport] | None:
+    """Parses the lines of the hours from start until end of a plain report.
+
+    The lines are read RANGE_MARGIN around the range, so a range starting in the
+    repeated hour of a winter daylight saving change, where the start times are
+    not ordered, is aggregated like in the complete report. Returns None for
+    reports with a meter point column, which are not ordered by time.
+    """
+    try:
+        file_stat = os.stat(file_path)
+        line_index = _get_report_line_index(
+            file_path, file_stat.st_size, file_stat.st_mtime_ns
+        )
+        with (
+            open(file_path, "rb") as file,
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as file_map,
+        ):
+            header = file_map[: line_index.header_end].decode("UTF-8-SIG")
+            schema = ReportSchema(next(csv.reader([header], delimiter=";"), []))
+            if schema.meter_point_index is not None:
+                return None
+            date_parser = CsvDateParser()
+            first = (
+                0
+                if start is None
+                else line_index.find_hour(
+                    file_map, schema, date_parser, start - RANGE_MARGIN
+                )
+            )
+            last = (
+                len(line_index)
+                if end is None
+                else line_index.find_hour(
+                    file_map, schema, date_parser, end + RANGE_MARGIN
+                )
+            )
+            text = file_map[
+                line_index.offsets[first] : line_index.offsets[last]
+            ].decode("UTF-8")
+    except OSError as err:
+        raise HomeAssistantError(
+            f"Report file at path {file_path} cannot be read: {err}"
+        ) from err
+    _LOGGER.debug(
+        "Read lines %d to %d of %d of report file %s.",
+        first,
+        last,
+        len(line_index),
+        file_path,
+    )
+    return _parse_report_rows(
+        ReportRows(io.StringIO(header + text, newline=""), file_path),
+        quarter_hours_since,
+        tariff,
+    )
+
+
+@dataclass
+class ReportFileState:
+    """Progress of an incrementally imported report file."""
+
+    size: int
+    mtime: float
+    offset: int
+    checksum: int
+    last_start: int | None = None
+    daylight_saving_change_needs_additional_hour: bool = False
+    sum: Decimal | None = None
+
+    def as_dict(self) -> dict:
+        """Return the state as a JSON serializable dict."""
+        data = asdict(self)
+        data["sum"] = None if self.sum is None else str(self.sum)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ReportFileState":
+        """Return the state from a dict created by as_dict."""
+        data = dict(data)
+        data["sum"] = None if data.get("sum") is None else Decimal(data["sum"])
+        return cls(**data)
+
+
+# number of bytes before the processed offset used to detect rewritten reports
+REPORT_FILE_CHECKSUM_LENGTH = 256
+
+
+def _get_report_file_checksum(file: BinaryIO, offset: int) -> int:
+    """Returns the checksum of the bytes right before offset."""
+    start = max(0, offset - REPORT_FILE_CHECKSUM_LENGTH)
+    file.seek(start)
+    return zlib.crc32(file.read(offset - start))
+
+
+def parse_report_file_tail(
+    file_path: str,
+    state: ReportFileState | None,
+    quarter_hours_since: int | None = None,
+    meter_point: str | None = None,
+    feed_in: bool = False,
+    tariff: "Tariff | None" = None,
+) -> tuple[ParsedReport, ReportFileState]:
+    """Reads the complete hours appended to the report at file_path since state.
+
+    The file is read from the byte offset processed before, so only the new tail
+    of a growing report is parsed. The report is read from the beginning when no
+    state is given or the processed part of the file has changed. QH values of an
+    incomplete last hour are left for the next call. The returned state keeps the
+    sum of the given state. Only the series of meter_point is read from reports
+    of multiple series, see select_series. The hourly costs are computed with
+    the prices of a tariff.
+    This does blocking I/O and must be run in the executor.
+    """
+    if not os.path.isfile(file_path):
+        raise HomeAssistantError(f"Report file at path {file_path} not found.")
+    try:
+        return _read_report_file_tail(
+            file_path, state, quarter_hours_since, meter_point, feed_in, tariff
+        )
+    except REPORT_READ_ERRORS as err:
+        raise HomeAssistantError(
+            f"Report file at path {file_path} cannot be read: {err}"
+        ) from err
+
+
+def _read_report_file_tail(
+    file_path: str,
+    state: ReportFileState | None,
+    quarter_hours_since: int | None,
+    meter_point: str | None,
+    feed_in: bool,
+    tariff: "Tariff | None",
+) -> tuple[ParsedReport, ReportFileState]:
+    """Reads the complete hours appended to the report, see parse_report_file_tail."""
+    file_stat = os.stat(file_path)
+    if (
+        state is not None
+        and state.size == file_stat.st_size
+        and state.mtime == file_stat.st_mtime
+    ):
+        _LOGGER.debug("Report file %s did not change since last import.", file_path)
+        return ParsedReport([]), state
+
+    statistics = []
+    substitute_values = hour_substitute_values = 0
+    with open(file_path, "rb") as file:
+        if state is not None and (
+            file_stat.st_size < state.offset
+            or _get_report_file_checksum(file, state.offset) != state.checksum
+        ):
+            _LOGGER.debug(
+                "Report file %s was rewritten, read it completely.", file_path
+            )
+            state = None
+
+        file.seek(0)
+        schema = ReportSchema(
+            next(csv.reader([file.readline().decode("UTF-8-SIG")], delimiter=";"))
+        )
+        offset = file.tell()
+        if state is not None:
+            offset = max(offset, state.offset)
+            file.seek(offset)
+        processed_offset = offset
+
+        def iter_lines() -> Iterator[str]:
+            nonlocal offset
+            for line in file:
+                offset += len(line)
+                yield line.decode("UTF-8")
+
+        aggregator = HourBlockAggregator(
+            previous_start=state.last_start if state else None,
+            daylight_saving_change_needs_additional_hour=state.daylight_saving_change_needs_additional_hour
+            if state
+            else False,
+            quarter_hours_since=quarter_hours_since,
+            tariff=tariff,
+        )
+        row_meter_point = meter_point if schema.meter_point_index is not None else None
+        series_index = dict(schema.get_series(row_meter_point))
+        series = select_series(series_index, meter_point, feed_in)
+        if series is None:
+            raise HomeAssistantError(
+                f"Report file at path {file_path} contains no series of meter point"
+                f" {meter_point}, it contains: {format_series(series_index)}."
+            )
+        value_index = series_index[series]
+        for row in csv.reader(iter_lines(), delimiter=";"):
+            if not row or (
+                row_meter_point is not None
+                and row[schema.meter_point_index] != row_meter_point
+            ):
+                continue
+            start_str, end_str = schema.get_times(row)
+            statistic = aggregator.add(start_str, end_str, row[value_index])
+            if schema.is_substitute_value(row):
+                hour_substitute_values += 1
+            if statistic is not None:
+                statistics.append(statistic)
+                substitute_values += hour_substitute_values
+                hour_substitute_values = 0
+                processed_offset = offset
+        if aggregator.has_incomplete_hour:
+            _LOGGER.debug(
+                "Report file %s ends with an incomplete hour, it will be read with the next import.",
+                file_path,
+            )
+
+        new_state = ReportFileState(
+            size=file_stat.st_size,
+            mtime=file_stat.st_mtime,
+            offset=processed_offset,
+            checksum=_get_report_file_checksum(file, processed_offset),
+            last_start=aggregator.previous_start,
+            daylight_saving_change_needs_additional_hour=aggregator.daylight_saving_change_needs_additional_hour,
+            sum=state.sum if state else None,
+        )
+    return (
+        ParsedReport(
+            statistics,
+            aggregator.quarter_hour_statistics,
+            substitute_values,
+            aggregator.cost_statistics,
+        ),
+        new_state,
+    )
+
+
+def get_new_hourly_statistics_from_file(
+    file_path: str, state: ReportFileState | None
+) -> tuple[list[StatisticData], ReportFileState]:
+    """Reads the complete hourly statistics appended to the report since state.
+
+    This does blocking I/O and must be run in the executor.
+    """
+    report, new_state = parse_report_file_tail(file_path, state)
+    return report.statistics, new_state
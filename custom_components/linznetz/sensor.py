@@ -1,48 +1,132 @@
 """Sensor platform for linznetz."""
 
-import csv
-from datetime import datetime, timedelta
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
 from decimal import Decimal
+from functools import partial
+import heapq
 import logging
 import os
+import time
 import voluptuous as vol
 
 from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.db_schema import StatisticsShortTerm
 from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
 from homeassistant.components.recorder.statistics import (
-    get_last_statistics,
+    async_add_external_statistics,
     async_import_statistics,
+    get_last_statistics,
     statistics_during_period,
 )
 from homeassistant.components.sensor import (
+    RestoreSensor,
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfEnergy
-from homeassistant.core import HomeAssistant
+from homeassistant.const import UnitOfEnergy, UnitOfPower
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers import entity_platform
+from homeassistant.helpers import config_validation as cv, entity_platform
+from homeassistant.helpers.dispatcher import (
+    async_dispatcher_connect,
+    async_dispatcher_send,
+)
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.helpers.storage import Store
 from homeassistant.util import dt as dt_util
 
 from .const import (
+    CONF_FEED_IN,
+    CONF_IMPORT_CHUNK_SIZE,
     CONF_METER_POINT_NUMBER,
     CONF_NAME,
+    CONF_QUARTER_HOUR_DAYS,
+    CONF_TARIFF,
+    CONF_WATCH_FOLDER,
+    DATA_PENDING_JOBS,
+    DEFAULT_FEED_IN,
+    DEFAULT_IMPORT_CHUNK_SIZE,
     DEFAULT_NAME,
+    DEFAULT_QUARTER_HOUR_DAYS,
     DOMAIN,
+    EVENT_IMPORT_PROGRESS,
+    IMPORTS_STORAGE_KEY,
     SERVICE_IMPORT_REPORT,
-    END_TIME_KEY,
-    START_TIME_KEY,
+    SERVICE_IMPORT_REPORTS,
+    SIGNAL_TOTALS_UPDATED,
+    STORAGE_KEY,
+    STORAGE_VERSION,
 )
+from .cache import StatisticsCache, StatisticsDiff, get_snapshot_path
+from .report import (
+    ParsedReport,
+    ReportFileState,
+    ReportSeries,
+    format_series,
+    get_report_files_hash,
+    is_report_archive,
+    parse_report_file_range,
+    parse_report_file_series,
+    parse_report_file_tail,
+    parse_report_files_series,
+    select_series,
+)
+from .tariff import Tariff, load_tariff
+from .timing import SPAN_PARSE, SPAN_QUERY, SPAN_SUBMIT, ImportTimer
+from .totals import ConsumptionTotals, get_month, get_previous_month
+from .watcher import ReportFolderWatcher
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
+COST_UNIT = "EUR"
+
+
+@dataclass(frozen=True, kw_only=True)
+class LinzNetzTotalSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor derived from the consumption totals."""
+
+    value_fn: Callable[[ConsumptionTotals, date], Decimal | None]
+
+
+TOTAL_SENSOR_DESCRIPTIONS = (
+    LinzNetzTotalSensorEntityDescription(
+        key="energy_today",
+        name="Energy Today",
+        value_fn=lambda totals, today: totals.days.get(today),
+    ),
+    LinzNetzTotalSensorEntityDescription(
+        key="energy_yesterday",
+        name="Energy Yesterday",
+        value_fn=lambda totals, today: totals.days.get(today - timedelta(days=1)),
+    ),
+    LinzNetzTotalSensorEntityDescription(
+        key="energy_this_month",
+        name="Energy This Month",
+        value_fn=lambda totals, today: totals.months.get(get_month(today)),
+    ),
+    LinzNetzTotalSensorEntityDescription(
+        key="energy_last_month",
+        name="Energy Last Month",
+        value_fn=lambda totals, today: totals.months.get(get_previous_month(today)),
+    ),
+)
+
 
 async def async_setup_entry(
-    _hass: HomeAssistant, config_entry: ConfigEntry, async_add_devices
+    hass: HomeAssistant, config_entry: ConfigEntry, async_add_devices
 ):
     """Setup sensor platform."""
 
@@ -51,31 +135,39 @@ async def async_setup_entry(
         SERVICE_IMPORT_REPORT,
         {
             vol.Required("path"): str,
+            vol.Optional("incremental", default=False): cv.boolean,
+            vol.Optional("since"): cv.datetime,
+            vol.Optional("until"): cv.datetime,
+            vol.Optional("dry_run", default=False): cv.boolean,
         },
         LinzNetzSensor.import_report.__name__,
+        supports_response=SupportsResponse.OPTIONAL,
     )
-
-    async_add_devices([LinzNetzSensor(config_entry)])
-
-
-def get_csv_data_value_key(csv_data: list) -> str:
-    """Gets the key to access the value property from a given csv_data list."""
-    return list(csv_data[0].keys())[2]
-
-
-def parse_csv_date_str(csv_date_str: str) -> datetime:
-    """Parses the Austrian time string to an UTC datetime."""
-    parsed_str = dt_util.as_utc(
-        datetime.strptime(csv_date_str, "%d.%m.%Y %H:%M").replace(
-            tzinfo=dt_util.get_time_zone("Europe/Vienna")
-        )
+    platform.async_register_entity_service(
+        SERVICE_IMPORT_REPORTS,
+        {
+            vol.Required("paths"): vol.All(cv.ensure_list, [str]),
+            vol.Optional("dry_run", default=False): cv.boolean,
+        },
+        LinzNetzSensor.import_reports.__name__,
+        supports_response=SupportsResponse.OPTIONAL,
     )
-    return parsed_str
 
+    totals = ConsumptionTotals()
+    cache: StatisticsCache = hass.data[DOMAIN][config_entry.entry_id]
+    if cache.loaded:
+        await hass.async_add_executor_job(totals.seed, cache)
 
-def parse_german_number_str_to_decimal(number_str: str) -> Decimal:
-    """Parses a German number string from the CSV to a Decimal."""
-    return Decimal(number_str.replace(",", "."))
+    async_add_devices(
+        [
+            LinzNetzSensor(config_entry, totals),
+            *(
+                LinzNetzTotalSensor(config_entry, totals, description)
+                for description in TOTAL_SENSOR_DESCRIPTIONS
+            ),
+            LinzNetzPeakLoadSensor(config_entry, totals),
+        ]
+    )
 
 
 def parse_value_to_decimal(value) -> Decimal:
@@ -83,45 +175,44 @@ def parse_value_to_decimal(value) -> Decimal:
     return Decimal(str(value))
 
 
+def add_quarter_hour_sums(
+    statistics: list[StatisticData], quarter_hour_statistics: list[StatisticData]
+) -> None:
+    """Adds the running sum to the QH statistics based on the sums of their hours."""
+    sums_before_hour = {
+        stat["start"]: stat["sum"] - stat["state"] for stat in statistics
+    }
+    hour_start = None
+    for stat in quarter_hour_statistics:
+        if stat["start"].replace(minute=0) != hour_start:
+            hour_start = stat["start"].replace(minute=0)
+            _sum = sums_before_hour[hour_start]
+        _sum += stat["state"]
+        stat["sum"] = _sum
+
+
+def local_datetime_to_timestamp(value: datetime | None) -> int | None:
+    """Returns the UTC timestamp of a datetime, naive datetimes are local times."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    return int(value.timestamp())
+
+
 def parse_statistic_value_to_datetime(value) -> datetime:
     """Parses a statistic value to datetime with provided backwards compatibility."""
     # parsing "from timestamp" is required since 2023.3.0
     return value if isinstance(value, datetime) else dt_util.utc_from_timestamp(value)
 
 
-def get_csv_data_list_from_file(file_path: str):
-    """Returns content on file as csv list."""
-    if not os.path.isfile(file_path):
-        raise HomeAssistantError(f"Report file at path {file_path} not found.")
-    with open(file_path, encoding="UTF-8") as file:
-        _LOGGER.debug(file)
-        report_dict_reader = csv.DictReader(file, delimiter=";")
-        csv_data = list(report_dict_reader)
-    return csv_data
-
-
-def validate_hour_block(hour_block: list) -> bool:
-    """Validates the QH values in an hour block to be in the right order."""
-    if len(hour_block) != 4:
-        return False
-    first_prefix = None
-    for index, record in enumerate(hour_block, start=0):
-        prefix, suffix = record[START_TIME_KEY].split(":")
-        if index == 0:
-            first_prefix = prefix
-        if prefix != first_prefix:
-            return False
-        if int(suffix) != (index * 15):
-            return False
-    return True
-
-
 class LinzNetzSensor(SensorEntity):
     """linznetz Sensor class."""
 
-    def __init__(self, config_entry: ConfigEntry):
+    def __init__(self, config_entry: ConfigEntry, totals: ConsumptionTotals):
         """Initialize the sensor."""
         self.config_entry = config_entry
+        self._totals = totals
         _unique_id = config_entry.data[CONF_METER_POINT_NUMBER]
         _name = config_entry.data.get(CONF_NAME, DEFAULT_NAME)
         self._attr_name = f"{_name} Energy"
@@ -130,7 +221,12 @@ class LinzNetzSensor(SensorEntity):
         self._attr_device_class = SensorDeviceClass.ENERGY
         self._attr_state_class = SensorStateClass.TOTAL
         self._attr_should_poll = False
-        self._attr_icon = "mdi:transmission-tower-import"
+        self._feed_in = config_entry.options.get(CONF_FEED_IN, DEFAULT_FEED_IN)
+        self._attr_icon = (
+            "mdi:transmission-tower-export"
+            if self._feed_in
+            else "mdi:transmission-tower-import"
+        )
         self._attr_available = True
 
         self._attr_device_info = DeviceInfo(
@@ -138,8 +234,63 @@ class LinzNetzSensor(SensorEntity):
         )
         self._attr_unique_id = f"{_unique_id}_energy"
 
-    async def import_report(self, path: str) -> None:
-        """Service to import csv data from path."""
+        self._import_chunk_size = config_entry.options.get(
+            CONF_IMPORT_CHUNK_SIZE, DEFAULT_IMPORT_CHUNK_SIZE
+        )
+        self._quarter_hour_days = config_entry.options.get(
+            CONF_QUARTER_HOUR_DAYS, DEFAULT_QUARTER_HOUR_DAYS
+        )
+        self._report_file_store: Store | None = None
+        self._report_file_states: dict[str, ReportFileState] | None = None
+        self._imports_store: Store | None = None
+        self._imports: dict[str, dict] | None = None
+        self._tariff_source = config_entry.options.get(CONF_TARIFF)
+        # hourly costs are imported as external statistic of the meter point
+        self._cost_statistic_id = f"{DOMAIN}:{_unique_id.lower()}_cost"
+        self._cost_cache = StatisticsCache()
+        # imports of the service and the watched folder compute their sums from the
+        # cached statistics, so they are run one after another from parse to cache
+        # update
+        self._import_lock = asyncio.Lock()
+
+    async def async_added_to_hass(self) -> None:
+        """Set up the storage of imported report files and the watched folder."""
+        self._report_file_store = Store(
+            self.hass,
+            STORAGE_VERSION,
+            f"{STORAGE_KEY}.{self.config_entry.entry_id}",
+        )
+        self._imports_store = Store(
+            self.hass,
+            STORAGE_VERSION,
+            f"{IMPORTS_STORAGE_KEY}.{self.config_entry.entry_id}",
+        )
+        if watch_folder := self.config_entry.options.get(CONF_WATCH_FOLDER):
+            watcher = ReportFolderWatcher(
+                self.hass, watch_folder, partial(self.import_report, incremental=True)
+            )
+            try:
+                await watcher.async_start()
+            except HomeAssistantError as err:
+                _LOGGER.warning("Watching reports failed: %s", err)
+            else:
+                self.async_on_remove(watcher.async_stop)
+
+    async def import_report(
+        self,
+        path: str,
+        incremental: bool = False,
+        dry_run: bool = False,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> ServiceResponse:
+        """Service to import csv data from path.
+
+        Only the hours from since until until are imported if one of them is
+        given. With dry_run nothing is written and the differences to the stored
+        statistics are returned instead. Imports of the same entity, e.g. by the
+        watched folder, wait for each other.
+        """
         _LOGGER.debug("Import Report executed with path: %s", path)
         _LOGGER.debug(
             "Entity: %s; Entity_ID: %s; Unique_ID: %s",
@@ -147,7 +298,381 @@ class LinzNetzSensor(SensorEntity):
             self.entity_id,
             self.unique_id,
         )
+        if since is not None or until is not None:
+            if incremental:
+                raise HomeAssistantError(
+                    "Incremental imports can't be limited to a time range."
+                )
+            async with self._import_lock:
+                return await self._async_import_report_range(
+                    os.path.abspath(path), since, until, dry_run
+                )
+        async with self._import_lock:
+            if incremental and not is_report_archive(path):
+                return await self._async_import_report_incremental(path, dry_run)
+            return await self._async_import_report_files(
+                parse_report_file_series, os.path.abspath(path), dry_run
+            )
+
+    async def _async_import_report_files(
+        self,
+        parse: Callable[..., dict[ReportSeries, ParsedReport]],
+        paths: str | tuple[str, ...],
+        dry_run: bool,
+    ) -> ServiceResponse:
+        """Imports the reports at paths unless they were imported before.
+
+        Reports are skipped if their content hash matches the last import of the
+        same paths with the same series selection, QH days and tariff and the
+        imported hours were not changed since. Returns the differences to the
+        stored statistics of a dry run.
+        """
+        timer = ImportTimer()
+        import_key = paths if isinstance(paths, str) else "\n".join(paths)
+        with timer.span(SPAN_PARSE):
+            tariff = await self._async_get_tariff()
+            content_hash = await self._async_shared_executor_job(
+                get_report_files_hash, paths
+            )
+            meter_point = self.config_entry.data.get(CONF_METER_POINT_NUMBER)
+            content_hash = (
+                f"{content_hash}\n{meter_point}\n{self._feed_in}"
+                f"\n{self._quarter_hour_days}"
+            )
+            if tariff is not None:
+                content_hash = f"{content_hash}\n{tariff.key}"
+        if not dry_run and await self._async_is_imported(
+            import_key, content_hash, timer
+        ):
+            _LOGGER.debug("Reports %s were imported before, skip them.", paths)
+            self._async_write_last_import(timer, 0)
+            return self._get_import_response(timer, [], StatisticsDiff(0), True)
+        with timer.span(SPAN_PARSE):
+            report = await self._async_parse_reports(parse, paths, tariff)
+        response = await self._async_import_report(report, timer, dry_run)
+        if report is not None and not dry_run:
+            await self._async_save_import(import_key, content_hash, report.statistics)
+        return response
+
+    async def _async_import_report_range(
+        self,
+        path: str,
+        since: datetime | None,
+        until: datetime | None,
+        dry_run: bool,
+    ) -> ServiceResponse:
+        """Imports the hours of the report at path from since until until.
+
+        Only the lines of the time range are read, see parse_report_file_range.
+        Time ranges are not remembered as imported, they are cheap to read again
+        and only their changed hours are written.
+        """
+        timer = ImportTimer()
+        with timer.span(SPAN_PARSE):
+            tariff = await self._async_get_tariff()
+            report = await self._async_parse_reports(
+                parse_report_file_range,
+                path,
+                tariff,
+                local_datetime_to_timestamp(since),
+                local_datetime_to_timestamp(until),
+            )
+        return await self._async_import_report(report, timer, dry_run)
+
+    async def _async_load_imports(self) -> dict[str, dict]:
+        """Returns the content hashes and time ranges of the imported reports."""
+        if self._imports is None:
+            self._imports = await self._imports_store.async_load() or {}
+        return self._imports
+
+    async def _async_is_imported(
+        self, import_key: str, content_hash: str, timer: ImportTimer
+    ) -> bool:
+        """Returns if the reports with content_hash are stored unchanged."""
+        imported = (await self._async_load_imports()).get(import_key)
+        if imported is None or imported["hash"] != content_hash:
+            return False
+        cache = await self._async_get_statistics_cache(timer)
+        return (
+            cache.get_range_hash(
+                dt_util.utc_from_timestamp(imported["first_start"]),
+                dt_util.utc_from_timestamp(imported["last_start"]),
+            )
+            == imported["statistics_hash"]
+        )
+
+    async def _async_save_import(
+        self, import_key: str, content_hash: str, statistics: list[StatisticData]
+    ) -> None:
+        """Stores the content hash and time range of imported reports."""
+        imports = await self._async_load_imports()
+        if not statistics:
+            imports.pop(import_key, None)
+        else:
+            cache: StatisticsCache = self.hass.data[DOMAIN][self.config_entry.entry_id]
+            imports[import_key] = {
+                "hash": content_hash,
+                "first_start": statistics[0]["start"].timestamp(),
+                "last_start": statistics[-1]["start"].timestamp(),
+                "statistics_hash": cache.get_range_hash(
+                    statistics[0]["start"], statistics[-1]["start"]
+                ),
+            }
+        await self._imports_store.async_save(imports)
+
+    async def _async_shared_executor_job(self, target: Callable, *args):
+        """Runs target in the executor, sharing it with the entities of other meter points.
+
+        Concurrent calls of the same target with the same arguments, e.g. by the
+        entities of a single service call, await the same executor job.
+        """
+        pending_jobs = self.hass.data.setdefault(DATA_PENDING_JOBS, {})
+        key = (target, *args)
+        if (job := pending_jobs.get(key)) is None:
+            job = pending_jobs[key] = self.hass.async_add_executor_job(target, *args)
+            job.add_done_callback(lambda _: pending_jobs.pop(key, None))
+        return await asyncio.shield(job)
+
+    async def _async_get_tariff(self) -> Tariff | None:
+        """Returns the tariff of the cost statistic, if one is configured.
+
+        The tariff is loaded again before every import, so updates of a price CSV
+        are used without a reload.
+        """
+        if not self._tariff_source:
+            return None
+        return await self.hass.async_add_executor_job(load_tariff, self._tariff_source)
+
+    async def _async_parse_reports(
+        self,
+        parse: Callable[..., dict[ReportSeries, ParsedReport]],
+        paths,
+        tariff: Tariff | None,
+        *args,
+    ) -> ParsedReport | None:
+        """Returns the report of this entity's series parsed from paths.
+
+        Imports of the same reports for the entities of multiple meter points, e.g.
+        by a single service call, share one parse in the executor if they use the
+        same tariff and args. The statistics of the shared parse are copied, as the
+        sums of this entity are added to them while the recorder jobs of other
+        entities may still refer to the shared ones. Raises an error naming the
+        series of the reports if none of them is the series of this entity and
+        returns None if the series has no hours.
+        """
+        reports = await self._async_shared_executor_job(
+            parse, paths, self._get_quarter_hours_since(), tariff, *args
+        )
+        meter_point = self.config_entry.data.get(CONF_METER_POINT_NUMBER)
+        series = select_series(reports, meter_point, self._feed_in)
+        if series is None:
+            raise HomeAssistantError(
+                f"Reports {paths if isinstance(paths, str) else ', '.join(paths)}"
+                f" contain no series of meter point {meter_point}, they contain:"
+                f" {format_series(reports)}."
+            )
+        report = reports[series]
+        if len(report.statistics) == 0:
+            _LOGGER.debug(
+                "Reports %s contain no data of meter point %s.", paths, meter_point
+            )
+            return None
+        return ParsedReport(
+            [StatisticData(stat) for stat in report.statistics],
+            [StatisticData(stat) for stat in report.quarter_hour_statistics],
+            report.substitute_values,
+            [StatisticData(stat) for stat in report.cost_statistics],
+        )
+
+    async def _async_import_report(
+        self, report: ParsedReport | None, timer: ImportTimer, dry_run: bool
+    ) -> ServiceResponse:
+        """Imports the hours and QH values of a parsed report.
+
+        Returns the differences to the stored statistics of a dry run and the
+        summary of the import otherwise.
+        """
+        if report is None:
+            if dry_run:
+                return self._get_dry_run_response(StatisticsDiff(0), None)
+            return self._get_import_response(timer, [], StatisticsDiff(0))
+        diff = await self._async_import_hourly_statistics(
+            report.statistics,
+            timer=timer,
+            quarter_hour_statistics=report.quarter_hour_statistics,
+            dry_run=dry_run,
+        )
+        cost_diff = await self._async_import_cost_statistics(
+            report.cost_statistics, timer, dry_run
+        )
+        if dry_run:
+            return self._get_dry_run_response(diff, cost_diff)
+        self._async_write_last_import(
+            timer, len(report.statistics), report.substitute_values
+        )
+        return self._get_import_response(timer, report.statistics, diff)
+
+    def _get_quarter_hours_since(self) -> int:
+        """Returns the UTC timestamp from which on QH values are needed.
 
+        The QH values of the current month are needed for its peak load and the
+        QH values of the last quarter_hour_days for the short-term statistics.
+        The timestamp is rounded down to the hour, so imports of the same reports
+        by multiple entities agree on it.
+        """
+        since = dt_util.start_of_local_day(get_month(dt_util.now().date()))
+        if self._quarter_hour_days > 0:
+            since = min(
+                since, dt_util.utcnow() - timedelta(days=self._quarter_hour_days)
+            )
+        return int(since.timestamp()) // 3600 * 3600
+
+    async def _async_import_report_incremental(
+        self, path: str, dry_run: bool
+    ) -> ServiceResponse:
+        """Imports only the hours appended to the report since its last import.
+
+        A dry run returns the differences of the appended hours to the stored
+        statistics and keeps the import progress of the report.
+        """
+        file_path = os.path.abspath(path)
+        if self._report_file_states is None:
+            stored_states = await self._report_file_store.async_load() or {}
+            self._report_file_states = {
+                stored_path: ReportFileState.from_dict(stored_state)
+                for stored_path, stored_state in stored_states.items()
+            }
+        state = self._report_file_states.get(file_path)
+        timer = ImportTimer()
+        with timer.span(SPAN_PARSE):
+            tariff = await self._async_get_tariff()
+            report, new_state = await self.hass.async_add_executor_job(
+                parse_report_file_tail,
+                file_path,
+                state,
+                self._get_quarter_hours_since(),
+                self.config_entry.data.get(CONF_METER_POINT_NUMBER),
+                self._feed_in,
+                tariff,
+            )
+        statistics = report.statistics
+        _LOGGER.debug(
+            "Read %d new hours of %s from offset %d.",
+            len(statistics),
+            file_path,
+            state.offset if state else 0,
+        )
+        cost_diff = None
+        if len(statistics) == 0:
+            diff = StatisticsDiff(0)
+        else:
+            previous_statistic = None
+            if new_state.sum is not None and state.last_start is not None:
+                previous_statistic = StatisticData(
+                    start=dt_util.utc_from_timestamp(state.last_start),
+                    sum=new_state.sum,
+                )
+            diff = await self._async_import_hourly_statistics(
+                statistics,
+                previous_statistic,
+                timer,
+                report.quarter_hour_statistics,
+                dry_run,
+            )
+            cost_diff = await self._async_import_cost_statistics(
+                report.cost_statistics, timer, dry_run
+            )
+        if dry_run:
+            return self._get_dry_run_response(diff, cost_diff)
+        if len(statistics) > 0:
+            new_state.sum = statistics[-1]["sum"]
+            self._async_write_last_import(
+                timer, len(statistics), report.substitute_values
+            )
+        self._report_file_states[file_path] = new_state
+        await self._report_file_store.async_save(
+            {
+                stored_path: stored_state.as_dict()
+                for stored_path, stored_state in self._report_file_states.items()
+            }
+        )
+        return self._get_import_response(timer, statistics, diff)
+
+    def _get_dry_run_response(
+        self, diff: StatisticsDiff, cost_diff: StatisticsDiff | None
+    ) -> dict:
+        """Returns the differences of a dry run with the change of the costs."""
+        response = diff.as_dict()
+        if self._tariff_source:
+            response["cost_delta"] = float(cost_diff.sum_delta) if cost_diff else 0.0
+        return response
+
+    def _get_import_response(
+        self,
+        timer: ImportTimer,
+        statistics: list[StatisticData],
+        diff: StatisticsDiff,
+        skipped: bool = False,
+    ) -> dict:
+        """Returns the summary of an import as a JSON serializable dict.
+
+        The summary contains the imported hours and their time range, the written
+        hours and the stored hours among them which were rewritten, the duration
+        and if the import was skipped because the reports were imported before.
+        """
+        return {
+            "hours": len(statistics),
+            "changed_hours": diff.changed_hours,
+            "rewritten_hours": diff.rewritten_hours,
+            "first_start": statistics[0]["start"].isoformat() if statistics else None,
+            "last_start": statistics[-1]["start"].isoformat() if statistics else None,
+            "duration": round(timer.duration, 3),
+            "skipped": skipped,
+        }
+
+    async def import_reports(
+        self, paths: list[str], dry_run: bool = False
+    ) -> ServiceResponse:
+        """Service to import csv data from multiple paths, directories or patterns."""
+        _LOGGER.debug("Import Reports executed with paths: %s", paths)
+        async with self._import_lock:
+            return await self._async_import_report_files(
+                parse_report_files_series, tuple(paths), dry_run
+            )
+
+    @callback
+    def _async_write_last_import(
+        self, timer: ImportTimer, hours: int, substitute_values: int = 0
+    ) -> None:
+        """Exposes the hours, durations and throughput of the last import."""
+        self._attr_extra_state_attributes = {
+            f"last_import_{key}": value for key, value in timer.as_dict(hours).items()
+        }
+        self._attr_extra_state_attributes["last_import_substitute_values"] = (
+            substitute_values
+        )
+        self._attr_extra_state_attributes["last_import_time"] = dt_util.utcnow()
+        self.async_write_ha_state()
+
+    async def _async_import_hourly_statistics(
+        self,
+        statistics: list[StatisticData],
+        previous_statistic: StatisticData | None = None,
+        timer: ImportTimer | None = None,
+        quarter_hour_statistics: list[StatisticData] | None = None,
+        dry_run: bool = False,
+    ) -> StatisticsDiff:
+        """Adds the running sum to the hourly statistics and imports them.
+
+        previous_statistic is the exact sum of a previous import, it is used
+        instead of the stored float sum if it is still the last statistic.
+        The recorder queries and submissions are measured with timer.
+        The quarter_hour_statistics of the imported hours are imported to the
+        short-term statistics with matching sums.
+        Returns the differences to the stored statistics. Nothing is written with
+        dry_run and the hourly statistics are not written if nothing changed.
+        """
+        timer = timer or ImportTimer()
         # metadata for external stats
         # metadata = StatisticMetaData(
         #     unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
@@ -168,106 +693,459 @@ class LinzNetzSensor(SensorEntity):
             has_mean=False,
             has_sum=True,
         )
-        statistics = []
+        first_start = statistics[0]["start"]
+        last_start = statistics[-1]["start"]
 
-        csv_data = get_csv_data_list_from_file(path)
-
-        if len(csv_data) % 4 != 0:
-            raise HomeAssistantError(
-                "Report to import seems to be corrupted. Please ensure that there are at least 4 QH values per hour."
-            )
+        cache = await self._async_get_statistics_cache(timer)
+        last_stored_start = cache.last_start
+        stored_stats = []
 
-        last_inserted_stat = await get_instance(self.hass).async_add_executor_job(
-            get_last_statistics, self.hass, 1, self.entity_id, True, {"sum"}
-        )
-        inserted_stats = {self.entity_id: []}
-        _LOGGER.debug("Last inserted stat:")
-        _LOGGER.debug(last_inserted_stat)
-
-        if len(last_inserted_stat) == 0 or len(last_inserted_stat[self.entity_id]) == 0:
+        if last_stored_start is None:
             _sum = Decimal(0)
             _LOGGER.debug("No previous inserted stats, start sum with 0.")
-        elif (
-            len(last_inserted_stat) == 1
-            and len(last_inserted_stat[self.entity_id]) == 1
-            and parse_statistic_value_to_datetime(
-                last_inserted_stat[self.entity_id][0]["start"]
-            )
-            < parse_csv_date_str(csv_data[0][START_TIME_KEY])
-        ):
-            _sum = parse_value_to_decimal(last_inserted_stat[self.entity_id][0]["sum"])
+        elif last_stored_start < first_start:
+            _sum = parse_value_to_decimal(cache.last_sum)
+            if (
+                previous_statistic is not None
+                and previous_statistic["start"] == last_stored_start
+                and float(previous_statistic["sum"]) == cache.last_sum
+            ):
+                _sum = previous_statistic["sum"]
             _LOGGER.debug("Previous inserted stats found, start sum with %f.", _sum)
         else:
-            inserted_stats = await get_instance(self.hass).async_add_executor_job(
-                statistics_during_period,
-                self.hass,
-                parse_csv_date_str(csv_data[0][START_TIME_KEY]) - timedelta(hours=1),
-                None,
-                [self.entity_id],
-                "hour",
-                None,
-                {"sum", "state"},
-            )
-            _LOGGER.debug("Inserted stats:")
-            _LOGGER.debug(inserted_stats)
+            # only the sum before the import and the stored statistics of the
+            # imported time range are needed
+            boundary_sum = cache.sum_before(first_start)
             _sum = (
-                parse_value_to_decimal(inserted_stats[self.entity_id][0]["sum"])
-                if len(inserted_stats) > 0
-                and len(inserted_stats[self.entity_id]) > 0
-                and parse_statistic_value_to_datetime(
-                    inserted_stats[self.entity_id][0]["start"]
-                )
-                < parse_csv_date_str(csv_data[0][START_TIME_KEY])
+                parse_value_to_decimal(boundary_sum)
+                if boundary_sum is not None
                 else Decimal(0)
             )
-            _LOGGER.debug("Overlap detected, start sum with %f.", _sum)
-
-        hourly_sum = Decimal(0)
-        start = None
-        csv_data_value_key = get_csv_data_value_key(csv_data)
-        daylight_saving_change_needs_additional_hour = False
-        for index, record in enumerate(csv_data, start=1):
-            hourly_sum += parse_german_number_str_to_decimal(record[csv_data_value_key])
-            if index % 4 == 1:
-                if not validate_hour_block(csv_data[(index - 1) : (index - 1) + 4]):
-                    raise HomeAssistantError(
-                        "Invalid hour block detected. Start time of QH values must always be in the following order: xx:00, xx:15, xx:30, xx:45."
+            stored_stats = list(cache.iter_range(first_start, last_start))
+            _LOGGER.debug(
+                "Overlap with %d stored hours detected, start sum with %f.",
+                len(stored_stats),
+                _sum,
+            )
+
+        # stored hours within the imported time range which are not part of the
+        # import need a new sum as well
+        imported_starts = {stat["start"] for stat in statistics}
+        stored_statistics = []
+        stored_sum = _sum
+        for stat in stored_stats:
+            start = parse_statistic_value_to_datetime(stat["start"])
+            stored_sum = parse_value_to_decimal(stat["sum"])
+            if start in imported_starts:
+                continue
+            stored_statistics.append(
+                StatisticData(start=start, state=parse_value_to_decimal(stat["state"]))
+            )
+        statistics = list(
+            heapq.merge(statistics, stored_statistics, key=lambda stat: stat["start"])
+        )
+        for stat in statistics:
+            _sum += stat["state"]
+            stat["sum"] = _sum
+        _LOGGER.debug(
+            "Importing %d hours from %s to %s with metadata %s.",
+            len(statistics),
+            first_start,
+            last_start,
+            metadata,
+        )
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Imported statistics: %s", statistics)
+        diff = cache.diff(statistics)
+        _LOGGER.debug("Differences to the stored statistics: %s", diff)
+        if dry_run:
+            return diff
+        if self._quarter_hour_days > 0 and quarter_hour_statistics:
+            short_term_since = dt_util.utcnow() - timedelta(
+                days=self._quarter_hour_days
+            )
+            short_term_statistics = [
+                stat
+                for stat in quarter_hour_statistics
+                if stat["start"] >= short_term_since
+            ]
+        else:
+            short_term_statistics = []
+        with timer.span(SPAN_SUBMIT):
+            if diff.changed_hours > 0:
+                await self._async_submit_statistics(
+                    metadata, [statistics[index] for index in diff.changed_indexes]
+                )
+            if short_term_statistics:
+                add_quarter_hour_sums(statistics, short_term_statistics)
+                await self._async_submit_statistics(
+                    metadata, short_term_statistics, short_term=True
+                )
+
+        # the stored statistics after the import were summed up on top of the
+        # previous sum of the last imported hour, shift them by the difference
+        delta = Decimal(0)
+        if last_stored_start is not None and last_stored_start > last_start:
+            delta = _sum - stored_sum
+        stored_states = {stat["start"]: stat["state"] for stat in stored_stats}
+        for stat in statistics:
+            self._totals.add_hour(
+                stat["start"],
+                stat["state"]
+                - parse_value_to_decimal(
+                    stored_states.get(int(stat["start"].timestamp()), 0)
+                ),
+            )
+        for stat in quarter_hour_statistics or []:
+            self._totals.add_quarter_hour(stat["start"], stat["state"])
+        async_dispatcher_send(
+            self.hass, SIGNAL_TOTALS_UPDATED.format(self.config_entry.entry_id)
+        )
+        if diff.changed_hours == 0:
+            _LOGGER.debug("The imported hours did not change, skip storing them.")
+            return diff
+        cache.update(statistics, delta)
+        if delta != 0:
+            shift_start = last_start + timedelta(hours=1)
+            with timer.span(SPAN_SUBMIT):
+                await self._async_submit_statistics(
+                    metadata,
+                    [
+                        StatisticData(
+                            start=parse_statistic_value_to_datetime(stat["start"]),
+                            state=stat["state"],
+                            sum=stat["sum"],
+                        )
+                        for stat in cache.iter_range(shift_start, last_stored_start)
+                    ],
+                )
+                if self._quarter_hour_days > 0:
+                    await self._async_shift_short_term_statistics_sums(
+                        metadata, shift_start, last_stored_start, delta
                     )
-                start = parse_csv_date_str(record[START_TIME_KEY])
-                if daylight_saving_change_needs_additional_hour:
-                    # double check for daylight saving change, reset the flag anyway
-                    if start == statistics[-1]["start"]:
-                        start += timedelta(hours=1)
-                    daylight_saving_change_needs_additional_hour = False
-            if index % 4 == 0:
-                # LINZ NETZ indicates a winter daylight saving change when the start_time of an hour block is equal to the end_time.
-                # Therefore it is necessary to add an additional (UTC) hour to the next hour.
-                if start == parse_csv_date_str(record[END_TIME_KEY]):
-                    daylight_saving_change_needs_additional_hour = True
-                _sum += hourly_sum
-                statistics.append(
+        # the snapshot must not describe statistics the recorder did not store yet
+        await get_instance(self.hass).async_block_till_done()
+        await self.hass.async_add_executor_job(
+            cache.save_snapshot,
+            get_snapshot_path(self.hass, self.config_entry.entry_id),
+        )
+        return diff
+
+    async def _async_import_cost_statistics(
+        self,
+        cost_statistics: list[StatisticData],
+        timer: ImportTimer,
+        dry_run: bool = False,
+    ) -> StatisticsDiff | None:
+        """Adds the running sum to the hourly costs and imports them.
+
+        The costs are imported as external statistic right after the hourly
+        statistics of the same import. Stored hours of the imported time range
+        without cost, e.g. without prices, keep their cost and the sums of the
+        stored hours after it are shifted like the hourly statistics.
+        Returns the differences to the stored costs, nothing is written with
+        dry_run.
+        """
+        if not cost_statistics:
+            return None
+        metadata = StatisticMetaData(
+            unit_of_measurement=COST_UNIT,
+            source=DOMAIN,
+            name=f"{self.name} Cost",
+            statistic_id=self._cost_statistic_id,
+            has_mean=False,
+            has_sum=True,
+        )
+        first_start = cost_statistics[0]["start"]
+        last_start = cost_statistics[-1]["start"]
+        cache = self._cost_cache
+        if not cache.loaded:
+            with timer.span(SPAN_QUERY):
+                cache.load(
+                    await self._async_get_stored_statistics(self._cost_statistic_id)
+                )
+        last_stored_start = cache.last_start
+        boundary_sum = cache.sum_before(first_start)
+        _sum = (
+            parse_value_to_decimal(boundary_sum)
+            if boundary_sum is not None
+            else Decimal(0)
+        )
+        imported_starts = {stat["start"] for stat in cost_statistics}
+        stored_statistics = []
+        stored_sum = _sum
+        for stat in cache.iter_range(first_start, last_start):
+            start = parse_statistic_value_to_datetime(stat["start"])
+            stored_sum = parse_value_to_decimal(stat["sum"])
+            if start not in imported_starts:
+                stored_statistics.append(
                     StatisticData(
-                        start=start,
-                        state=hourly_sum,
-                        sum=_sum,
+                        start=start, state=parse_value_to_decimal(stat["state"])
                     )
                 )
-                hourly_sum = Decimal(0)
-        last_added_stat = statistics[-1]
-        for stat in inserted_stats[self.entity_id]:
-            if (
-                parse_statistic_value_to_datetime(stat["start"])
-                <= last_added_stat["start"]
-            ):
-                continue
-            _sum += parse_value_to_decimal(stat["state"])
-            statistics.append(
+        statistics = list(
+            heapq.merge(
+                cost_statistics, stored_statistics, key=lambda stat: stat["start"]
+            )
+        )
+        for stat in statistics:
+            _sum += stat["state"]
+            stat["sum"] = _sum
+        diff = cache.diff(statistics)
+        _LOGGER.debug("Differences to the stored costs: %s", diff)
+        if dry_run or diff.changed_hours == 0:
+            return diff
+        delta = Decimal(0)
+        if last_stored_start is not None and last_stored_start > last_start:
+            delta = _sum - stored_sum
+        with timer.span(SPAN_SUBMIT):
+            await self._async_submit_statistics(
+                metadata, [statistics[index] for index in diff.changed_indexes]
+            )
+            cache.update(statistics, delta)
+            if delta != 0:
+                await self._async_submit_statistics(
+                    metadata,
+                    [
+                        StatisticData(
+                            start=parse_statistic_value_to_datetime(stat["start"]),
+                            state=stat["state"],
+                            sum=stat["sum"],
+                        )
+                        for stat in cache.iter_range(
+                            last_start + timedelta(hours=1), last_stored_start
+                        )
+                    ],
+                )
+        return diff
+
+    async def _async_get_stored_statistics(self, statistic_id: str) -> list[dict]:
+        """Returns all stored hourly states and sums of statistic_id."""
+        stored_stats = await get_instance(self.hass).async_add_executor_job(
+            statistics_during_period,
+            self.hass,
+            dt_util.utc_from_timestamp(0),
+            None,
+            [statistic_id],
+            "hour",
+            None,
+            {"sum", "state"},
+        )
+        return stored_stats.get(statistic_id, [])
+
+    async def _async_get_statistics_cache(self, timer: ImportTimer) -> StatisticsCache:
+        """Returns the statistics cache of the entry, loading it once from the recorder.
+
+        A cache loaded from the snapshot is used if its last hour matches the last
+        stored statistic, otherwise it is loaded from the recorder as well.
+        """
+        cache: StatisticsCache = self.hass.data[DOMAIN][self.config_entry.entry_id]
+        if cache.loaded and not cache.verified:
+            with timer.span(SPAN_QUERY):
+                last_stats = await get_instance(self.hass).async_add_executor_job(
+                    get_last_statistics, self.hass, 1, self.entity_id, False, {"sum"}
+                )
+            last_stat = next(iter(last_stats.get(self.entity_id, [])), None)
+            if cache.matches_last_statistic(last_stat):
+                cache.verified = True
+            else:
+                _LOGGER.debug("The statistics snapshot is outdated, ignore it.")
+                cache.loaded = False
+        if not cache.loaded:
+            with timer.span(SPAN_QUERY):
+                stored_stats = await self._async_get_stored_statistics(self.entity_id)
+            cache.load(stored_stats)
+            await self.hass.async_add_executor_job(self._totals.seed, cache)
+        return cache
+
+    async def _async_submit_statistics(
+        self,
+        metadata: StatisticMetaData,
+        statistics: list[StatisticData],
+        short_term: bool = False,
+    ) -> None:
+        """Submits statistics to the recorder in chunks.
+
+        The recorder queue is drained before the next chunk is submitted, so large
+        imports don't hold back the recording of states or pile up in memory.
+        Submissions of multiple chunks fire a progress event after each chunk.
+        With short_term the statistics are imported to the short-term statistics,
+        statistics with the source of this integration as external statistics.
+        """
+        recorder = get_instance(self.hass)
+        start = time.perf_counter()
+        for index in range(0, len(statistics), self._import_chunk_size):
+            if index > 0:
+                await recorder.async_block_till_done()
+            chunk = statistics[index : index + self._import_chunk_size]
+            if short_term:
+                recorder.async_import_statistics(metadata, chunk, StatisticsShortTerm)
+            elif metadata["source"] == DOMAIN:
+                async_add_external_statistics(self.hass, metadata, chunk)
+            else:
+                async_import_statistics(self.hass, metadata, chunk)
+            submitted = min(index + self._import_chunk_size, len(statistics))
+            _LOGGER.debug(
+                "Submitted %d of %d %s.",
+                submitted,
+                len(statistics),
+                "QH values" if short_term else "hours",
+            )
+            if len(statistics) > self._import_chunk_size:
+                self.hass.bus.async_fire(
+                    EVENT_IMPORT_PROGRESS,
+                    {
+                        "entity_id": self.entity_id,
+                        "statistic_id": metadata["statistic_id"],
+                        "short_term": short_term,
+                        "submitted": submitted,
+                        "total": len(statistics),
+                        "duration": round(time.perf_counter() - start, 3),
+                    },
+                )
+
+    async def _async_shift_short_term_statistics_sums(
+        self,
+        metadata: StatisticMetaData,
+        start: datetime,
+        last_start: datetime,
+        delta: Decimal,
+    ) -> None:
+        """Shifts the sums of the short-term statistics from start to last_start by delta."""
+        chunk_size = timedelta(hours=self._import_chunk_size)
+        shifted_statistics = 0
+        while start <= last_start:
+            stored_stats = await get_instance(self.hass).async_add_executor_job(
+                statistics_during_period,
+                self.hass,
+                start,
+                start + chunk_size,
+                [self.entity_id],
+                "5minute",
+                None,
+                {"sum", "state"},
+            )
+            statistics = [
                 StatisticData(
                     start=parse_statistic_value_to_datetime(stat["start"]),
                     state=stat["state"],
-                    sum=_sum,
+                    sum=parse_value_to_decimal(stat["sum"]) + delta,
                 )
+                for stat in stored_stats.get(self.entity_id, [])
+            ]
+            if len(statistics) > 0:
+                await self._async_submit_statistics(
+                    metadata, statistics, short_term=True
+                )
+            shifted_statistics += len(statistics)
+            start += chunk_size
+            _LOGGER.debug(
+                "Shifted sums of %d stored statistics by %s until %s.",
+                shifted_statistics,
+                delta,
+                min(start, last_start),
+            )
+
+
+class LinzNetzTotalSensor(SensorEntity):
+    """linznetz sensor of a consumption total derived from the imports."""
+
+    entity_description: LinzNetzTotalSensorEntityDescription
+
+    def __init__(
+        self,
+        config_entry: ConfigEntry,
+        totals: ConsumptionTotals,
+        description: LinzNetzTotalSensorEntityDescription,
+    ):
+        """Initialize the sensor."""
+        self.entity_description = description
+        self.config_entry = config_entry
+        self._totals = totals
+        _unique_id = config_entry.data[CONF_METER_POINT_NUMBER]
+        _name = config_entry.data.get(CONF_NAME, DEFAULT_NAME)
+        self._attr_name = f"{_name} {description.name}"
+
+        self._attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+        self._attr_device_class = SensorDeviceClass.ENERGY
+        self._attr_should_poll = False
+        self._attr_icon = (
+            "mdi:transmission-tower-export"
+            if config_entry.options.get(CONF_FEED_IN, DEFAULT_FEED_IN)
+            else "mdi:transmission-tower-import"
+        )
+
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, _unique_id)}, name=_name
+        )
+        self._attr_unique_id = f"{_unique_id}_{description.key}"
+
+    @property
+    def native_value(self) -> Decimal | None:
+        """Return the total of the current period."""
+        return self.entity_description.value_fn(self._totals, dt_util.now().date())
+
+    async def async_added_to_hass(self) -> None:
+        """Update the sensor after imports and at the start of each day."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_TOTALS_UPDATED.format(self.config_entry.entry_id),
+                self.async_write_ha_state,
+            )
+        )
+        self.async_on_remove(
+            async_track_time_change(
+                self.hass, self._async_day_changed, hour=0, minute=0, second=0
+            )
+        )
+
+    @callback
+    def _async_day_changed(self, _now: datetime) -> None:
+        """Update the sensor for the new day."""
+        self.async_write_ha_state()
+
+
+class LinzNetzPeakLoadSensor(LinzNetzTotalSensor, RestoreSensor):
+    """linznetz sensor of the peak QH load of the current month.
+
+    The peak is restored after a restart, since the QH values are not cached.
+    """
+
+    def __init__(self, config_entry: ConfigEntry, totals: ConsumptionTotals):
+        """Initialize the sensor."""
+        super().__init__(
+            config_entry,
+            totals,
+            LinzNetzTotalSensorEntityDescription(
+                key="peak_load_this_month",
+                name="Peak Load This Month",
+                value_fn=lambda totals, today: totals.peaks.get(get_month(today)),
+            ),
+        )
+        self._attr_native_unit_of_measurement = UnitOfPower.KILO_WATT
+        self._attr_device_class = SensorDeviceClass.POWER
+        self._attr_icon = "mdi:chart-bell-curve-cumulative"
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the month of the peak load."""
+        return {"month": get_month(dt_util.now().date()).isoformat()}
+
+    async def async_added_to_hass(self) -> None:
+        """Restore the peak load of the current month."""
+        await super().async_added_to_hass()
+        last_state = await self.async_get_last_state()
+        last_sensor_data = await self.async_get_last_sensor_data()
+        if (
+            last_state is None
+            or last_sensor_data is None
+            or last_sensor_data.native_value is None
+        ):
+            return
+        month = get_month(dt_util.now().date())
+        if last_state.attributes.get("month") == month.isoformat():
+            self._totals.add_quarter_hour(
+                dt_util.start_of_local_day(month),
+                parse_value_to_decimal(last_sensor_data.native_value) / 4,
             )
-        _LOGGER.debug(statistics)
-        _LOGGER.debug(metadata)
-        async_import_statistics(self.hass, metadata, statistics)
@@ -0,0 +1,205 @@
+"""Tariffs for the energy cost statistic of linznetz."""
+
+import csv
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+import hashlib
+import logging
+import os
+
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from .const import END_TIME_KEY, START_TIME_KEY
+from .report import (
+    REPORT_READ_ERRORS,
+    CsvDateParser,
+    parse_german_number_str_to_decimal,
+)
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+# prices of the four QH of an hour in EUR/kWh
+QuarterHourPrices = tuple[Decimal, Decimal, Decimal, Decimal]
+
+
+class Tariff:
+    """Prices of the QH of every hour, looked up by the UTC start of the hour.
+
+    Fixed prices and time-of-use windows are compiled to a table of the QH prices
+    of each local hour of a day, a price CSV to a table of the QH prices of each
+    hour it covers. Looking up the prices of an hour therefore never has to match
+    windows or search price periods. Tariffs with the same source and content are
+    equal, so parses of the same reports with the same tariff can be shared.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        key: str,
+        local_hour_prices: list[QuarterHourPrices] | None = None,
+        hour_prices: dict[int, QuarterHourPrices] | None = None,
+    ) -> None:
+        """Initialize a tariff from one of its lookup tables."""
+        self.source = source
+        self.key = key
+        self._local_hour_prices = local_hour_prices
+        self._hour_prices = hour_prices
+
+    def __eq__(self, other) -> bool:
+        """Return if other has the same source and content."""
+        return isinstance(other, Tariff) and other.key == self.key
+
+    def __hash__(self) -> int:
+        """Return the hash of the source and content."""
+        return hash(self.key)
+
+    def get_prices(self, start: int) -> QuarterHourPrices | None:
+        """Return the QH prices of the hour starting at the UTC timestamp start.
+
+        Returns None if the price CSV does not cover the complete hour.
+        """
+        if self._hour_prices is not None:
+            return self._hour_prices.get(start)
+        return self._local_hour_prices[
+            datetime.fromtimestamp(start, dt_util.DEFAULT_TIME_ZONE).hour
+        ]
+
+
+def parse_price(price_str: str) -> Decimal:
+    """Parses a price with decimal point or comma."""
+    try:
+        return parse_german_number_str_to_decimal(price_str.strip())
+    except InvalidOperation as err:
+        raise HomeAssistantError(f"Invalid price {price_str} in tariff.") from err
+
+
+def _parse_quarter_hour_of_day(time_str: str) -> int:
+    """Parses a local "HH:MM" time at a full QH to the index of its QH of a day."""
+    try:
+        hour, minute = (int(part) for part in time_str.strip().split(":"))
+    except ValueError as err:
+        raise HomeAssistantError(f"Invalid time {time_str} in tariff.") from err
+    if (
+        not 0 <= hour <= 24
+        or minute not in (0, 15, 30, 45)
+        or hour * 60 + minute > 1440
+    ):
+        raise HomeAssistantError(
+            f"Invalid time {time_str} in tariff, times must be full quarter hours."
+        )
+    return hour * 4 + minute // 15
+
+
+def parse_time_of_use_tariff(source: str) -> Tariff:
+    """Parses a fixed price or time-of-use windows to a tariff.
+
+    source is a base price optionally followed by windows with their own price,
+    all separated by semicolons, e.g. "0,20; 22:00-06:00=0,15". Windows are in
+    local time, may span midnight and later windows override earlier ones.
+    """
+    base_price_str, *window_strs = source.split(";")
+    prices = [parse_price(base_price_str)] * 96
+    for window_str in window_strs:
+        if not window_str.strip():
+            continue
+        times_str, separator, price_str = window_str.partition("=")
+        start_str, _, end_str = times_str.partition("-")
+        if not separator or not end_str:
+            raise HomeAssistantError(
+                f"Invalid window {window_str.strip()} in tariff, expected HH:MM-HH:MM=price."
+            )
+        price = parse_price(price_str)
+        first = _parse_quarter_hour_of_day(start_str)
+        last = _parse_quarter_hour_of_day(end_str)
+        for index in range(first, last if first < last else last + 96):
+            prices[index % 96] = price
+    return Tariff(
+        source,
+        source,
+        local_hour_prices=[
+            tuple(prices[hour * 4 : hour * 4 + 4]) for hour in range(24)
+        ],
+    )
+
+
+def parse_price_file(file_path: str) -> Tariff:
+    """Reads the prices of a price CSV to a tariff.
+
+    The price CSV is formatted like the reports, every row contains the local
+    start and end time of a period (Datum von, Datum bis) and its price in
+    EUR/kWh, e.g. hourly spot prices. The periods must start and end at full
+    quarter hours.
+    This does blocking I/O and must be run in the executor.
+    """
+    hour_prices: dict[int, list[Decimal | None]] = {}
+    date_parser = CsvDateParser()
+    try:
+        with open(file_path, "rb") as file:
+            content = file.read()
+        rows = csv.reader(content.decode("UTF-8-SIG").splitlines(), delimiter=";")
+        header = [name.strip() for name in next(rows, [])]
+        if START_TIME_KEY not in header or END_TIME_KEY not in header:
+            raise HomeAssistantError(
+                f"Price file {file_path} lacks the columns {START_TIME_KEY} and {END_TIME_KEY}."
+            )
+        start_index = header.index(START_TIME_KEY)
+        end_index = header.index(END_TIME_KEY)
+        price_index = next(
+            (
+                index
+                for index, name in enumerate(header)
+                if name and index not in (start_index, end_index)
+            ),
+            None,
+        )
+        if price_index is None:
+            raise HomeAssistantError(f"Price file {file_path} contains no prices.")
+        for row in rows:
+            if not any(field.strip() for field in row):
+                continue
+            try:
+                start = date_parser.to_timestamp(row[start_index])
+                end = date_parser.to_timestamp(row[end_index])
+                price_str = row[price_index]
+            except (IndexError, ValueError) as err:
+                # e.g. rows without price or an invalid period
+                raise HomeAssistantError(
+                    f"Invalid row in price file {file_path}: {';'.join(row)}"
+                ) from err
+            if end <= start:
+                # the repeated hour of the winter daylight saving change
+                end = start + 3600
+            price = parse_price(price_str)
+            for quarter_hour_start in range(start - start % 900, end, 900):
+                hour_start = quarter_hour_start - quarter_hour_start % 3600
+                hour_prices.setdefault(hour_start, [None] * 4)[
+                    quarter_hour_start % 3600 // 900
+                ] = price
+    except REPORT_READ_ERRORS as err:
+        raise HomeAssistantError(
+            f"Price file {file_path} cannot be read: {err}"
+        ) from err
+    _LOGGER.debug("Read prices of %d hours from %s.", len(hour_prices), file_path)
+    return Tariff(
+        file_path,
+        f"{file_path}\n{hashlib.blake2b(content, digest_size=16).hexdigest()}",
+        hour_prices={
+            start: tuple(prices)
+            for start, prices in hour_prices.items()
+            if None not in prices
+        },
+    )
+
+
+def load_tariff(source: str) -> Tariff:
+    """Loads the tariff of a fixed price, time-of-use windows or a price CSV path.
+
+    This does blocking I/O and must be run in the executor.
+    """
+    source = source.strip()
+    if source.lower().endswith(".csv") or os.path.isfile(source):
+        if not os.path.isfile(source):
+            raise HomeAssistantError(f"Price file {source} not found.")
+        return parse_price_file(source)
+    return parse_time_of_use_tariff(source)
@@ -0,0 +1,50 @@
+"""Timing of the import spans for linznetz."""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+import logging
+import time
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+SPAN_PARSE = "parse"
+SPAN_QUERY = "query"
+SPAN_SUBMIT = "submit"
+
+
+class ImportTimer:
+    """Measures the total duration of an import and the time spent in its spans.
+
+    Spans with the same name add up, e.g. the recorder queries of an import.
+    """
+
+    def __init__(self) -> None:
+        self._start = time.perf_counter()
+        self.spans: dict[str, float] = {}
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Adds the duration of the with block to the span name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[name] = self.spans.get(name, 0.0) + time.perf_counter() - start
+
+    @property
+    def duration(self) -> float:
+        """Returns the seconds since the import started."""
+        return time.perf_counter() - self._start
+
+    def as_dict(self, hours: int) -> dict:
+        """Returns the imported hours, durations and throughput of the import."""
+        duration = self.duration
+        summary = {
+            "hours": hours,
+            "duration": round(duration, 3),
+            "hours_per_second": round(hours / duration) if duration > 0 else None,
+        }
+        for name, span_duration in self.spans.items():
+            summary[f"{name}_duration"] = round(span_duration, 3)
+        _LOGGER.debug("Import timing: %s", summary)
+        return summary
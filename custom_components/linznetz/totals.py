@@ -0,0 +1,82 @@
+"""Consumption totals per day and month for linznetz."""
+
+from datetime import date, datetime
+from decimal import Decimal
+import logging
+
+from homeassistant.util import dt as dt_util
+
+from .cache import StatisticsCache
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+def get_month(day: date) -> date:
+    """Return the first day of the month of day."""
+    return day.replace(day=1)
+
+
+def get_previous_month(day: date) -> date:
+    """Return the first day of the month before the month of day."""
+    month = get_month(day)
+    return (
+        month.replace(year=month.year - 1, month=12)
+        if month.month == 1
+        else month.replace(month=month.month - 1)
+    )
+
+
+class ConsumptionTotals:
+    """Consumption per local day and month and the peak QH load per month.
+
+    The totals are seeded from the cached hourly statistics whenever the cache is
+    loaded and afterwards only updated with the changes of each import, so they
+    never have to be recomputed from the stored statistics. The peak QH load of a month only
+    grows, a corrected peak is kept until the month is over.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty totals."""
+        self.days: dict[date, Decimal] = {}
+        self.months: dict[date, Decimal] = {}
+        self.peaks: dict[date, Decimal] = {}
+
+    def seed(self, cache: StatisticsCache) -> None:
+        """Replaces the daily and monthly totals with the totals of the cached hours.
+
+        This iterates over all cached hours and should be run in the executor.
+        """
+        days: dict[date, Decimal] = {}
+        months: dict[date, Decimal] = {}
+        for start, state in zip(cache.starts, cache.states):
+            _add_hour(
+                days, months, dt_util.utc_from_timestamp(start), Decimal(str(state))
+            )
+        self.days, self.months = days, months
+        _LOGGER.debug("Seeded totals of %d days from the statistics cache.", len(days))
+
+    def add_hour(self, start: datetime, delta: Decimal) -> None:
+        """Adds the changed consumption of the hour starting at start."""
+        if delta != 0:
+            _add_hour(self.days, self.months, start, delta)
+
+    def add_quarter_hour(self, start: datetime, value: Decimal) -> None:
+        """Updates the peak load of the month with the QH value starting at start."""
+        month = get_month(dt_util.as_local(start).date())
+        # the energy of a quarter hour multiplied by 4 is its average power
+        load = value * 4
+        if load > self.peaks.get(month, Decimal(0)):
+            self.peaks[month] = load
+
+
+def _add_hour(
+    days: dict[date, Decimal],
+    months: dict[date, Decimal],
+    start: datetime,
+    delta: Decimal,
+) -> None:
+    """Adds delta to the totals of the local day and month of start."""
+    day = dt_util.as_local(start).date()
+    month = get_month(day)
+    days[day] = days.get(day, Decimal(0)) + delta
+    months[month] = months.get(month, Decimal(0)) + delta
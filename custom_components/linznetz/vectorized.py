@@ -0,0 +1,264 @@
+"""Vectorized aggregation of QH rows to hours for linznetz.
+
+The lines of a chunk of a report are loaded into a numpy byte array, split into
+their fields and aggregated as blocks of 4 QH values per hour with array
+operations. numpy is optional, without it the reports are read by the csv module
+and aggregated by the HourBlockAggregator row by row.
+"""
+
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+
+from .const import FIXED_POINT_DIGITS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# the QH values of two weeks are aggregated at once, which keeps the arrays small
+VECTORIZED_CHUNK_ROWS = 4 * 24 * 14
+
+# length of the "dd.mm.YYYY HH:MM" time strings of the reports
+TIME_STR_LENGTH = 16
+# lines with longer fields are left to the csv module
+MAX_FIELD_LENGTH = 64
+# longer values are left to the HourBlockAggregator, the place values of their
+# digits must fit into 64 bit integers
+MAX_VALUE_STR_LENGTH = 14
+
+DIGIT_POSITIONS = (0, 1, 3, 4, 6, 7, 8, 9, 11, 12, 14, 15)
+SEPARATORS = {2: ord("."), 5: ord("."), 10: ord(" "), 13: ord(":")}
+QH_MINUTES = b"00153045"
+# bytes stripped from flags like the substitute value flag, including the padding
+BLANK_BYTES = b" \t\n\r\x0b\x0c\x00"
+
+# the fields of a column as (rows, width) bytes padded with zeros and their lengths
+Fields = tuple["np.ndarray", "np.ndarray"]
+
+
+def is_vectorized_engine_available() -> bool:
+    """Return if numpy is installed."""
+    return np is not None
+
+
+@dataclass
+class HourBlocks:
+    """Hours aggregated from a chunk of QH rows."""
+
+    # UTC timestamps of the hours
+    starts: list[int]
+    # (hours, 4) arrays of the QH values as integers of 10^-3 kWh per value column
+    quarter_hour_values: list["np.ndarray"]
+    # hourly sums as integers of 10^-3 kWh per value column
+    hourly_sums: list[list[int]]
+    # the next hour repeats the last hour on a winter daylight saving change
+    daylight_saving_change_needs_additional_hour: bool
+
+
+def read_fields(
+    lines: Sequence[str], column_count: int, indexes: Sequence[int]
+) -> list[Fields] | None:
+    """Splits ";" separated lines into the fields of the columns at indexes.
+
+    Returns None if the lines are no plain ASCII rows of exactly column_count
+    fields, e.g. lines with quotes or blank lines, which are left to the csv
+    module.
+    """
+    text = "".join(lines).replace("\r\n", "\n")
+    if not text or "\n\n" in text or any(char in text for char in '"\r\x00'):
+        return None
+    if text[-1] != "\n":
+        text += "\n"
+    try:
+        buffer = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+    except UnicodeEncodeError:
+        return None
+    line_ends = np.flatnonzero(buffer == ord("\n"))
+    separators = np.flatnonzero(buffer == ord(";"))
+    if column_count < 2 or len(separators) != len(line_ends) * (column_count - 1):
+        return None
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+    separators = separators.reshape(len(line_ends), column_count - 1)
+    # with as many separators as expected in total, every line has column_count - 1
+    # separators if the first and last separator of every line are within the line
+    if (separators[:, 0] < line_starts).any() or (separators[:, -1] > line_ends).any():
+        return None
+    fields = []
+    for index in indexes:
+        field_starts = line_starts if index == 0 else separators[:, index - 1] + 1
+        field_ends = line_ends if index == column_count - 1 else separators[:, index]
+        lengths = field_ends - field_starts
+        width = int(lengths.max())
+        if width > MAX_FIELD_LENGTH:
+            return None
+        offsets = np.arange(width)
+        positions = np.minimum(field_starts[:, None] + offsets, len(buffer) - 1)
+        fields.append(
+            (
+                np.where(offsets < lengths[:, None], buffer[positions], 0).astype(
+                    np.uint8
+                ),
+                lengths,
+            )
+        )
+    return fields
+
+
+def count_flags(fields: Fields) -> int:
+    """Return the number of fields which are not blank, e.g. set substitute flags."""
+    field_bytes, _ = fields
+    is_blank = np.isin(field_bytes, np.frombuffer(BLANK_BYTES, dtype=np.uint8))
+    return int((~is_blank).any(axis=1).sum())
+
+
+def _parse_times(
+    start_bytes, to_timestamp: Callable[[str], int]
+) -> "np.ndarray | None":
+    """Return the UTC timestamps of the block start times or None if invalid.
+
+    The local hours of each day are converted with to_timestamp once per day, only
+    days with a daylight saving change need every hour, the timestamps of all
+    hours are looked up in that table at once.
+    """
+    digits = start_bytes[:, DIGIT_POSITIONS].astype(np.int64) - ord("0")
+    if ((digits < 0) | (digits > 9)).any() or any(
+        (start_bytes[:, position] != separator).any()
+        for position, separator in SEPARATORS.items()
+    ):
+        return None
+    hours = digits[:, 8] * 10 + digits[:, 9]
+    if (hours > 23).any():
+        return None
+    days, day_indexes = np.unique(
+        np.ascontiguousarray(start_bytes[:, :10]).view("S10").ravel(),
+        return_inverse=True,
+    )
+    hour_timestamps = np.empty((len(days), 24), dtype=np.int64)
+    try:
+        for index, day in enumerate(days.tolist()):
+            day_str = day.decode()
+            midnight = to_timestamp(f"{day_str} 00:00")
+            if to_timestamp(f"{day_str} 23:00") - midnight == 23 * 3600:
+                hour_timestamps[index] = midnight + np.arange(24) * 3600
+            else:
+                hour_timestamps[index] = [
+                    to_timestamp(f"{day_str} {hour:02d}:00") for hour in range(24)
+                ]
+    except (IndexError, ValueError):
+        return None
+    return hour_timestamps[day_indexes.ravel(), hours]
+
+
+def _parse_values(fields: Fields) -> "np.ndarray | None":
+    """Return German number fields as integers of 10^-3 or None.
+
+    Only numbers with an optional minus sign, at least one digit before the
+    comma and at most FIXED_POINT_DIGITS decimals are accepted, like by
+    parse_german_number_str_to_fixed_point. The digits are summed up with their
+    place values, so the numbers are never parsed as floats.
+    """
+    value_bytes, lengths = fields
+    width = value_bytes.shape[1]
+    if not 0 < width <= MAX_VALUE_STR_LENGTH:
+        return None
+    is_digit = (value_bytes >= ord("0")) & (value_bytes <= ord("9"))
+    is_comma = value_bytes == ord(",")
+    is_minus = value_bytes == ord("-")
+    first_digit = np.where(
+        is_minus[:, 0], is_digit[:, min(1, width - 1)] & (lengths > 1), is_digit[:, 0]
+    )
+    comma_positions = np.where(is_comma.any(axis=1), is_comma.argmax(axis=1), lengths)
+    if (
+        not (is_digit | is_comma | is_minus | (value_bytes == 0)).all()
+        or is_minus[:, 1:].any()
+        or (is_comma.sum(axis=1) > 1).any()
+        or not first_digit.all()
+        or (lengths - comma_positions - 1 > FIXED_POINT_DIGITS).any()
+    ):
+        return None
+    comma_positions = comma_positions[:, None]
+    positions = np.arange(width)
+    exponents = (
+        np.where(
+            positions < comma_positions,
+            comma_positions - positions - 1,
+            comma_positions - positions,
+        )
+        + FIXED_POINT_DIGITS
+    )
+    numbers = np.where(
+        is_digit,
+        (value_bytes.astype(np.int64) - ord("0")) * 10 ** np.maximum(exponents, 0),
+        0,
+    ).sum(axis=1)
+    return np.where(is_minus[:, 0], -numbers, numbers)
+
+
+def aggregate_hour_blocks(
+    starts: Fields,
+    ends: Fields,
+    value_fields: Sequence[Fields],
+    to_timestamp: Callable[[str], int],
+    previous_start: int | None = None,
+    daylight_saving_change_needs_additional_hour: bool = False,
+) -> HourBlocks | None:
+    """Aggregates the fields of complete hours of QH rows with array operations.
+
+    The rows are reshaped into (hours, 4) blocks, the order of the QH start times
+    within each block and the daylight saving change markers (an hour ending at
+    its start time) are checked for all blocks at once. previous_start and
+    daylight_saving_change_needs_additional_hour continue the aggregation of the
+    previous chunk like in HourBlockAggregator.
+
+    Returns None if the rows are no complete and valid hour blocks or contain
+    values which cannot be represented as fixed point numbers, these rows have to
+    be aggregated by the HourBlockAggregator, which handles or rejects them.
+    """
+    start_bytes, start_lengths = starts
+    if (
+        len(start_lengths) == 0
+        or len(start_lengths) % 4 != 0
+        or (start_lengths != TIME_STR_LENGTH).any()
+    ):
+        return None
+    blocks = start_bytes.reshape(-1, 4, TIME_STR_LENGTH)
+    if (
+        not (blocks[:, :, :13] == blocks[:, :1, :13]).all()
+        or not (
+            blocks[:, :, 14:] == np.frombuffer(QH_MINUTES, dtype=np.uint8).reshape(4, 2)
+        ).all()
+    ):
+        return None
+    hour_starts = _parse_times(blocks[:, 0, :], to_timestamp)
+    if hour_starts is None:
+        return None
+    values = []
+    for fields in value_fields:
+        if (field_values := _parse_values(fields)) is None:
+            return None
+        values.append(field_values.reshape(-1, 4))
+
+    # LINZ NETZ marks the hour before the repeated hour of a winter daylight saving
+    # change with an end time equal to its start time, see HourBlockAggregator
+    end_bytes, end_lengths = ends
+    if end_bytes.shape[1] < TIME_STR_LENGTH:
+        markers = np.zeros(len(hour_starts), dtype=bool)
+    else:
+        markers = (end_lengths[3::4] == TIME_STR_LENGTH) & (
+            end_bytes[3::4, :TIME_STR_LENGTH] == blocks[:, 0, :]
+        ).all(axis=1)
+    pending = np.empty(len(hour_starts), dtype=bool)
+    pending[0] = daylight_saving_change_needs_additional_hour
+    pending[1:] = markers[:-1]
+    for index in np.flatnonzero(pending).tolist():
+        before = previous_start if index == 0 else hour_starts[index - 1]
+        if hour_starts[index] == before:
+            hour_starts[index] += 3600
+
+    return HourBlocks(
+        hour_starts.tolist(),
+        values,
+        [field_values.sum(axis=1).tolist() for field_values in values],
+        bool(markers[-1]),
+    )
@@ -0,0 +1,152 @@
+"""Watches a folder for new or changed LINZ NETZ reports."""
+
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+import logging
+import os
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+
+from .const import WATCH_DEBOUNCE_DELAY, WATCH_SCAN_INTERVAL_MINUTES
+from .report import is_report_file
+
+try:
+    from watchdog.events import FileSystemEvent, FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+def scan_report_folder(folder: str) -> dict[str, tuple[int, int]]:
+    """Returns the (size, mtime) of each report file in folder by path.
+
+    This does blocking I/O and must be run in the executor.
+    """
+    report_files = {}
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_file() and is_report_file(entry.name):
+                file_stat = entry.stat()
+                report_files[entry.path] = (file_stat.st_size, file_stat.st_mtime_ns)
+    return report_files
+
+
+class _ReportEventHandler(FileSystemEventHandler):
+    """Forwards file system events of report files to the event loop."""
+
+    def __init__(self, hass: HomeAssistant, report_changed: Callable[[str], None]):
+        self._hass = hass
+        self._report_changed = report_changed
+
+    def on_any_event(self, event: "FileSystemEvent") -> None:
+        """Called from the observer thread on any file system event."""
+        if event.is_directory or event.event_type not in (
+            "created",
+            "modified",
+            "moved",
+            "closed",
+        ):
+            return
+        path = getattr(event, "dest_path", "") or event.src_path
+        if is_report_file(path):
+            self._hass.loop.call_soon_threadsafe(self._report_changed, path)
+
+
+class ReportFolderWatcher:
+    """Imports the reports of a folder once they stopped changing.
+
+    File system notifications are used if watchdog is installed, otherwise the
+    folder is scanned periodically and only report files with a changed size or
+    modification time are imported. Every report file is imported once after
+    start, the import itself skips reports which did not change since the last
+    import and waits for other imports of the entity, e.g. by the services.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        folder: str,
+        import_report: Callable[[str], Awaitable[None]],
+    ):
+        self._hass = hass
+        self._folder = folder
+        self._import_report = import_report
+        self._pending_imports: dict[str, CALLBACK_TYPE] = {}
+        self._report_files: dict[str, tuple[int, int]] = {}
+        self._observer = None
+        self._cancel_scan: CALLBACK_TYPE | None = None
+
+    async def async_start(self) -> None:
+        """Starts watching the folder."""
+        if not await self._hass.async_add_executor_job(os.path.isdir, self._folder):
+            raise HomeAssistantError(f"Report folder {self._folder} not found.")
+        if Observer is not None:
+            self._observer = Observer()
+            self._observer.schedule(
+                _ReportEventHandler(self._hass, self._async_report_changed),
+                self._folder,
+            )
+            await self._hass.async_add_executor_job(self._observer.start)
+            _LOGGER.debug("Watching report folder %s for changes.", self._folder)
+        else:
+            self._cancel_scan = async_track_time_interval(
+                self._hass,
+                self._async_scan,
+                timedelta(minutes=WATCH_SCAN_INTERVAL_MINUTES),
+            )
+            _LOGGER.debug(
+                "Scanning report folder %s every %d minutes.",
+                self._folder,
+                WATCH_SCAN_INTERVAL_MINUTES,
+            )
+        await self._async_scan()
+
+    @callback
+    def async_stop(self) -> None:
+        """Stops watching the folder and cancels pending imports."""
+        if self._observer is not None:
+            self._observer.stop()
+            self._hass.async_add_executor_job(self._observer.join)
+            self._observer = None
+        if self._cancel_scan is not None:
+            self._cancel_scan()
+            self._cancel_scan = None
+        for cancel_import in self._pending_imports.values():
+            cancel_import()
+        self._pending_imports.clear()
+
+    async def _async_scan(self, _now=None) -> None:
+        """Schedules the import of the report files changed since the last scan."""
+        try:
+            report_files = await self._hass.async_add_executor_job(
+                scan_report_folder, self._folder
+            )
+        except OSError as err:
+            _LOGGER.warning("Scanning report folder %s failed: %s", self._folder, err)
+            return
+        for path, signature in report_files.items():
+            if self._report_files.get(path) != signature:
+                self._async_report_changed(path)
+        self._report_files = report_files
+
+    @callback
+    def _async_report_changed(self, path: str) -> None:
+        """Delays the import of the report at path until it stopped changing."""
+        if (cancel_import := self._pending_imports.pop(path, None)) is not None:
+            cancel_import()
+
+        async def _async_import(_now) -> None:
+            self._pending_imports.pop(path, None)
+            try:
+                await self._import_report(path)
+            except HomeAssistantError as err:
+                _LOGGER.warning("Import of report %s failed: %s", path, err)
+
+        self._pending_imports[path] = async_call_later(
+            self._hass, WATCH_DEBOUNCE_DELAY, _async_import
+        )
@@ -0,0 +1,51 @@
+"""Benchmarks for the linznetz import path."""
+
+import json
+import os
+
+import pytest
+
+# Benchmarks take a while and their numbers only make sense on an otherwise idle
+# machine, so they only run on demand.
+BENCHMARK = pytest.mark.skipif(
+    not os.environ.get("LINZNETZ_BENCHMARK"),
+    reason="Set LINZNETZ_BENCHMARK=1 to run the benchmarks.",
+)
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+# Set LINZNETZ_BENCHMARK_UPDATE=1 to store the results as the new baselines
+UPDATE_BASELINES = bool(os.environ.get("LINZNETZ_BENCHMARK_UPDATE"))
+# Results may be this much worse than their baseline, the baselines were measured
+# on a different machine
+BASELINE_TOLERANCE = 0.5
+
+
+def check_baseline(
+    name: str,
+    value: float,
+    higher_is_better: bool = True,
+    tolerance: float = BASELINE_TOLERANCE,
+) -> None:
+    """Compares the result of a benchmark with its stored baseline.
+
+    Fails if the result is worse than the baseline by more than tolerance or
+    stores the result as the new baseline with LINZNETZ_BENCHMARK_UPDATE.
+    """
+    try:
+        with open(BASELINES_PATH, encoding="UTF-8") as file:
+            baselines = json.load(file)
+    except FileNotFoundError:
+        baselines = {}
+    if UPDATE_BASELINES:
+        baselines[name] = round(value, 3)
+        with open(BASELINES_PATH, "w", encoding="UTF-8") as file:
+            json.dump(baselines, file, indent=2, sort_keys=True)
+            file.write("\n")
+        return
+    if (baseline := baselines.get(name)) is None:
+        pytest.skip(f"No baseline for {name}, run with LINZNETZ_BENCHMARK_UPDATE=1.")
+    print(f"{name}: {value:,.3f} (baseline {baseline:,.3f})")
+    if higher_is_better:
+        assert value >= baseline * (1 - tolerance), name
+    else:
+        assert value <= baseline * (1 + tolerance), name
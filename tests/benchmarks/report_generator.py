@@ -0,0 +1,99 @@
+"""Synthetic LINZ NETZ report generator for benchmarks."""
+
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta, timezone
+import random
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.linznetz.const import (
+    END_TIME_KEY,
+    START_TIME_KEY,
+    SUBSTITUTE_VALUE_KEY,
+)
+
+VALUE_KEY = "Energiemenge in kWh"
+HEADER = f"{START_TIME_KEY};{END_TIME_KEY};{VALUE_KEY};{SUBSTITUTE_VALUE_KEY}\n"
+SUBSTITUTE_VALUE_FLAG = "X"
+
+CSV_DATE_FORMAT = "%d.%m.%Y %H:%M"
+QUARTER_HOUR = timedelta(minutes=15)
+
+
+def iter_report_rows(
+    first_day: date, days: int, seed: int = 0, substitute_value_rate: float = 0.0
+) -> Iterator[tuple[str, str, str, str]]:
+    """Yields (start, end, value, substitute value) rows like a LINZ NETZ QH report.
+
+    The rows follow the LINZ NETZ daylight saving conventions: the skipped hour in
+    spring is missing and the repeated hour in autumn is reported twice, with the
+    end time of the last QH of its first occurrence pointing back to xx:00.
+    The given share of the rows is flagged as substitute values.
+    """
+    time_zone = dt_util.get_time_zone("Europe/Vienna")
+    rand = random.Random(seed)
+    local_midnight = datetime.combine(first_day, datetime.min.time(), time_zone)
+    utc_time = local_midnight.astimezone(timezone.utc)
+    utc_end = (
+        datetime.combine(
+            first_day + timedelta(days=days), datetime.min.time(), time_zone
+        )
+    ).astimezone(timezone.utc)
+    while utc_time < utc_end:
+        local_start = utc_time.astimezone(time_zone)
+        local_end = (utc_time + QUARTER_HOUR).astimezone(time_zone)
+        if local_end.utcoffset() > local_start.utcoffset():
+            # LINZ NETZ reports the wall clock before the spring change, e.g. 01:45-02:00
+            local_end = local_start.replace(tzinfo=None) + QUARTER_HOUR
+        yield (
+            local_start.strftime(CSV_DATE_FORMAT),
+            local_end.strftime(CSV_DATE_FORMAT),
+            f"0,{rand.randrange(1000):03d}",
+            SUBSTITUTE_VALUE_FLAG if rand.random() < substitute_value_rate else "",
+        )
+        utc_time += QUARTER_HOUR
+
+
+def write_report(
+    file_path,
+    first_day: date,
+    days: int,
+    seed: int = 0,
+    substitute_value_rate: float = 0.0,
+) -> int:
+    """Writes a synthetic report to file_path and returns the number of QH rows."""
+    rows = 0
+    with open(file_path, "w", encoding="UTF-8") as file:
+        file.write(HEADER)
+        for row in iter_report_rows(first_day, days, seed, substitute_value_rate):
+            file.write(";".join(row) + "\n")
+            rows += 1
+    return rows
+
+
+def write_overlapping_reports(
+    folder,
+    first_day: date,
+    days: int,
+    report_days: int = 31,
+    overlap_days: int = 1,
+    substitute_value_rate: float = 0.0,
+) -> list[str]:
+    """Writes reports of report_days each covering first_day and the following days.
+
+    Each report overlaps the next one by overlap_days with different values, like
+    reports with corrected values. Returns the paths of the reports.
+    """
+    paths = []
+    for offset in range(0, days, report_days):
+        day = first_day + timedelta(days=offset)
+        file_path = f"{folder}/{day.isoformat()}.csv"
+        write_report(
+            file_path,
+            day,
+            min(report_days + overlap_days, days - offset),
+            seed=offset,
+            substitute_value_rate=substitute_value_rate,
+        )
+        paths.append(file_path)
+    return paths
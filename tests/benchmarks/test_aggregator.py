@@ -0,0 +1,101 @@
+"""Benchmark the hourly aggregation of QH reports."""
+
+from datetime import date
+import time
+
+from custom_components.linznetz.const import END_TIME_KEY, START_TIME_KEY
+from custom_components.linznetz.report import (
+    CsvDateParser,
+    get_hourly_statistics_from_file,
+    parse_report_file_range,
+    parse_report_file_series,
+    validate_hour_block,
+)
+
+from . import BENCHMARK, check_baseline
+from .report_generator import iter_report_rows, write_report
+
+pytestmark = BENCHMARK
+
+# 5 years of QH values, roughly 175k rows
+FIRST_DAY = date(2018, 1, 1)
+DAYS = 5 * 365 + 1
+
+
+def test_aggregator_rows_per_second(tmp_path):
+    """Measure the rows/sec of reading and aggregating a 5-year report."""
+
+    report_path = tmp_path / "report.csv"
+    rows = write_report(report_path, FIRST_DAY, DAYS)
+
+    start = time.perf_counter()
+    statistics = get_hourly_statistics_from_file(str(report_path))
+    duration = time.perf_counter() - start
+
+    assert len(statistics) * 4 == rows
+    print(
+        f"\naggregated {rows} QH rows to {len(statistics)} hours in {duration:.3f}s "
+        f"({rows / duration:,.0f} rows/sec)"
+    )
+    check_baseline("aggregator_rows_per_second", rows / duration)
+
+
+def test_aggregator_with_substitute_values(tmp_path):
+    """Measure the rows/sec of a 5-year report with 10% substitute values."""
+
+    report_path = tmp_path / "report.csv"
+    rows = write_report(report_path, FIRST_DAY, DAYS, substitute_value_rate=0.1)
+
+    start = time.perf_counter()
+    reports = parse_report_file_series(str(report_path))
+    duration = time.perf_counter() - start
+
+    (report,) = reports.values()
+    assert len(report.statistics) * 4 == rows
+    assert 0 < report.substitute_values < rows
+    print(
+        f"\naggregated {rows} QH rows with {report.substitute_values} substitute "
+        f"values in {duration:.3f}s ({rows / duration:,.0f} rows/sec)"
+    )
+    check_baseline("aggregator_substitute_values_rows_per_second", rows / duration)
+
+
+def test_parse_last_week_speedup(tmp_path):
+    """Measure the speedup of reading the last week of a 5-year report."""
+
+    report_path = tmp_path / "report.csv"
+    write_report(report_path, FIRST_DAY, DAYS)
+    start = CsvDateParser().to_timestamp("25.12.2022 00:00")
+    # the line index is built once per version of the file
+    parse_report_file_range(str(report_path), None, None, start)
+
+    begin = time.perf_counter()
+    (report,) = parse_report_file_range(str(report_path), None, None, start).values()
+    range_duration = time.perf_counter() - begin
+    begin = time.perf_counter()
+    parse_report_file_series(str(report_path))
+    duration = time.perf_counter() - begin
+
+    assert len(report.statistics) == 7 * 24
+    print(
+        f"\nread the last week in {range_duration * 1000:.1f}ms, the complete "
+        f"report in {duration:.3f}s ({duration / range_duration:,.0f}x)"
+    )
+    check_baseline("parse_last_week_speedup", duration / range_duration)
+
+
+def test_validate_hour_block_rows_per_second():
+    """Measure the rows/sec of validating the hour blocks of one year."""
+
+    records = [
+        {START_TIME_KEY: start, END_TIME_KEY: end}
+        for start, end, _, _ in iter_report_rows(date(2022, 1, 1), 365)
+    ]
+
+    start = time.perf_counter()
+    for index in range(0, len(records), 4):
+        assert validate_hour_block(records[index : index + 4])
+    duration = time.perf_counter() - start
+
+    print(f"\nvalidate_hour_block: {len(records) / duration:,.0f} rows/sec")
+    check_baseline("validate_hour_block_rows_per_second", len(records) / duration)
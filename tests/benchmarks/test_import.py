@@ -0,0 +1,102 @@
+"""Benchmark the end-to-end import of reports into the test recorder."""
+
+from datetime import date
+import time
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.components.recorder.common import (
+    async_wait_recording_done,
+)
+
+from custom_components.linznetz import async_setup_entry
+from custom_components.linznetz.const import (
+    DEFAULT_NAME,
+    DOMAIN,
+    SENSOR,
+    SERVICE_IMPORT_REPORT,
+    SERVICE_IMPORT_REPORTS,
+)
+
+from ..const import MOCK_CONFIG
+from . import BENCHMARK, check_baseline
+from .report_generator import write_overlapping_reports, write_report
+
+pytestmark = BENCHMARK
+
+STATISTIC_ID = f"{SENSOR}.{DEFAULT_NAME.lower()}_energy"
+
+# one year of QH values including both daylight saving changes
+FIRST_DAY = date(2022, 1, 1)
+DAYS = 365
+
+
+@pytest.fixture(autouse=True)
+def auto_recorder_mock_and_enable_custom_integrations(
+    recorder_mock, enable_custom_integrations
+):
+    """Enables recorder_mock and custom_integrations fixtures in the right order."""
+    yield
+
+
+async def timed_service_call(hass, service: str, service_data: dict) -> float:
+    """Calls a linznetz service and returns the seconds until it was recorded."""
+    start = time.perf_counter()
+    await hass.services.async_call(
+        DOMAIN,
+        service,
+        service_data={"entity_id": STATISTIC_ID, **service_data},
+        blocking=True,
+    )
+    await async_wait_recording_done(hass)
+    return time.perf_counter() - start
+
+
+async def test_import_report_hours_per_second(hass, tmp_path):
+    """Measure the hours/sec of importing a 1-year report and of repeating it."""
+
+    report_path = tmp_path / "report.csv"
+    rows = write_report(report_path, FIRST_DAY, DAYS, substitute_value_rate=0.01)
+    hours = rows // 4
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    duration = await timed_service_call(
+        hass, SERVICE_IMPORT_REPORT, {"path": str(report_path)}
+    )
+    repeat_duration = await timed_service_call(
+        hass, SERVICE_IMPORT_REPORT, {"path": str(report_path)}
+    )
+
+    assert hass.states.get(STATISTIC_ID).attributes["last_import_hours"] == 0
+    print(
+        f"\nimported {hours} hours in {duration:.3f}s ({hours / duration:,.0f} "
+        f"hours/sec), repeated in {repeat_duration:.3f}s"
+    )
+    check_baseline("import_report_hours_per_second", hours / duration)
+    # a repeated import only hashes the report, so it takes a few milliseconds
+    check_baseline(
+        "import_report_repeated_seconds",
+        repeat_duration,
+        higher_is_better=False,
+        tolerance=4,
+    )
+
+
+async def test_import_overlapping_reports_hours_per_second(hass, tmp_path):
+    """Measure the hours/sec of importing the overlapping monthly reports of a year."""
+
+    paths = write_overlapping_reports(tmp_path, FIRST_DAY, DAYS)
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    duration = await timed_service_call(hass, SERVICE_IMPORT_REPORTS, {"paths": paths})
+
+    hours = hass.states.get(STATISTIC_ID).attributes["last_import_hours"]
+    print(
+        f"\nimported {len(paths)} reports with {hours} hours in {duration:.3f}s "
+        f"({hours / duration:,.0f} hours/sec)"
+    )
+    check_baseline("import_overlapping_reports_hours_per_second", hours / duration)
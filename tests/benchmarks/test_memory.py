@@ -0,0 +1,63 @@
+"""Benchmark the peak memory of parsing reports."""
+
+from datetime import date
+import tracemalloc
+
+from custom_components.linznetz.report import (
+    parse_report_file_series,
+    parse_report_files_series,
+)
+
+from . import BENCHMARK, check_baseline
+from .report_generator import write_overlapping_reports, write_report
+
+pytestmark = BENCHMARK
+
+# one year of QH values, roughly 35k rows
+FIRST_DAY = date(2022, 1, 1)
+DAYS = 365
+
+
+def measure_peak_memory(parse, *args) -> tuple[dict, int]:
+    """Returns the result and the peak of the memory allocated by parse."""
+    tracemalloc.start()
+    try:
+        result = parse(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def test_parse_report_peak_memory(tmp_path):
+    """Measure the peak memory per hour of parsing a 1-year report."""
+
+    report_path = tmp_path / "report.csv"
+    write_report(report_path, FIRST_DAY, DAYS)
+
+    reports, peak = measure_peak_memory(parse_report_file_series, str(report_path))
+
+    (report,) = reports.values()
+    hours = len(report.statistics)
+    print(f"\nparsed {hours} hours with a peak of {peak / 2**20:.1f} MiB")
+    check_baseline("parse_report_bytes_per_hour", peak / hours, higher_is_better=False)
+
+
+def test_parse_overlapping_reports_peak_memory(tmp_path):
+    """Measure the peak memory per hour of merging monthly reports of one year."""
+
+    paths = write_overlapping_reports(tmp_path, FIRST_DAY, DAYS)
+
+    reports, peak = measure_peak_memory(parse_report_files_series, paths)
+
+    (report,) = reports.values()
+    hours = len(report.statistics)
+    print(
+        f"\nmerged {len(paths)} reports to {hours} hours with a peak of "
+        f"{peak / 2**20:.1f} MiB"
+    )
+    check_baseline(
+        "parse_overlapping_reports_bytes_per_hour",
+        peak / hours,
+        higher_is_better=False,
+    )
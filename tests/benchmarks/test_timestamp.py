@@ -0,0 +1,47 @@
+"""Benchmark the parsing of report time strings."""
+
+from datetime import date
+import time
+
+from custom_components.linznetz.report import CsvDateParser, parse_csv_date_str
+
+from . import BENCHMARK, check_baseline
+from .report_generator import iter_report_rows
+
+pytestmark = BENCHMARK
+
+# one year including both daylight saving changes
+FIRST_DAY = date(2022, 1, 1)
+DAYS = 365
+
+
+def test_csv_date_parser_against_parse_csv_date_str():
+    """Compare the cached date parser with parse_csv_date_str."""
+
+    date_strs = [row[0] for row in iter_report_rows(FIRST_DAY, DAYS)]
+
+    start = time.perf_counter()
+    expected = [parse_csv_date_str(date_str) for date_str in date_strs]
+    reference_duration = time.perf_counter() - start
+
+    date_parser = CsvDateParser()
+    start = time.perf_counter()
+    parsed = [date_parser(date_str) for date_str in date_strs]
+    parser_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for date_str in date_strs:
+        date_parser.to_timestamp(date_str)
+    timestamp_duration = time.perf_counter() - start
+
+    assert parsed == expected
+    rows = len(date_strs)
+    print(
+        f"\nparse_csv_date_str: {rows / reference_duration:,.0f} rows/sec"
+        f"\nCsvDateParser: {rows / parser_duration:,.0f} rows/sec "
+        f"({reference_duration / parser_duration:.1f}x)"
+        f"\nCsvDateParser.to_timestamp: {rows / timestamp_duration:,.0f} rows/sec "
+        f"({reference_duration / timestamp_duration:.1f}x)"
+    )
+    check_baseline("parse_csv_date_str_rows_per_second", rows / reference_duration)
+    check_baseline("csv_date_parser_speedup", reference_duration / parser_duration)
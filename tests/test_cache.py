@@ -0,0 +1,137 @@
+"""Test linznetz statistics cache."""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from homeassistant.components.recorder.models import StatisticData
+from homeassistant.util import dt as dt_util
+
+from custom_components.linznetz.cache import StatisticsCache
+
+START = dt_util.parse_datetime("2022-09-16T22:00:00+00:00")
+
+
+def hour(index: int):
+    """Helper to get the start of the hour with index after START."""
+    return START + timedelta(hours=index)
+
+
+def test_cache_lookups():
+    """Test sum lookups and stored ranges of a loaded cache."""
+
+    cache = StatisticsCache()
+    assert not cache.loaded
+    assert cache.last_start is None
+
+    cache.load(
+        [
+            {"start": hour(index).timestamp(), "state": 1.0, "sum": index + 1.0}
+            for index in range(24)
+        ]
+    )
+
+    assert cache.loaded
+    assert len(cache) == 24
+    assert cache.last_start == hour(23)
+    assert cache.last_sum == 24.0
+    assert cache.sum_before(hour(0)) is None
+    assert cache.sum_before(hour(5)) == 5.0
+    assert cache.sum_before(hour(30)) == 24.0
+    assert [stat["sum"] for stat in cache.iter_range(hour(2), hour(4))] == [
+        3.0,
+        4.0,
+        5.0,
+    ]
+
+
+def test_cache_update_shifts_later_sums():
+    """Test an update in the middle replaces its hours and shifts the later sums."""
+
+    cache = StatisticsCache()
+    cache.load(
+        [
+            {"start": hour(index).timestamp(), "state": 1.0, "sum": index + 1.0}
+            for index in range(24)
+        ]
+    )
+
+    cache.update(
+        [
+            StatisticData(start=hour(10), state=Decimal(2), sum=Decimal(12)),
+            StatisticData(start=hour(11), state=Decimal(2), sum=Decimal(14)),
+        ],
+        Decimal(2),
+    )
+
+    assert len(cache) == 24
+    assert cache.sum_before(hour(11)) == 12.0
+    assert cache.last_sum == 26.0
+
+    cache.update(
+        [StatisticData(start=hour(30), state=Decimal(1), sum=Decimal(27))], Decimal(0)
+    )
+    assert len(cache) == 25
+    assert cache.last_start == hour(30)
+
+
+def test_cache_snapshot(tmp_path):
+    """Test a cache loaded from its snapshot matches the saved cache."""
+
+    cache = StatisticsCache()
+    cache.load(
+        [
+            {"start": hour(index).timestamp(), "state": 1.5, "sum": 1.5 * (index + 1)}
+            for index in range(24)
+        ]
+    )
+    snapshot_path = str(tmp_path / "cache.snapshot")
+    cache.save_snapshot(snapshot_path)
+
+    loaded_cache = StatisticsCache()
+    assert loaded_cache.load_snapshot(snapshot_path)
+    assert not loaded_cache.verified
+    assert isinstance(loaded_cache.starts, memoryview)
+    assert list(loaded_cache.starts) == list(cache.starts)
+    assert list(loaded_cache.states) == list(cache.states)
+    assert loaded_cache.last_sum == 36.0
+
+    loaded_cache.update(
+        [StatisticData(start=hour(24), state=Decimal(1), sum=Decimal(37))], Decimal(0)
+    )
+    assert len(loaded_cache) == 25
+    assert loaded_cache.last_sum == 37.0
+
+
+def test_cache_invalid_snapshot(tmp_path):
+    """Test missing and invalid snapshots are not loaded."""
+
+    cache = StatisticsCache()
+    assert not cache.load_snapshot(str(tmp_path / "missing.snapshot"))
+
+    snapshot_path = tmp_path / "invalid.snapshot"
+    snapshot_path.write_bytes(b"invalid snapshot content")
+    assert not cache.load_snapshot(str(snapshot_path))
+    assert not cache.loaded
+
+
+def test_cache_matches_last_statistic():
+    """Test the last cached hour is compared to the last stored statistic."""
+
+    cache = StatisticsCache()
+    assert cache.matches_last_statistic(None)
+
+    cache.load(
+        [
+            {"start": hour(index).timestamp(), "state": 1.0, "sum": index + 1.0}
+            for index in range(24)
+        ]
+    )
+    assert cache.verified
+    assert cache.matches_last_statistic({"start": hour(23).timestamp(), "sum": 24.0})
+    assert not cache.matches_last_statistic(None)
+    assert not cache.matches_last_statistic(
+        {"start": hour(22).timestamp(), "sum": 24.0}
+    )
+    assert not cache.matches_last_statistic(
+        {"start": hour(23).timestamp(), "sum": 25.0}
+    )
@@ -4,7 +4,20 @@ import pytest
 
 from homeassistant import config_entries, data_entry_flow
 
-from custom_components.linznetz.const import DOMAIN, CONF_METER_POINT_NUMBER
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.linznetz.const import (
+    DOMAIN,
+    CONF_METER_POINT_NUMBER,
+    CONF_FEED_IN,
+    CONF_IMPORT_CHUNK_SIZE,
+    CONF_QUARTER_HOUR_DAYS,
+    CONF_TARIFF,
+    CONF_WATCH_FOLDER,
+    DEFAULT_FEED_IN,
+    DEFAULT_IMPORT_CHUNK_SIZE,
+    DEFAULT_QUARTER_HOUR_DAYS,
+)
 
 from .const import MOCK_CONFIG, MOCK_CONFIG_WITH_CUSTOM_NAME, MOCK_CONFIG_INVALID_LENGTH
 from .test_common import auto_enable_custom_integrations
@@ -89,3 +102,41 @@ async def test_failed_config_flow(hass):
 
     assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
     assert result["errors"] == {"base": "invalid_length"}
+
+
+# Here we simulate a successful options flow.
+async def test_options_flow(hass, tmp_path):
+    """Test an options flow setting the watched folder."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    config_entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(config_entry.entry_id)
+
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result["step_id"] == "init"
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={CONF_WATCH_FOLDER: str(tmp_path / "missing")}
+    )
+
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result["errors"] == {"base": "folder_not_found"}
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={CONF_TARIFF: "0,20; 22:00=0,10"}
+    )
+
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result["errors"] == {"base": "invalid_tariff"}
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={CONF_WATCH_FOLDER: str(tmp_path)}
+    )
+
+    assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    assert config_entry.options == {
+        CONF_WATCH_FOLDER: str(tmp_path),
+        CONF_IMPORT_CHUNK_SIZE: DEFAULT_IMPORT_CHUNK_SIZE,
+        CONF_QUARTER_HOUR_DAYS: DEFAULT_QUARTER_HOUR_DAYS,
+        CONF_FEED_IN: DEFAULT_FEED_IN,
+    }
@@ -0,0 +1,52 @@
+"""Test linznetz diagnostics."""
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.components.recorder.common import (
+    async_wait_recording_done,
+)
+
+from custom_components.linznetz import async_setup_entry
+from custom_components.linznetz.const import (
+    CONF_METER_POINT_NUMBER,
+    DOMAIN,
+    SERVICE_IMPORT_REPORT,
+)
+from custom_components.linznetz.diagnostics import async_get_config_entry_diagnostics
+
+from .const import MOCK_CONFIG
+from .test_sensor import STATISTIC_ID
+
+
+@pytest.fixture(autouse=True)
+def auto_recorder_mock_and_enable_custom_integrations(
+    recorder_mock, enable_custom_integrations
+):
+    """Enables recorder_mock and custom_integrations fixtures in the right order."""
+    yield
+
+
+async def test_diagnostics_with_last_import(hass):
+    """Test diagnostics contain the last import and redact the meter point number."""
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_IMPORT_REPORT,
+        service_data={
+            "entity_id": STATISTIC_ID,
+            "path": "tests/data/2022-09-17.csv",
+        },
+        blocking=True,
+    )
+    await async_wait_recording_done(hass)
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, config_entry)
+
+    assert diagnostics["entry"]["data"][CONF_METER_POINT_NUMBER] == "**REDACTED**"
+    last_import = diagnostics["entities"][STATISTIC_ID]
+    assert last_import["last_import_hours"] == 24
+    assert last_import["last_import_hours_per_second"] > 0
@@ -1,6 +1,9 @@
 """Test linznetz setup process."""
+from unittest.mock import patch
+
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
+from homeassistant.config_entries import ConfigEntryState
 from homeassistant.exceptions import ConfigEntryNotReady
 
 from custom_components.linznetz import (
@@ -8,7 +11,12 @@ from custom_components.linznetz import (
     async_setup_entry,
     async_unload_entry,
 )
-from custom_components.linznetz.const import DOMAIN, CONF_METER_POINT_NUMBER
+from custom_components.linznetz.cache import StatisticsCache
+from custom_components.linznetz.const import (
+    CONF_METER_POINT_NUMBER,
+    CONF_WATCH_FOLDER,
+    DOMAIN,
+)
 
 from .const import MOCK_CONFIG
 from .test_common import auto_enable_custom_integrations
@@ -24,8 +32,9 @@ async def test_setup_unload_and_reload_entry(hass):
     # them to be.
     assert await async_setup_entry(hass, config_entry)
     assert DOMAIN in hass.data
-    # Since we don't use coordinators we have nothing in the domain dictionary
-    # assert config_entry.entry_id in hass.data[DOMAIN]
+    # The statistics cache of the entry is loaded lazily on the first import
+    assert isinstance(hass.data[DOMAIN][config_entry.entry_id], StatisticsCache)
+    assert not hass.data[DOMAIN][config_entry.entry_id].loaded
 
     # Cannot check as well since nothing checkable happens...
     # # Reload the entry and assert that the data from above is still there
@@ -35,3 +44,25 @@ async def test_setup_unload_and_reload_entry(hass):
     # # Unload the entry and verify that the data has been removed
     # assert await async_unload_entry(hass, config_entry)
     # assert config_entry.entry_id not in hass.data[DOMAIN]
+
+
+async def test_options_update_reloads_entry_once(hass, tmp_path):
+    """Test each options update reloads the entry once through the entry manager."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    with patch(
+        "custom_components.linznetz.async_setup_entry", wraps=async_setup_entry
+    ) as mock_setup_entry:
+        hass.config_entries.async_update_entry(
+            config_entry, options={CONF_WATCH_FOLDER: str(tmp_path)}
+        )
+        await hass.async_block_till_done()
+        assert len(mock_setup_entry.mock_calls) == 1
+
+        hass.config_entries.async_update_entry(config_entry, options={})
+        await hass.async_block_till_done()
+        assert len(mock_setup_entry.mock_calls) == 2
+    assert config_entry.state is ConfigEntryState.LOADED
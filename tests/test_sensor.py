@@ -1,34 +1,69 @@
 """Test linznetz sensor."""
+import asyncio
+from copy import deepcopy
+from datetime import date, timedelta
 from decimal import Decimal
+import gzip
+import shutil
+import zipfile
 
 from unittest.mock import patch
 import pytest
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_capture_events,
+)
 from pytest_homeassistant_custom_component.components.recorder.common import (
     async_wait_recording_done,
 )
 
-from homeassistant.components.recorder.statistics import statistics_during_period
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import (
+    async_import_statistics,
+    statistics_during_period,
+)
 from homeassistant.exceptions import HomeAssistantError
 
-from custom_components.linznetz import async_setup_entry
+from custom_components.linznetz import async_setup_entry, async_unload_entry
 from custom_components.linznetz.const import (
+    CONF_FEED_IN,
+    CONF_IMPORT_CHUNK_SIZE,
+    CONF_METER_POINT_NUMBER,
+    CONF_NAME,
+    CONF_QUARTER_HOUR_DAYS,
+    CONF_TARIFF,
     DEFAULT_NAME,
     DOMAIN,
+    EVENT_IMPORT_PROGRESS,
     SENSOR,
     SERVICE_IMPORT_REPORT,
+    SERVICE_IMPORT_REPORTS,
+    STORAGE_KEY,
     END_TIME_KEY,
+    METER_POINT_KEY,
     START_TIME_KEY,
 )
-from custom_components.linznetz.sensor import (
+from custom_components.linznetz.report import (
+    CsvDateParser,
     get_csv_data_list_from_file,
     get_csv_data_value_key,
+    get_hourly_statistics_from_file,
+    get_series_report,
+    get_new_hourly_statistics_from_file,
+    iter_csv_data_from_file,
+    iter_hourly_statistics,
     parse_csv_date_str,
     parse_german_number_str_to_decimal,
-    parse_value_to_decimal,
+    parse_german_number_str_to_fixed_point,
+    parse_report_file,
+    parse_report_file_range,
+    parse_report_file_series,
+    parse_report_file_tail,
     validate_hour_block,
 )
+from custom_components.linznetz.sensor import LinzNetzSensor, parse_value_to_decimal
 
+from .benchmarks.report_generator import write_report
 from .const import MOCK_CONFIG
 
 
@@ -103,9 +138,15 @@ async def prepare_and_call_import_service_mocked(hass, csv_data):
     await async_setup_entry(hass, config_entry)
     await hass.async_block_till_done()
 
+    rows = [list(record.values()) for record in csv_data]
+    if csv_data:
+        rows.insert(0, list(csv_data[0].keys()))
     with patch(
-        "custom_components.linznetz.sensor.get_csv_data_list_from_file",
-        return_value=csv_data,
+        "custom_components.linznetz.report.iter_report_rows",
+        side_effect=lambda _: iter([iter(rows)]),
+    ), patch(
+        "custom_components.linznetz.sensor.get_report_files_hash",
+        return_value=str(hash(str(rows))),
     ):
         await hass.services.async_call(
             DOMAIN,
@@ -119,7 +160,22 @@ async def prepare_and_call_import_service_mocked(hass, csv_data):
     await async_wait_recording_done(hass)
 
 
-async def get_statistics(hass, start_time, end_time=None, statistic_id=STATISTIC_ID):
+async def call_import_service(hass, service=SERVICE_IMPORT_REPORT, **service_data):
+    """Helper to call an import service for the sensor and wait for the recorder."""
+    response = await hass.services.async_call(
+        DOMAIN,
+        service,
+        service_data={"entity_id": STATISTIC_ID, **service_data},
+        blocking=True,
+        return_response=True,
+    )
+    await async_wait_recording_done(hass)
+    return response[STATISTIC_ID]
+
+
+async def get_statistics(
+    hass, start_time, end_time=None, statistic_id=STATISTIC_ID, period="hour"
+):
     """Helper to get statistics during period."""
     stats = await hass.async_add_executor_job(
         statistics_during_period,
@@ -127,7 +183,7 @@ async def get_statistics(hass, start_time, end_time=None, statistic_id=STATISTIC
         start_time,
         end_time,
         [statistic_id],
-        "hour",
+        period,
         None,
         {"sum", "state"},
     )
@@ -173,6 +229,121 @@ async def test_import_service_with_actual_file(hass):
     assert len(stats) == 1
     assert len(stats[STATISTIC_ID]) == 24
 
+    state = hass.states.get(STATISTIC_ID)
+    assert state.attributes["last_import_hours"] == 24
+    assert state.attributes["last_import_duration"] >= (
+        state.attributes["last_import_parse_duration"]
+    )
+    assert "last_import_query_duration" in state.attributes
+    assert "last_import_submit_duration" in state.attributes
+
+
+async def test_import_service_with_quarter_hours(hass):
+    """Test import service keeps the QH values as short-term statistics."""
+
+    config_entry = MockConfigEntry(
+        domain=DOMAIN, data=MOCK_CONFIG, options={CONF_QUARTER_HOUR_DAYS: 100000}
+    )
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_IMPORT_REPORT,
+        service_data={
+            "entity_id": STATISTIC_ID,
+            "path": "tests/data/2022-09-17.csv",
+        },
+        blocking=True,
+    )
+    await async_wait_recording_done(hass)
+
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    start_time = parse_csv_date_str(csv_data[0][START_TIME_KEY])
+    stats = await get_statistics(hass, start_time)
+    short_term_stats = await get_statistics(hass, start_time, period="5minute")
+
+    assert len(short_term_stats[STATISTIC_ID]) == 96
+    assert parse_value_to_decimal(
+        short_term_stats[STATISTIC_ID][1]["sum"]
+    ) == get_csv_data_sum(csv_data[:2])
+    assert parse_value_to_decimal(short_term_stats[STATISTIC_ID][-1]["sum"]) == (
+        parse_value_to_decimal(stats[STATISTIC_ID][-1]["sum"])
+    )
+
+
+@pytest.mark.parametrize(
+    ("feed_in", "icon"),
+    [(False, "mdi:transmission-tower-import"), (True, "mdi:transmission-tower-export")],
+)
+async def test_total_sensor_icons(hass, feed_in, icon):
+    """Test the total sensors use the icon of the energy direction of the entry."""
+
+    config_entry = MockConfigEntry(
+        domain=DOMAIN, data=MOCK_CONFIG, options={CONF_FEED_IN: feed_in}
+    )
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    for entity_id in (
+        STATISTIC_ID,
+        f"{STATISTIC_ID}_today",
+        f"{STATISTIC_ID}_last_month",
+    ):
+        assert hass.states.get(entity_id).attributes["icon"] == icon
+
+
+async def test_total_sensors_after_imports(hass, freezer):
+    """Test the derived total sensors are updated by each import."""
+
+    freezer.move_to("2022-09-18 12:00:00+02:00")
+    await hass.config.async_set_time_zone("Europe/Vienna")
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    assert hass.states.get(f"{STATISTIC_ID}_today").state == "unknown"
+
+    for path in ("tests/data/2022-09-17.csv", "tests/data/2022-09-18.csv"):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_IMPORT_REPORT,
+            service_data={"entity_id": STATISTIC_ID, "path": path},
+            blocking=True,
+        )
+        await async_wait_recording_done(hass)
+
+    prev_csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-18.csv")
+    assert Decimal(hass.states.get(f"{STATISTIC_ID}_today").state) == (
+        get_csv_data_sum(csv_data)
+    )
+    assert Decimal(hass.states.get(f"{STATISTIC_ID}_yesterday").state) == (
+        get_csv_data_sum(prev_csv_data)
+    )
+    assert Decimal(hass.states.get(f"{STATISTIC_ID}_this_month").state) == (
+        get_csv_data_sum(prev_csv_data) + get_csv_data_sum(csv_data)
+    )
+    assert hass.states.get(f"{STATISTIC_ID}_last_month").state == "unknown"
+    assert Decimal(
+        hass.states.get("sensor.smartmeter_peak_load_this_month").state
+    ) == 4 * max(
+        parse_german_number_str_to_decimal(row[get_csv_data_value_key(data)])
+        for data in (prev_csv_data, csv_data)
+        for row in data
+    )
+
+    # importing a day again only applies its changes
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_IMPORT_REPORT,
+        service_data={"entity_id": STATISTIC_ID, "path": "tests/data/2022-09-17.csv"},
+        blocking=True,
+    )
+    await async_wait_recording_done(hass)
+    assert Decimal(hass.states.get(f"{STATISTIC_ID}_this_month").state) == (
+        get_csv_data_sum(prev_csv_data) + get_csv_data_sum(csv_data)
+    )
+
 
 async def test_import_service_with_missing_file(hass):
     """Test import service with missing file."""
@@ -386,7 +557,1117 @@ async def test_import_service_with_invalid_hour_block_prefix(hass):
     assert err
 
 
-def test_invalid_hour_block_length():
-    """Test hour block validation with invalid length."""
+async def test_import_reports_service_with_multiple_files(hass):
+    """Test import reports service with multiple files."""
 
-    assert not validate_hour_block(DATA_WITH_INVALID_LENGTH)
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_IMPORT_REPORTS,
+        service_data={
+            "entity_id": STATISTIC_ID,
+            "paths": ["tests/data/2022-09-18.csv", "tests/data/2022-09-1[7].csv"],
+        },
+        blocking=True,
+    )
+    await async_wait_recording_done(hass)
+
+    prev_csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-18.csv")
+    stats = await get_statistics(
+        hass, parse_csv_date_str(prev_csv_data[0][START_TIME_KEY])
+    )
+    assert len(stats) == 1
+    assert len(stats[STATISTIC_ID]) == 48
+    assert parse_value_to_decimal(stats[STATISTIC_ID][-1]["sum"]) == (
+        get_csv_data_sum(prev_csv_data) + get_csv_data_sum(csv_data)
+    )
+
+
+async def test_import_service_with_compressed_reports(hass, tmp_path):
+    """Test import service with gzip and zip compressed reports."""
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    with open("tests/data/2022-09-17.csv", "rb") as file, gzip.open(
+        tmp_path / "2022-09-17.csv.gz", "wb"
+    ) as gzip_file:
+        shutil.copyfileobj(file, gzip_file)
+    with zipfile.ZipFile(tmp_path / "2022-09.zip", "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.write("tests/data/2022-09-18.csv", "2022-09-18.csv")
+        archive.write("tests/data/2022-09-17.csv", "2022-09-17.csv")
+
+    prev_csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-18.csv")
+    start_time = parse_csv_date_str(prev_csv_data[0][START_TIME_KEY])
+    assert get_csv_data_list_from_file(str(tmp_path / "2022-09-17.csv.gz")) == (
+        prev_csv_data
+    )
+
+    await call_import_service(hass, path=str(tmp_path / "2022-09-17.csv.gz"))
+    stats = await get_statistics(hass, start_time)
+    assert len(stats[STATISTIC_ID]) == 24
+    assert parse_value_to_decimal(stats[STATISTIC_ID][-1]["sum"]) == (
+        get_csv_data_sum(prev_csv_data)
+    )
+
+    await call_import_service(hass, path=str(tmp_path / "2022-09.zip"))
+    stats = await get_statistics(hass, start_time)
+    assert len(stats[STATISTIC_ID]) == 48
+    assert parse_value_to_decimal(stats[STATISTIC_ID][-1]["sum"]) == (
+        get_csv_data_sum(prev_csv_data) + get_csv_data_sum(csv_data)
+    )
+
+    (tmp_path / "corrupted.csv.gz").write_bytes(
+        (tmp_path / "2022-09-17.csv.gz").read_bytes()[:-64]
+    )
+    with pytest.raises(HomeAssistantError, match="cannot be read"):
+        await call_import_service(hass, path=str(tmp_path / "corrupted.csv.gz"))
+
+    # any gzip compressed report is read completely, also by incremental imports
+    shutil.copy(tmp_path / "2022-09-17.csv.gz", tmp_path / "report.gz")
+    await call_import_service(hass, path=str(tmp_path / "report.gz"), incremental=True)
+
+
+async def test_import_service_dry_run(hass, tmp_path):
+    """Test import service dry run returns the differences without writing."""
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    start_time = parse_csv_date_str(csv_data[0][START_TIME_KEY])
+    response = await call_import_service(
+        hass, path="tests/data/2022-09-17.csv", dry_run=True
+    )
+    assert response == {
+        "hours": 24,
+        "changed_hours": 24,
+        "rewritten_hours": 0,
+        "sum_delta": float(get_csv_data_sum(csv_data)),
+        "first_divergence": start_time.isoformat(),
+    }
+    assert await get_statistics(hass, start_time) == {}
+
+    response = await call_import_service(hass, path="tests/data/2022-09-17.csv")
+    assert response["hours"] == 24
+    assert response["changed_hours"] == 24
+    stats = await get_statistics(hass, start_time)
+
+    with open("tests/data/2022-09-17.csv", encoding="UTF-8") as file:
+        lines = file.readlines()
+    # increase the first QH value of the 6th hour by 1 kWh
+    columns = lines[1 + 5 * 4].split(";")
+    columns[2] = str(parse_german_number_str_to_decimal(columns[2]) + 1).replace(
+        ".", ","
+    )
+    lines[1 + 5 * 4] = ";".join(columns)
+    report_path = tmp_path / "2022-09-17.csv"
+    report_path.write_text("".join(lines), encoding="UTF-8")
+
+    response = await call_import_service(hass, path=str(report_path), dry_run=True)
+    assert response == {
+        "hours": 24,
+        "changed_hours": 24 - 5,
+        "rewritten_hours": 24 - 5,
+        "sum_delta": 1.0,
+        "first_divergence": (start_time + timedelta(hours=5)).isoformat(),
+    }
+    assert await get_statistics(hass, start_time) == stats
+
+    with patch(
+        "custom_components.linznetz.sensor.async_import_statistics"
+    ) as import_mock:
+        response = await call_import_service(
+            hass, path="tests/data/2022-09-17.csv", dry_run=True
+        )
+        await call_import_service(hass, path="tests/data/2022-09-17.csv")
+    assert response["changed_hours"] == 0
+    assert response["first_divergence"] is None
+    import_mock.assert_not_called()
+
+
+async def test_import_service_with_tariff(hass, tmp_path):
+    """Test import service imports the costs of the hours with the energy."""
+
+    await hass.config.async_set_time_zone("Europe/Vienna")
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=MOCK_CONFIG,
+        options={CONF_TARIFF: "0,20; 00:00-06:00=0,10"},
+    )
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    cost_statistic_id = f"{DOMAIN}:{MOCK_CONFIG[CONF_METER_POINT_NUMBER].lower()}_cost"
+
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    csv_data_value_key = get_csv_data_value_key(csv_data)
+    start_time = parse_csv_date_str(csv_data[0][START_TIME_KEY])
+    expected_cost = sum(
+        parse_german_number_str_to_decimal(row[csv_data_value_key])
+        * (Decimal("0.10") if int(row[START_TIME_KEY][11:13]) < 6 else Decimal("0.20"))
+        for row in csv_data
+    )
+
+    response = await call_import_service(
+        hass, path="tests/data/2022-09-17.csv", dry_run=True
+    )
+    assert response["cost_delta"] == pytest.approx(float(expected_cost))
+    assert await get_statistics(hass, start_time, statistic_id=cost_statistic_id) == {}
+
+    await call_import_service(hass, path="tests/data/2022-09-17.csv")
+    stats = await get_statistics(hass, start_time, statistic_id=cost_statistic_id)
+    assert len(stats[cost_statistic_id]) == 24
+    assert stats[cost_statistic_id][-1]["sum"] == pytest.approx(float(expected_cost))
+
+    with open("tests/data/2022-09-17.csv", encoding="UTF-8") as file:
+        lines = file.readlines()
+    # increase the first QH value of the 6th and 7th hour by 1 kWh
+    for index in (1 + 5 * 4, 1 + 6 * 4):
+        columns = lines[index].split(";")
+        columns[2] = str(
+            parse_german_number_str_to_decimal(columns[2]) + 1
+        ).replace(".", ",")
+        lines[index] = ";".join(columns)
+    report_path = tmp_path / "2022-09-17.csv"
+    report_path.write_text("".join(lines), encoding="UTF-8")
+
+    response = await call_import_service(hass, path=str(report_path), dry_run=True)
+    assert response["cost_delta"] == pytest.approx(0.3)
+
+    await call_import_service(hass, path=str(report_path))
+    stats = await get_statistics(hass, start_time, statistic_id=cost_statistic_id)
+    assert stats[cost_statistic_id][-1]["sum"] == pytest.approx(
+        float(expected_cost) + 0.3
+    )
+
+
+async def test_import_service_skips_unchanged_hours(hass, tmp_path):
+    """Test repeated imports skip unchanged reports and only submit changed hours."""
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    async def import_report(path):
+        with patch(
+            "custom_components.linznetz.sensor.async_import_statistics",
+            wraps=async_import_statistics,
+        ) as import_mock, patch(
+            "custom_components.linznetz.sensor.parse_report_file_series",
+            wraps=parse_report_file_series,
+        ) as parse_mock:
+            await call_import_service(hass, path=str(path))
+        return parse_mock.call_count, [
+            len(call.args[2]) for call in import_mock.call_args_list
+        ]
+
+    with open("tests/data/2022-09-17.csv", encoding="UTF-8") as file:
+        lines = file.readlines()
+    report_path = tmp_path / "2022-09-17.csv"
+    report_path.write_text("".join(lines), encoding="UTF-8")
+    # the 6th hour with its first QH value increased by 1 kWh
+    columns = lines[1 + 5 * 4].split(";")
+    columns[2] = str(parse_german_number_str_to_decimal(columns[2]) + 1).replace(
+        ".", ","
+    )
+    lines[1 + 5 * 4] = ";".join(columns)
+    corrected_report_path = tmp_path / "2022-09-17-corrected.csv"
+    corrected_report_path.write_text("".join(lines), encoding="UTF-8")
+
+    assert await import_report(report_path) == (1, [24])
+    assert await import_report(report_path) == (0, [])
+
+    # the sums of the hours after the corrected hour change as well
+    assert await import_report(corrected_report_path) == (1, [24 - 5])
+    assert await import_report(report_path) == (1, [24 - 5])
+    assert await import_report(report_path) == (0, [])
+
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    stats = await get_statistics(hass, parse_csv_date_str(csv_data[0][START_TIME_KEY]))
+    assert parse_value_to_decimal(stats[STATISTIC_ID][-1]["sum"]) == get_csv_data_sum(
+        csv_data
+    )
+
+
+async def test_import_service_reimports_reports_on_changed_options(hass):
+    """Test reports are imported again after options changing their statistics."""
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    async def import_report():
+        response = await call_import_service(hass, path="tests/data/2022-09-17.csv")
+        return response["skipped"]
+
+    assert not await import_report()
+    assert await import_report()
+
+    hass.config_entries.async_update_entry(
+        config_entry, options={CONF_QUARTER_HOUR_DAYS: 100000}
+    )
+    await hass.async_block_till_done()
+    assert not await import_report()
+    assert await import_report()
+
+
+async def test_import_reports_service_in_chunks(hass):
+    """Test import reports service submits the statistics in chunks."""
+
+    config_entry = MockConfigEntry(
+        domain=DOMAIN, data=MOCK_CONFIG, options={CONF_IMPORT_CHUNK_SIZE: 24}
+    )
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    progress_events = async_capture_events(hass, EVENT_IMPORT_PROGRESS)
+
+    paths = ["tests/data/2022-09-17.csv", "tests/data/2022-09-18.csv"]
+    with patch(
+        "custom_components.linznetz.sensor.async_import_statistics",
+        wraps=async_import_statistics,
+    ) as import_mock:
+        response = await call_import_service(hass, SERVICE_IMPORT_REPORTS, paths=paths)
+    assert [len(call.args[2]) for call in import_mock.call_args_list] == [24, 24]
+    assert [
+        (event.data["submitted"], event.data["total"]) for event in progress_events
+    ] == [(24, 48), (48, 48)]
+    assert progress_events[0].data["entity_id"] == STATISTIC_ID
+    assert response["hours"] == 48
+    assert response["changed_hours"] == 48
+    assert response["rewritten_hours"] == 0
+    assert response["first_start"] == parse_csv_date_str(
+        "17.09.2022 00:00"
+    ).isoformat()
+    assert response["last_start"] == parse_csv_date_str(
+        "18.09.2022 23:00"
+    ).isoformat()
+    assert response["duration"] > 0
+    assert not response["skipped"]
+
+    response = await call_import_service(hass, SERVICE_IMPORT_REPORTS, paths=paths)
+    assert response["skipped"]
+    assert response["hours"] == 0
+
+    prev_csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-18.csv")
+    stats = await get_statistics(
+        hass, parse_csv_date_str(prev_csv_data[0][START_TIME_KEY])
+    )
+    assert len(stats[STATISTIC_ID]) == 48
+    assert parse_value_to_decimal(stats[STATISTIC_ID][-1]["sum"]) == (
+        get_csv_data_sum(prev_csv_data) + get_csv_data_sum(csv_data)
+    )
+
+
+async def test_import_service_queries_recorder_once(hass):
+    """Test the stored statistics are only read once into the cache."""
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    with patch(
+        "custom_components.linznetz.sensor.statistics_during_period",
+        wraps=statistics_during_period,
+    ) as query_mock:
+        for path in ("tests/data/2022-09-17.csv", "tests/data/2022-09-18.csv"):
+            await hass.services.async_call(
+                DOMAIN,
+                SERVICE_IMPORT_REPORT,
+                service_data={"entity_id": STATISTIC_ID, "path": path},
+                blocking=True,
+            )
+            await async_wait_recording_done(hass)
+    assert query_mock.call_count == 1
+
+    prev_csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-18.csv")
+    stats = await get_statistics(
+        hass, parse_csv_date_str(prev_csv_data[0][START_TIME_KEY])
+    )
+    assert len(stats[STATISTIC_ID]) == 48
+    assert parse_value_to_decimal(stats[STATISTIC_ID][-1]["sum"]) == (
+        get_csv_data_sum(prev_csv_data) + get_csv_data_sum(csv_data)
+    )
+
+
+async def test_concurrent_imports_of_an_entity(hass):
+    """Test concurrent imports of an entity, e.g. by the watcher, wait for each other."""
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    submit_statistics = LinzNetzSensor._async_submit_statistics
+
+    async def slow_submit_statistics(self, *args, **kwargs):
+        # give the other import a chance to run while the statistics are submitted
+        await asyncio.sleep(0.1)
+        await submit_statistics(self, *args, **kwargs)
+
+    with patch.object(
+        LinzNetzSensor, "_async_submit_statistics", slow_submit_statistics
+    ):
+        await asyncio.gather(
+            hass.services.async_call(
+                DOMAIN,
+                SERVICE_IMPORT_REPORT,
+                service_data={
+                    "entity_id": STATISTIC_ID,
+                    "path": "tests/data/2022-09-17.csv",
+                },
+                blocking=True,
+            ),
+            hass.services.async_call(
+                DOMAIN,
+                SERVICE_IMPORT_REPORT,
+                service_data={
+                    "entity_id": STATISTIC_ID,
+                    "path": "tests/data/2022-09-18.csv",
+                    "incremental": True,
+                },
+                blocking=True,
+            ),
+        )
+    await async_wait_recording_done(hass)
+
+    prev_csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-18.csv")
+    stats = await get_statistics(
+        hass, parse_csv_date_str(prev_csv_data[0][START_TIME_KEY])
+    )
+    assert len(stats[STATISTIC_ID]) == 48
+    assert parse_value_to_decimal(stats[STATISTIC_ID][-1]["sum"]) == (
+        get_csv_data_sum(prev_csv_data) + get_csv_data_sum(csv_data)
+    )
+
+
+async def test_import_service_after_restart_uses_snapshot(hass):
+    """Test the statistics snapshot is used instead of the recorder after a reload."""
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    config_entry.add_to_hass(hass)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_IMPORT_REPORT,
+        service_data={"entity_id": STATISTIC_ID, "path": "tests/data/2022-09-17.csv"},
+        blocking=True,
+    )
+    await async_wait_recording_done(hass)
+
+    assert await async_unload_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    assert hass.data[DOMAIN][config_entry.entry_id].loaded
+
+    with patch(
+        "custom_components.linznetz.sensor.statistics_during_period",
+        wraps=statistics_during_period,
+    ) as query_mock:
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_IMPORT_REPORT,
+            service_data={
+                "entity_id": STATISTIC_ID,
+                "path": "tests/data/2022-09-18.csv",
+            },
+            blocking=True,
+        )
+        await async_wait_recording_done(hass)
+    query_mock.assert_not_called()
+
+    prev_csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-18.csv")
+    stats = await get_statistics(
+        hass, parse_csv_date_str(prev_csv_data[0][START_TIME_KEY])
+    )
+    assert len(stats[STATISTIC_ID]) == 48
+    assert parse_value_to_decimal(stats[STATISTIC_ID][-1]["sum"]) == (
+        get_csv_data_sum(prev_csv_data) + get_csv_data_sum(csv_data)
+    )
+
+
+async def test_import_service_ignores_outdated_snapshot(hass):
+    """Test a snapshot of statistics the recorder no longer has is not used."""
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    config_entry.add_to_hass(hass)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_IMPORT_REPORT,
+        service_data={"entity_id": STATISTIC_ID, "path": "tests/data/2022-09-17.csv"},
+        blocking=True,
+    )
+    await async_wait_recording_done(hass)
+
+    assert await async_unload_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    get_instance(hass).async_clear_statistics([STATISTIC_ID])
+    await async_wait_recording_done(hass)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    with patch(
+        "custom_components.linznetz.sensor.statistics_during_period",
+        wraps=statistics_during_period,
+    ) as query_mock:
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_IMPORT_REPORT,
+            service_data={
+                "entity_id": STATISTIC_ID,
+                "path": "tests/data/2022-09-17.csv",
+            },
+            blocking=True,
+        )
+        await async_wait_recording_done(hass)
+    query_mock.assert_called_once()
+
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    stats = await get_statistics(hass, parse_csv_date_str(csv_data[0][START_TIME_KEY]))
+    assert len(stats[STATISTIC_ID]) == 24
+    assert parse_value_to_decimal(stats[STATISTIC_ID][-1]["sum"]) == get_csv_data_sum(
+        csv_data
+    )
+
+
+async def test_import_reports_service_with_directory(hass):
+    """Test import reports service with a directory after a single report."""
+
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-18.csv")
+    await prepare_and_call_import_service_mocked(hass, csv_data)
+
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_IMPORT_REPORTS,
+        service_data={
+            "entity_id": STATISTIC_ID,
+            "paths": "tests/data",
+        },
+        blocking=True,
+    )
+    await async_wait_recording_done(hass)
+
+    stats = await get_statistics(hass, parse_csv_date_str("27.03.2022 00:00"))
+    assert len(stats) == 1
+    assert len(stats[STATISTIC_ID]) == 23 + 24 + 24 + 25
+    assert parse_value_to_decimal(stats[STATISTIC_ID][-1]["sum"]) == sum(
+        get_csv_data_sum(get_csv_data_list_from_file(f"tests/data/{file_name}"))
+        for file_name in (
+            "2022-03-27.csv",
+            "2022-09-17.csv",
+            "2022-09-18.csv",
+            "2022-10-30.csv",
+        )
+    )
+
+
+async def test_import_service_correction_in_the_middle(hass):
+    """Test import service shifts the sums of later stored statistics."""
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_IMPORT_REPORTS,
+        service_data={"entity_id": STATISTIC_ID, "paths": "tests/data"},
+        blocking=True,
+    )
+    await async_wait_recording_done(hass)
+    csv_data_sums = {
+        file_name: get_csv_data_sum(
+            get_csv_data_list_from_file(f"tests/data/{file_name}")
+        )
+        for file_name in (
+            "2022-03-27.csv",
+            "2022-09-17.csv",
+            "2022-09-18.csv",
+            "2022-10-30.csv",
+        )
+    }
+
+    modified_csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    csv_data_value_key = get_csv_data_value_key(modified_csv_data)
+    modified_csv_data[0][csv_data_value_key] = "1"
+    await prepare_and_call_import_service_mocked(hass, modified_csv_data)
+
+    stats = await get_statistics(hass, parse_csv_date_str("27.03.2022 00:00"))
+    assert len(stats[STATISTIC_ID]) == 23 + 24 + 24 + 25
+    assert parse_value_to_decimal(stats[STATISTIC_ID][-1]["sum"]) == (
+        sum(csv_data_sums.values())
+        - csv_data_sums["2022-09-17.csv"]
+        + get_csv_data_sum(modified_csv_data)
+    )
+    # the hours after the corrected report are shifted, not recalculated
+    sums_by_start = {
+        stat["start"]: parse_value_to_decimal(stat["sum"])
+        for stat in stats[STATISTIC_ID]
+    }
+    assert sums_by_start[parse_csv_date_str("18.09.2022 23:00").timestamp()] == (
+        csv_data_sums["2022-03-27.csv"]
+        + get_csv_data_sum(modified_csv_data)
+        + csv_data_sums["2022-09-18.csv"]
+    )
+
+
+async def test_import_service_incremental(hass, tmp_path):
+    """Test incremental import service with a growing report file."""
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    with open("tests/data/2022-09-17.csv", encoding="UTF-8") as file:
+        lines = file.readlines()
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    report_path = tmp_path / "report.csv"
+
+    async def import_incremental(line_count):
+        report_path.write_text("".join(lines[:line_count]), encoding="UTF-8")
+        await call_import_service(hass, path=str(report_path), incremental=True)
+        return await get_statistics(
+            hass, parse_csv_date_str(csv_data[0][START_TIME_KEY])
+        )
+
+    # header and 12 complete hours plus 2 QH values of an incomplete hour
+    stats = await import_incremental(1 + 12 * 4 + 2)
+    assert len(stats[STATISTIC_ID]) == 12
+    assert parse_value_to_decimal(stats[STATISTIC_ID][-1]["sum"]) == get_csv_data_sum(
+        csv_data[: 12 * 4]
+    )
+
+    stats = await import_incremental(len(lines))
+    assert len(stats[STATISTIC_ID]) == 24
+    assert parse_value_to_decimal(stats[STATISTIC_ID][-1]["sum"]) == get_csv_data_sum(
+        csv_data
+    )
+
+    with patch(
+        "custom_components.linznetz.sensor.LinzNetzSensor._async_import_hourly_statistics"
+    ) as import_mock:
+        await import_incremental(len(lines))
+    import_mock.assert_not_called()
+
+
+async def test_import_service_incremental_dry_run(hass, hass_storage, tmp_path):
+    """Test incremental dry runs keep the import progress of the report."""
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    storage_key = f"{STORAGE_KEY}.{config_entry.entry_id}"
+
+    with open("tests/data/2022-09-17.csv", encoding="UTF-8") as file:
+        lines = file.readlines()
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    start_time = parse_csv_date_str(csv_data[0][START_TIME_KEY])
+    report_path = tmp_path / "report.csv"
+
+    async def import_incremental(line_count, dry_run=False):
+        report_path.write_text("".join(lines[:line_count]), encoding="UTF-8")
+        return await call_import_service(
+            hass, path=str(report_path), incremental=True, dry_run=dry_run
+        )
+
+    # header and 2 QH values of an incomplete hour
+    response = await import_incremental(1 + 2, dry_run=True)
+    assert response["hours"] == 0
+    assert storage_key not in hass_storage
+
+    response = await import_incremental(1 + 12 * 4 + 2, dry_run=True)
+    assert response["hours"] == 12
+    assert storage_key not in hass_storage
+    assert await get_statistics(hass, start_time) == {}
+
+    await import_incremental(1 + 12 * 4 + 2)
+    stored_states = deepcopy(hass_storage[storage_key])
+
+    response = await import_incremental(len(lines), dry_run=True)
+    assert response["hours"] == 12
+    assert response["changed_hours"] == 12
+    assert hass_storage[storage_key] == stored_states
+
+    await import_incremental(len(lines))
+    stats = await get_statistics(hass, start_time)
+    assert len(stats[STATISTIC_ID]) == 24
+    assert parse_value_to_decimal(stats[STATISTIC_ID][-1]["sum"]) == get_csv_data_sum(
+        csv_data
+    )
+
+
+async def test_import_service_with_time_range(hass, tmp_path):
+    """Test import service imports only the hours of a time range."""
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    await hass.config.async_set_time_zone("Europe/Vienna")
+
+    report_path = tmp_path / "report.csv"
+    write_report(report_path, date(2022, 10, 1), 60)
+    report = parse_report_file(str(report_path))
+    since = parse_csv_date_str("30.10.2022 00:00")
+    until = parse_csv_date_str("01.11.2022 00:00")
+
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_IMPORT_REPORT,
+        service_data={
+            "entity_id": STATISTIC_ID,
+            "path": str(report_path),
+            "since": "2022-10-30 00:00:00",
+            "until": "2022-11-01 00:00:00",
+        },
+        blocking=True,
+    )
+    await async_wait_recording_done(hass)
+
+    stats = await get_statistics(hass, parse_csv_date_str("01.10.2022 00:00"))
+    # the repeated hour of the daylight saving change
+    assert len(stats[STATISTIC_ID]) == 25 + 24
+    assert parse_value_to_decimal(stats[STATISTIC_ID][-1]["sum"]) == sum(
+        stat["state"]
+        for stat in report.statistics
+        if since <= stat["start"] < until
+    )
+
+    with pytest.raises(HomeAssistantError):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_IMPORT_REPORT,
+            service_data={
+                "entity_id": STATISTIC_ID,
+                "path": str(report_path),
+                "since": "2022-10-30 00:00:00",
+                "incremental": True,
+            },
+            blocking=True,
+        )
+
+
+async def test_import_service_with_time_range_within_hour(hass):
+    """Test a time range not starting on a full hour keeps the QH values of its hours."""
+
+    config_entry = MockConfigEntry(
+        domain=DOMAIN, data=MOCK_CONFIG, options={CONF_QUARTER_HOUR_DAYS: 100000}
+    )
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    await hass.config.async_set_time_zone("Europe/Vienna")
+
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_IMPORT_REPORT,
+        service_data={
+            "entity_id": STATISTIC_ID,
+            "path": "tests/data/2022-09-17.csv",
+            "since": "2022-09-17 14:30:00",
+            "until": "2022-09-17 20:30:00",
+        },
+        blocking=True,
+    )
+    await async_wait_recording_done(hass)
+
+    start_time = parse_csv_date_str("17.09.2022 00:00")
+    stats = await get_statistics(hass, start_time)
+    short_term_stats = await get_statistics(hass, start_time, period="5minute")
+    # the hours from 15:00 until 20:00 with all their QH values
+    assert [stat["start"] for stat in stats[STATISTIC_ID]] == [
+        parse_csv_date_str(f"17.09.2022 {hour}:00").timestamp()
+        for hour in range(15, 21)
+    ]
+    assert len(short_term_stats[STATISTIC_ID]) == 6 * 4
+    assert short_term_stats[STATISTIC_ID][-1]["sum"] == stats[STATISTIC_ID][-1]["sum"]
+
+
+async def test_import_service_with_multiple_meter_points(hass, tmp_path):
+    """Test import service parses a report of multiple meter points only once."""
+
+    meter_points = {
+        "AT0000000000000000000000000000001": "Consumption",
+        "AT0000000000000000000000000000002": "Feed in",
+    }
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    csv_data_value_key = get_csv_data_value_key(csv_data)
+    lines = [f"{START_TIME_KEY};{END_TIME_KEY};{METER_POINT_KEY};Energiemenge in kWh"]
+    for index, meter_point in enumerate(meter_points):
+        lines.extend(
+            f"{d[START_TIME_KEY]};{d[END_TIME_KEY]};{meter_point};"
+            + (d[csv_data_value_key] if index == 0 else "0,001")
+            for d in csv_data
+        )
+    report_path = tmp_path / "report.csv"
+    report_path.write_text("\n".join(lines), encoding="UTF-8")
+
+    for meter_point, name in meter_points.items():
+        config_entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_METER_POINT_NUMBER: meter_point, CONF_NAME: name},
+        )
+        assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    statistic_ids = ["sensor.consumption_energy", "sensor.feed_in_energy"]
+
+    with patch(
+        "custom_components.linznetz.sensor.parse_report_file_series",
+        wraps=parse_report_file_series,
+    ) as parse_mock:
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_IMPORT_REPORT,
+            service_data={"entity_id": statistic_ids, "path": str(report_path)},
+            blocking=True,
+        )
+    await async_wait_recording_done(hass)
+    parse_mock.assert_called_once()
+
+    start_time = parse_csv_date_str(csv_data[0][START_TIME_KEY])
+    consumption_stats = await get_statistics(
+        hass, start_time, statistic_id=statistic_ids[0]
+    )
+    feed_in_stats = await get_statistics(hass, start_time, statistic_id=statistic_ids[1])
+    assert parse_value_to_decimal(
+        consumption_stats[statistic_ids[0]][-1]["sum"]
+    ) == get_csv_data_sum(csv_data)
+    assert parse_value_to_decimal(
+        feed_in_stats[statistic_ids[1]][-1]["sum"]
+    ) == Decimal("0.001") * len(csv_data)
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+async def test_import_service_without_series_of_meter_point(
+    hass, tmp_path, incremental
+):
+    """Test importing reports without a series of the meter point fails."""
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    csv_data_value_key = get_csv_data_value_key(csv_data)
+    lines = [f"{START_TIME_KEY};{END_TIME_KEY};AT001 in kWh;AT002 in kWh"]
+    lines.extend(
+        f"{d[START_TIME_KEY]};{d[END_TIME_KEY]};{d[csv_data_value_key]};0,001"
+        for d in csv_data
+    )
+    report_path = tmp_path / "report.csv"
+    report_path.write_text("\n".join(lines), encoding="UTF-8")
+
+    with pytest.raises(
+        HomeAssistantError,
+        match=r"no series of meter point .*: AT001 in kWh \(consumption\), AT002",
+    ):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_IMPORT_REPORT,
+            service_data={
+                "entity_id": STATISTIC_ID,
+                "path": str(report_path),
+                "incremental": incremental,
+            },
+            blocking=True,
+        )
+
+
+async def test_import_service_copies_shared_statistics_per_entity(hass):
+    """Test entities importing the same report don't share their statistics."""
+
+    statistic_ids = ["sensor.consumption_energy", "sensor.second_energy"]
+    for meter_point, name in (
+        ("AT0000000000000000000000000000001", "Consumption"),
+        ("AT0000000000000000000000000000002", "Second"),
+    ):
+        config_entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_METER_POINT_NUMBER: meter_point, CONF_NAME: name},
+        )
+        assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_IMPORT_REPORT,
+        service_data={
+            "entity_id": statistic_ids[0],
+            "path": "tests/data/2022-09-17.csv",
+        },
+        blocking=True,
+    )
+    await async_wait_recording_done(hass)
+
+    with patch(
+        "custom_components.linznetz.sensor.async_import_statistics",
+        wraps=async_import_statistics,
+    ) as import_mock:
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_IMPORT_REPORT,
+            service_data={
+                "entity_id": statistic_ids,
+                "path": "tests/data/2022-09-18.csv",
+            },
+            blocking=True,
+        )
+    await async_wait_recording_done(hass)
+    submitted = [
+        {id(stat) for stat in call.args[2]} for call in import_mock.call_args_list
+    ]
+    assert len(submitted) == 2
+    assert not submitted[0] & submitted[1]
+
+    prev_csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-18.csv")
+    start_time = parse_csv_date_str(csv_data[0][START_TIME_KEY])
+    for statistic_id, expected_sum in zip(
+        statistic_ids,
+        (
+            get_csv_data_sum(prev_csv_data) + get_csv_data_sum(csv_data),
+            get_csv_data_sum(csv_data),
+        ),
+    ):
+        stats = await get_statistics(hass, start_time, statistic_id=statistic_id)
+        assert parse_value_to_decimal(stats[statistic_id][-1]["sum"]) == expected_sum
+
+
+def test_parse_report_file_with_meter_point_columns(tmp_path):
+    """Test parsing a report with one value column per meter point."""
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    csv_data_value_key = get_csv_data_value_key(csv_data)
+    lines = [f"{START_TIME_KEY};{END_TIME_KEY};AT001 in kWh;AT002 in kWh"]
+    lines.extend(
+        f"{d[START_TIME_KEY]};{d[END_TIME_KEY]};{d[csv_data_value_key]};0,001"
+        for d in csv_data
+    )
+    report_path = tmp_path / "report.csv"
+    report_path.write_text("\n".join(lines), encoding="UTF-8")
+
+    reports = parse_report_file_series(str(report_path))
+
+    assert get_series_report(reports, "AT003") is None
+    assert sum(
+        stat["state"] for stat in get_series_report(reports, "AT001").statistics
+    ) == get_csv_data_sum(csv_data)
+    assert sum(
+        stat["state"] for stat in get_series_report(reports, "AT002").statistics
+    ) == Decimal("0.001") * len(csv_data)
+
+
+@pytest.mark.parametrize(
+    ("start_str", "end_str"),
+    [
+        ("10.10.2022 00:00", "17.10.2022 00:00"),
+        ("30.10.2022 02:00", "30.10.2022 05:00"),
+        ("27.11.2022 13:00", None),
+        (None, "01.10.2022 01:00"),
+        ("29.11.2022 23:00", None),
+    ],
+)
+def test_parse_report_file_range(tmp_path, start_str, end_str):
+    """Test the lines of a time range are parsed like the complete report."""
+    report_path = tmp_path / "report.csv"
+    write_report(report_path, date(2022, 10, 1), 60, substitute_value_rate=0.01)
+    date_parser = CsvDateParser()
+    start = None if start_str is None else date_parser.to_timestamp(start_str)
+    end = None if end_str is None else date_parser.to_timestamp(end_str)
+
+    (report,) = parse_report_file_range(str(report_path), 0, None, start, end).values()
+
+    (expected_report,) = parse_report_file_series(str(report_path), 0).values()
+    for statistics, expected_statistics in (
+        (report.statistics, expected_report.statistics),
+        (report.quarter_hour_statistics, expected_report.quarter_hour_statistics),
+    ):
+        assert statistics == [
+            stat
+            for stat in expected_statistics
+            if (start is None or stat["start"].timestamp() >= start)
+            and (end is None or stat["start"].timestamp() < end)
+        ]
+    assert not parse_report_file_range(
+        str(report_path), 0, None, date_parser.to_timestamp("01.01.2023 00:00")
+    )
+
+
+def test_parse_report_file_with_feed_in_and_substitute_values(tmp_path):
+    """Test parsing a report with consumption, feed-in and substitute values."""
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    csv_data_value_key = get_csv_data_value_key(csv_data)
+    lines = [
+        f"{START_TIME_KEY};{END_TIME_KEY};Verbrauch in kWh;Einspeisung in kWh;Ersatzwert"
+    ]
+    lines.extend(
+        f"{d[START_TIME_KEY]};{d[END_TIME_KEY]};{d[csv_data_value_key]};0,002;"
+        + ("E" if index < 4 else "")
+        for index, d in enumerate(csv_data)
+    )
+    report_path = tmp_path / "report.csv"
+    report_path.write_text("\n".join(lines), encoding="UTF-8")
+
+    reports = parse_report_file_series(str(report_path))
+    consumption = get_series_report(reports, MOCK_CONFIG[CONF_METER_POINT_NUMBER])
+    feed_in = get_series_report(
+        reports, MOCK_CONFIG[CONF_METER_POINT_NUMBER], feed_in=True
+    )
+
+    assert len(reports) == 2
+    assert sum(stat["state"] for stat in consumption.statistics) == get_csv_data_sum(
+        csv_data
+    )
+    assert sum(stat["state"] for stat in feed_in.statistics) == Decimal(
+        "0.002"
+    ) * len(csv_data)
+    assert consumption.substitute_values == feed_in.substitute_values == 4
+
+    tail_report, _ = parse_report_file_tail(
+        str(report_path),
+        None,
+        meter_point=MOCK_CONFIG[CONF_METER_POINT_NUMBER],
+        feed_in=True,
+    )
+    assert tail_report.statistics == feed_in.statistics
+    assert tail_report.substitute_values == 4
+
+
+def test_parse_report_file_tail_with_invalid_encoding(tmp_path):
+    """Test reading the tail of a report which is no UTF-8 text fails like a parse."""
+    report_path = tmp_path / "report.csv"
+    with open("tests/data/2022-09-17.csv", "rb") as file:
+        report_path.write_bytes(file.read() + b"\xff\xfe\n")
+
+    with pytest.raises(HomeAssistantError, match="cannot be read"):
+        parse_report_file_tail(str(report_path), None)
+
+
+def test_invalid_hour_block_length():
+    """Test hour block validation with invalid length."""
+
+    assert not validate_hour_block(DATA_WITH_INVALID_LENGTH)
+
+
+def test_hourly_statistics_from_file():
+    """Test hourly statistics are aggregated from a streamed report file."""
+
+    csv_data = get_csv_data_list_from_file("tests/data/2022-10-30.csv")
+    statistics = get_hourly_statistics_from_file("tests/data/2022-10-30.csv")
+
+    assert len(statistics) == 25
+    assert statistics[2]["start"] + timedelta(hours=1) == statistics[3]["start"]
+    assert sum(stat["state"] for stat in statistics) == get_csv_data_sum(csv_data)
+
+
+@pytest.mark.parametrize(
+    "file_path",
+    ["tests/data/2022-03-27.csv", "tests/data/2022-10-30.csv"],
+)
+def test_csv_date_parser_with_daylight_saving_change(file_path):
+    """Test the fast date parser matches parse_csv_date_str on daylight saving changes."""
+
+    date_parser = CsvDateParser()
+    for record in get_csv_data_list_from_file(file_path):
+        for key in (START_TIME_KEY, END_TIME_KEY):
+            assert date_parser(record[key]) == parse_csv_date_str(record[key])
+
+
+@pytest.mark.parametrize(
+    "file_path",
+    [
+        "tests/data/2022-03-27.csv",
+        "tests/data/2022-09-17.csv",
+        "tests/data/2022-09-18.csv",
+        "tests/data/2022-10-30.csv",
+    ],
+)
+def test_fixed_point_statistics_match_decimal_statistics(file_path):
+    """Test the fixed point path results in the same hourly values as Decimal."""
+
+    fixed_point_statistics = list(
+        iter_hourly_statistics(iter_csv_data_from_file(file_path), fixed_point=True)
+    )
+    decimal_statistics = list(
+        iter_hourly_statistics(iter_csv_data_from_file(file_path), fixed_point=False)
+    )
+    assert fixed_point_statistics == decimal_statistics
+
+
+@pytest.mark.parametrize(
+    "file_path", ["tests/data/2022-03-27.csv", "tests/data/2022-10-30.csv"]
+)
+def test_quarter_hour_statistics_with_daylight_saving_change(file_path):
+    """Test QH statistics follow their hours during daylight saving changes."""
+
+    report = parse_report_file(file_path, quarter_hours_since=0)
+
+    assert len(report.quarter_hour_statistics) == 4 * len(report.statistics)
+    for index, stat in enumerate(report.statistics):
+        quarter_hours = report.quarter_hour_statistics[4 * index : 4 * index + 4]
+        assert [qh["start"] for qh in quarter_hours] == [
+            stat["start"] + timedelta(minutes=15 * qh_index) for qh_index in range(4)
+        ]
+        assert sum(qh["state"] for qh in quarter_hours) == stat["state"]
+
+    since = int(report.statistics[-2]["start"].timestamp())
+    assert len(parse_report_file(file_path, since).quarter_hour_statistics) == 8
+
+
+def test_fixed_point_falls_back_to_decimal():
+    """Test values exceeding the fixed point precision are summed up as Decimal."""
+
+    csv_data = get_csv_data_list_from_file("tests/data/2022-09-17.csv")
+    csv_data_value_key = get_csv_data_value_key(csv_data)
+    csv_data[1][csv_data_value_key] = "0,0005"
+
+    statistics = list(iter_hourly_statistics(csv_data))
+    assert len(statistics) == 24
+    assert sum(stat["state"] for stat in statistics) == get_csv_data_sum(csv_data)
+
+
+@pytest.mark.parametrize(
+    ("number_str", "expected"),
+    [
+        ("0,040", 40),
+        ("1", 1000),
+        ("12,5", 12500),
+        ("-0,010", -10),
+        ("0,0400", 40),
+        ("0,0005", None),
+        ("1.000,5", None),
+        ("", None),
+    ],
+)
+def test_parse_german_number_str_to_fixed_point(number_str, expected):
+    """Test parsing German number strings to fixed point integers."""
+
+    assert parse_german_number_str_to_fixed_point(number_str) == expected
+
+
+def test_new_hourly_statistics_from_rewritten_file(tmp_path):
+    """Test a rewritten report file is read from the beginning again."""
+
+    report_path = tmp_path / "report.csv"
+    with open("tests/data/2022-09-17.csv", encoding="UTF-8") as file:
+        report_path.write_text(file.read(), encoding="UTF-8")
+    statistics, state = get_new_hourly_statistics_from_file(str(report_path), None)
+    assert len(statistics) == 24
+    assert state.offset == report_path.stat().st_size
+
+    with open("tests/data/2022-10-30.csv", encoding="UTF-8") as file:
+        report_path.write_text(file.read(), encoding="UTF-8")
+    statistics, state = get_new_hourly_statistics_from_file(str(report_path), state)
+    assert len(statistics) == 25
+    assert statistics[0]["start"] == parse_csv_date_str("30.10.2022 00:00")
@@ -0,0 +1,104 @@
+"""Test linznetz tariffs."""
+
+from decimal import Decimal
+
+import pytest
+
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.linznetz.report import CsvDateParser, parse_report_file
+from custom_components.linznetz.tariff import load_tariff
+
+
+async def test_time_of_use_tariff_uses_local_hours(hass):
+    """Test time-of-use windows spanning midnight and overriding the base price."""
+
+    await hass.config.async_set_time_zone("Europe/Vienna")
+    tariff = load_tariff("0,20; 22:00-06:00=0.10; 05:30-05:45=0,30")
+    date_parser = CsvDateParser()
+
+    assert (
+        tariff.get_prices(date_parser.to_timestamp("17.09.2022 12:00"))
+        == (Decimal("0.20"),) * 4
+    )
+    assert (
+        tariff.get_prices(date_parser.to_timestamp("17.09.2022 23:00"))
+        == (Decimal("0.10"),) * 4
+    )
+    assert tariff.get_prices(date_parser.to_timestamp("17.09.2022 05:00")) == (
+        Decimal("0.10"),
+        Decimal("0.10"),
+        Decimal("0.30"),
+        Decimal("0.10"),
+    )
+    assert tariff == load_tariff("0,20; 22:00-06:00=0.10; 05:30-05:45=0,30")
+
+
+@pytest.mark.parametrize(
+    "source", ["abc", "0,20; 22:00=0,10", "0,20; 22:10-06:00=0,10", "missing.csv"]
+)
+def test_invalid_tariff(source):
+    """Test invalid tariffs raise an error."""
+
+    with pytest.raises(HomeAssistantError):
+        load_tariff(source)
+
+
+@pytest.mark.parametrize(
+    "row",
+    ["17.09.2022 00:00;17.09.2022 01:00", "17.09.2022 00:00", "17.09.2022;x;0,10"],
+)
+def test_invalid_price_file_row(tmp_path, row):
+    """Test rows without price or valid period raise an error, blank rows are skipped."""
+
+    price_path = tmp_path / "prices.csv"
+    price_path.write_text(
+        "Datum von;Datum bis;Preis in EUR/kWh\n"
+        "17.09.2022 01:00;17.09.2022 02:00;0,10\n"
+        ";;\n"
+        f"{row}\n",
+        encoding="UTF-8",
+    )
+
+    with pytest.raises(HomeAssistantError, match="Invalid row in price file"):
+        load_tariff(str(price_path))
+
+    price_path.write_text(
+        "Datum von;Datum bis;Preis in EUR/kWh\n"
+        "17.09.2022 01:00;17.09.2022 02:00;0,10\n"
+        ";;\n",
+        encoding="UTF-8",
+    )
+    assert (
+        load_tariff(str(price_path)).get_prices(
+            CsvDateParser().to_timestamp("17.09.2022 01:00")
+        )
+        == (Decimal("0.10"),) * 4
+    )
+
+
+def test_price_file_tariff(tmp_path):
+    """Test the costs of the hours covered by a price CSV."""
+
+    price_path = tmp_path / "prices.csv"
+    price_path.write_text(
+        "Datum von;Datum bis;Preis in EUR/kWh\n"
+        "17.09.2022 00:00;17.09.2022 01:00;0,10\n"
+        "17.09.2022 01:00;17.09.2022 01:30;0,20\n"
+        "17.09.2022 01:30;17.09.2022 02:00;0,30\n",
+        encoding="UTF-8",
+    )
+    tariff = load_tariff(str(price_path))
+
+    report = parse_report_file("tests/data/2022-09-17.csv")
+    costed_report = parse_report_file("tests/data/2022-09-17.csv", tariff=tariff)
+
+    assert costed_report.statistics == report.statistics
+    # hours not covered by the price CSV get no cost
+    assert len(costed_report.cost_statistics) == 2
+    first, second = costed_report.cost_statistics
+    assert first["start"] == report.statistics[0]["start"]
+    assert first["state"] == report.statistics[0]["state"] * Decimal("0.10")
+    assert second["start"] == report.statistics[1]["start"]
+    assert Decimal("0.20") * report.statistics[1]["state"] < second["state"]
+    assert second["state"] < Decimal("0.30") * report.statistics[1]["state"]
@@ -0,0 +1,41 @@
+"""Test linznetz consumption totals."""
+
+from datetime import date
+from decimal import Decimal
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.linznetz.totals import ConsumptionTotals, get_previous_month
+
+
+def test_get_previous_month():
+    """Test the previous month across a year change."""
+
+    assert get_previous_month(date(2023, 1, 15)) == date(2022, 12, 1)
+    assert get_previous_month(date(2022, 10, 31)) == date(2022, 9, 1)
+
+
+async def test_totals_use_local_days(hass):
+    """Test hours are added to the totals of their local day and month."""
+
+    await hass.config.async_set_time_zone("Europe/Vienna")
+    totals = ConsumptionTotals()
+
+    # 22:00 UTC is midnight of the next day in Vienna
+    totals.add_hour(dt_util.parse_datetime("2022-09-30T21:00:00+00:00"), Decimal(1))
+    totals.add_hour(dt_util.parse_datetime("2022-09-30T22:00:00+00:00"), Decimal(2))
+    totals.add_hour(dt_util.parse_datetime("2022-09-30T22:00:00+00:00"), Decimal(-1))
+
+    assert totals.days == {date(2022, 9, 30): Decimal(1), date(2022, 10, 1): Decimal(1)}
+    assert totals.months == {
+        date(2022, 9, 1): Decimal(1),
+        date(2022, 10, 1): Decimal(1),
+    }
+
+    totals.add_quarter_hour(
+        dt_util.parse_datetime("2022-09-30T22:00:00+00:00"), Decimal("0.5")
+    )
+    totals.add_quarter_hour(
+        dt_util.parse_datetime("2022-09-30T22:15:00+00:00"), Decimal("0.25")
+    )
+    assert totals.peaks == {date(2022, 10, 1): Decimal(2)}
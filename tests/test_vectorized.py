@@ -0,0 +1,155 @@
+"""Test linznetz vectorized aggregation."""
+
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.linznetz.report import (
+    CsvDateParser,
+    parse_report_file_series,
+)
+from custom_components.linznetz.tariff import load_tariff
+from custom_components.linznetz.vectorized import (
+    VECTORIZED_CHUNK_ROWS,
+    aggregate_hour_blocks,
+    read_fields,
+)
+
+from .benchmarks.report_generator import write_report
+
+pytest.importorskip("numpy")
+
+
+def parse_report_file_series_row_by_row(*args):
+    """Parses a report without the vectorized engine."""
+    with patch(
+        "custom_components.linznetz.report.is_vectorized_engine_available",
+        return_value=False,
+    ):
+        return parse_report_file_series(*args)
+
+
+def assert_reports_match(reports, expected_reports):
+    """Asserts reports and their values (including their exponents) match."""
+    assert reports == expected_reports
+    for series, report in reports.items():
+        expected_report = expected_reports[series]
+        for statistics, expected_statistics in (
+            (report.statistics, expected_report.statistics),
+            (report.quarter_hour_statistics, expected_report.quarter_hour_statistics),
+            (report.cost_statistics, expected_report.cost_statistics),
+        ):
+            assert [str(stat["state"]) for stat in statistics] == [
+                str(stat["state"]) for stat in expected_statistics
+            ]
+
+
+@pytest.mark.parametrize(
+    "file_path",
+    [
+        "tests/data/2022-03-27.csv",
+        "tests/data/2022-09-17.csv",
+        "tests/data/2022-10-30.csv",
+    ],
+)
+def test_vectorized_engine_matches_row_by_row(file_path):
+    """Test the vectorized engine matches the row by row aggregation."""
+
+    tariff = load_tariff("0,20; 22:00-06:00=0,15")
+    assert_reports_match(
+        parse_report_file_series(file_path, 0, tariff),
+        parse_report_file_series_row_by_row(file_path, 0, tariff),
+    )
+
+
+def test_vectorized_engine_matches_row_by_row_over_years(tmp_path):
+    """Test the vectorized engine across chunks and daylight saving changes."""
+
+    report_path = tmp_path / "report.csv"
+    write_report(report_path, date(2021, 1, 1), 2 * 365, substitute_value_rate=0.05)
+    since = int(CsvDateParser().to_timestamp("30.10.2022 00:00"))
+
+    reports = parse_report_file_series(str(report_path), since)
+
+    assert_reports_match(
+        reports, parse_report_file_series_row_by_row(str(report_path), since)
+    )
+    (report,) = reports.values()
+    assert len(report.statistics) == 2 * 365 * 24
+    assert report.substitute_values > 0
+
+
+def test_vectorized_engine_falls_back_to_row_by_row(tmp_path):
+    """Test values with more decimals are aggregated row by row from their chunk on."""
+
+    report_path = tmp_path / "report.csv"
+    write_report(report_path, date(2022, 1, 1), 90)
+    lines = report_path.read_text(encoding="UTF-8").splitlines(keepends=True)
+    # a value with 4 decimals in the second chunk
+    columns = lines[VECTORIZED_CHUNK_ROWS + 10].split(";")
+    columns[2] = "0,1234"
+    lines[VECTORIZED_CHUNK_ROWS + 10] = ";".join(columns)
+    report_path.write_text("".join(lines), encoding="UTF-8")
+
+    reports = parse_report_file_series(str(report_path))
+
+    assert_reports_match(reports, parse_report_file_series_row_by_row(str(report_path)))
+
+
+def test_vectorized_engine_falls_back_on_csv_features(tmp_path):
+    """Test lines with quotes and CRLF line ends are read like by the csv module."""
+
+    report_path = tmp_path / "report.csv"
+    write_report(report_path, date(2022, 1, 1), 40)
+    lines = report_path.read_text(encoding="UTF-8").splitlines()
+    # a quoted value in the second chunk
+    columns = lines[VECTORIZED_CHUNK_ROWS + 10].split(";")
+    columns[2] = f'"{columns[2]}"'
+    lines[VECTORIZED_CHUNK_ROWS + 10] = ";".join(columns)
+    report_path.write_bytes("\r\n".join(lines).encode("UTF-8"))
+
+    reports = parse_report_file_series(str(report_path))
+
+    assert_reports_match(reports, parse_report_file_series_row_by_row(str(report_path)))
+    (report,) = reports.values()
+    assert len(report.statistics) == 40 * 24
+
+
+def test_read_fields():
+    """Test lines are only split if every line has all fields."""
+
+    fields = read_fields(["a;bc;\n", "de;f;g\n"], 3, [1, 2])
+    assert [(values.tolist(), lengths.tolist()) for values, lengths in fields] == [
+        ([[ord("b"), ord("c")], [ord("f"), 0]], [2, 1]),
+        ([[0], [ord("g")]], [0, 1]),
+    ]
+    assert read_fields(["a;b;c;\n", "d;e\n"], 3, [0]) is None
+    assert read_fields(['a;"b;c"\n'], 2, [0]) is None
+    assert read_fields(["a;b\n", "\n", "c;d\n"], 2, [0]) is None
+
+
+@pytest.mark.parametrize(
+    "value", ["0,1234", "1e3", "", " 1,2", "-,5", "-", "1,2,3", "0.5"]
+)
+def test_aggregate_hour_blocks_rejects_values(value):
+    """Test values which are not fixed point numbers are left to the aggregator."""
+
+    starts = [
+        "17.09.2022 00:00",
+        "17.09.2022 00:15",
+        "17.09.2022 00:30",
+        "17.09.2022 00:45",
+    ]
+    ends = [*starts[1:], "17.09.2022 01:00"]
+    date_parser = CsvDateParser()
+
+    def aggregate(values):
+        lines = [";".join(row) + "\n" for row in zip(starts, ends, values)]
+        start_fields, end_fields, value_fields = read_fields(lines, 3, [0, 1, 2])
+        return aggregate_hour_blocks(
+            start_fields, end_fields, [value_fields], date_parser.to_timestamp
+        )
+
+    assert aggregate(["0,1", "-0,2", "3", "4,"]).hourly_sums == [[6900]]
+    assert aggregate(["0,1", "0,2", "0,3", value]) is None
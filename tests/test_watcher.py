@@ -0,0 +1,168 @@
+"""Test linznetz report folder watcher."""
+
+import asyncio
+from datetime import timedelta
+import shutil
+
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+from pytest_homeassistant_custom_component.components.recorder.common import (
+    async_wait_recording_done,
+)
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.linznetz import async_setup_entry
+from custom_components.linznetz.const import (
+    CONF_WATCH_FOLDER,
+    DOMAIN,
+    WATCH_DEBOUNCE_DELAY,
+    WATCH_SCAN_INTERVAL_MINUTES,
+)
+from custom_components.linznetz.report import parse_csv_date_str
+from custom_components.linznetz.watcher import (
+    ReportFolderWatcher,
+    _ReportEventHandler,
+)
+
+from .const import MOCK_CONFIG
+from .test_sensor import STATISTIC_ID, get_statistics
+
+
+@pytest.fixture(autouse=True)
+def auto_recorder_mock_and_enable_custom_integrations(
+    recorder_mock, enable_custom_integrations
+):
+    """Enables recorder_mock and custom_integrations fixtures in the right order."""
+    yield
+
+
+@pytest.fixture
+def scan_without_file_system_notifications():
+    """Falls back to scanning the folder, independent of watchdog being installed."""
+    with patch("custom_components.linznetz.watcher.Observer", None):
+        yield
+
+
+async def fire_time_changed(hass, delta: timedelta):
+    """Helper to move the time forward and wait for the triggered imports."""
+    async_fire_time_changed(hass, dt_util.utcnow() + delta)
+    await hass.async_block_till_done()
+    await async_wait_recording_done(hass)
+
+
+@pytest.mark.usefixtures("scan_without_file_system_notifications")
+async def test_watched_folder_imports_new_report(hass, tmp_path):
+    """Test reports copied to the watched folder are imported after the debounce delay."""
+
+    shutil.copy("tests/data/2022-09-17.csv", tmp_path / "2022-09-17.csv")
+    config_entry = MockConfigEntry(
+        domain=DOMAIN, data=MOCK_CONFIG, options={CONF_WATCH_FOLDER: str(tmp_path)}
+    )
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    stats = await get_statistics(hass, parse_csv_date_str("17.09.2022 00:00"))
+    assert len(stats) == 0
+
+    await fire_time_changed(hass, timedelta(seconds=WATCH_DEBOUNCE_DELAY + 1))
+    stats = await get_statistics(hass, parse_csv_date_str("17.09.2022 00:00"))
+    assert len(stats[STATISTIC_ID]) == 24
+
+    shutil.copy("tests/data/2022-09-18.csv", tmp_path / "2022-09-18.csv")
+    await fire_time_changed(hass, timedelta(minutes=WATCH_SCAN_INTERVAL_MINUTES))
+    await fire_time_changed(
+        hass,
+        timedelta(
+            minutes=WATCH_SCAN_INTERVAL_MINUTES, seconds=WATCH_DEBOUNCE_DELAY + 1
+        ),
+    )
+    stats = await get_statistics(hass, parse_csv_date_str("17.09.2022 00:00"))
+    assert len(stats[STATISTIC_ID]) == 48
+
+
+@pytest.mark.usefixtures("scan_without_file_system_notifications")
+async def test_watcher_skips_unchanged_reports(hass, tmp_path):
+    """Test only new or changed report files are imported and writes are debounced."""
+
+    report_path = tmp_path / "report.csv"
+    shutil.copy("tests/data/2022-09-17.csv", report_path)
+    (tmp_path / "notes.txt").write_text("not a report", encoding="UTF-8")
+    import_report = AsyncMock()
+    watcher = ReportFolderWatcher(hass, str(tmp_path), import_report)
+    await watcher.async_start()
+
+    await fire_time_changed(hass, timedelta(seconds=WATCH_DEBOUNCE_DELAY + 1))
+    import_report.assert_awaited_once_with(str(report_path))
+
+    import_report.reset_mock()
+    await fire_time_changed(hass, timedelta(minutes=WATCH_SCAN_INTERVAL_MINUTES))
+    await fire_time_changed(hass, timedelta(minutes=WATCH_SCAN_INTERVAL_MINUTES + 1))
+    import_report.assert_not_awaited()
+
+    with open(report_path, "a", encoding="UTF-8") as file:
+        file.write("\n")
+    await fire_time_changed(hass, timedelta(minutes=2 * WATCH_SCAN_INTERVAL_MINUTES))
+    import_report.assert_not_awaited()
+    await fire_time_changed(
+        hass,
+        timedelta(
+            minutes=2 * WATCH_SCAN_INTERVAL_MINUTES, seconds=WATCH_DEBOUNCE_DELAY + 1
+        ),
+    )
+    import_report.assert_awaited_once_with(str(report_path))
+
+    watcher.async_stop()
+
+
+def test_report_event_handler_forwards_report_changes(tmp_path):
+    """Test only created, modified or moved report files are forwarded to the loop."""
+    events = pytest.importorskip("watchdog.events")
+
+    hass = MagicMock()
+    report_changed = MagicMock()
+    handler = _ReportEventHandler(hass, report_changed)
+    report_path = str(tmp_path / "report.csv")
+
+    handler.dispatch(events.FileCreatedEvent(report_path))
+    handler.dispatch(events.FileModifiedEvent(report_path))
+    handler.dispatch(events.FileMovedEvent(str(tmp_path / "report.tmp"), report_path))
+    assert (
+        hass.loop.call_soon_threadsafe.call_args_list
+        == [((report_changed, report_path),)] * 3
+    )
+
+    hass.loop.call_soon_threadsafe.reset_mock()
+    handler.dispatch(events.FileDeletedEvent(report_path))
+    handler.dispatch(events.FileCreatedEvent(str(tmp_path / "notes.txt")))
+    handler.dispatch(events.DirCreatedEvent(str(tmp_path / "reports.csv")))
+    hass.loop.call_soon_threadsafe.assert_not_called()
+
+
+async def test_watcher_imports_reports_on_file_system_notifications(hass, tmp_path):
+    """Test the observer reports new files and is stopped with the watcher."""
+    pytest.importorskip("watchdog.observers")
+
+    import_report = AsyncMock()
+    watcher = ReportFolderWatcher(hass, str(tmp_path), import_report)
+    await watcher.async_start()
+    observer = watcher._observer
+    assert observer is not None and observer.is_alive()
+
+    report_path = tmp_path / "report.csv"
+    shutil.copy("tests/data/2022-09-17.csv", report_path)
+    for _ in range(50):
+        if str(report_path) in watcher._pending_imports:
+            break
+        await asyncio.sleep(0.1)
+    await fire_time_changed(hass, timedelta(seconds=WATCH_DEBOUNCE_DELAY + 1))
+    import_report.assert_awaited_once_with(str(report_path))
+
+    watcher.async_stop()
+    await hass.async_block_till_done()
+    assert watcher._observer is None
+    assert not observer.is_alive()